@@ -0,0 +1,53 @@
+"""Benchmark of the ActivateEnv environment derivation engines.
+
+Creates a temporary virtualenv and compares the in-process layout engine
+with the *activate_this.py* execution in a separate process::
+
+    python benchmarks/bench_activateenv.py --repeat 20
+"""
+from __future__ import print_function
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+from virtualenvrunner.activateenv import ActivateEnv
+from virtualenvrunner.runner import Runner
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def get_engines():
+    return [
+        ('layout', lambda a: ActivateEnv(a)._get_env_via_layout()),  # pylint: disable=protected-access
+        ('process', lambda a: ActivateEnv(a)._get_env_via_process())]  # pylint: disable=protected-access
+
+
+def create_virtualenv(virtualenv_dir):
+    subprocess.check_call([sys.executable, '-m', 'virtualenv', '--no-download',
+                           '-q', virtualenv_dir])
+    return os.path.join(virtualenv_dir, Runner.virtualenv_bin,
+                        'activate_this.py')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    tmpdir = tempfile.mkdtemp(prefix='venv_')
+    try:
+        activate_this = create_virtualenv(os.path.join(tmpdir, 'venv'))
+        for name, engine in get_engines():
+            best = min(timeit.repeat(lambda: engine(activate_this),  # pylint: disable=cell-var-from-loop
+                                     number=1,
+                                     repeat=args.repeat))
+            print('{name:<8} {ms:10.3f} ms'.format(name=name, ms=best * 1000))
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
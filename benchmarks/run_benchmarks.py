@@ -0,0 +1,260 @@
+"""Benchmark suite of the Runner setup and run overhead.
+
+Measures the cold creation, the warm and the readonly reuse of the
+*virtualenv*, the creation of the empty *virtualenv* with each backend,
+the ActivateEnv environment derivation, the installation log throughput
+of large command output and the TmpVenvRunner creation and teardown. The
+requirements are synthetic wheels built to a local wheelhouse so no index
+is accessed. The results are written to a JSON file which can be compared
+to the results of an earlier release::
+
+    python benchmarks/run_benchmarks.py --output new.json --compare old.json
+"""
+from __future__ import print_function
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+import zipfile
+from virtualenvrunner._version import get_version
+from virtualenvrunner.backends import get_backend_names
+from virtualenvrunner.logsinks import RingBufferSink
+from virtualenvrunner.runner import (
+    Runner,
+    ReadonlyRunner,
+    TmpVenvRunner)
+from virtualenvrunner.wheelhouse import Wheelhouse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_activateenv import get_engines  # noqa: E402 pylint: disable=wrong-import-position
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+WHEEL = ('Wheel-Version: 1.0\n'
+         'Generator: virtualenvrunner-benchmarks\n'
+         'Root-Is-Purelib: true\n'
+         'Tag: py2.py3-none-any\n')
+
+
+def build_wheel(wheelhouse, name, version='1.0'):
+    distinfo = '{name}-{version}.dist-info'.format(name=name, version=version)
+    files = {
+        '{}.py'.format(name): 'VALUE = {!r}\n'.format(name),
+        '{}/METADATA'.format(distinfo): (
+            'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n'.format(
+                name=name, version=version)),
+        '{}/WHEEL'.format(distinfo): WHEEL}
+    record = ''.join('{},,\n'.format(f) for f in sorted(files))
+    files['{}/RECORD'.format(distinfo)] = record + '{}/RECORD,,\n'.format(
+        distinfo)
+    path = os.path.join(wheelhouse, '{name}-{version}-py2.py3-none-any.whl'
+                        .format(name=name, version=version))
+    with zipfile.ZipFile(path, 'w') as whl:
+        for f in sorted(files):
+            whl.writestr(f, files[f])
+
+
+def create_requirements(tmpdir, count):
+    wheelhouse = os.path.join(tmpdir, 'wheelhouse')
+    os.makedirs(wheelhouse)
+    names = ['vrbench{}'.format(i) for i in range(count)]
+    for name in names:
+        build_wheel(wheelhouse, name)
+    requirements = os.path.join(tmpdir, 'requirements.txt')
+    with open(requirements, 'w') as f:
+        f.write(''.join('{}\n'.format(name) for name in names))
+    Wheelhouse(wheelhouse).mark_populated(requirements)
+    return requirements, wheelhouse
+
+
+class Benchmarks(object):
+    """ The benchmark cases in *tmpdir*. Each case method takes a timer
+    and times the measured part of one round.
+    """
+
+    def __init__(self, tmpdir, packages, output_mb):
+        self.tmpdir = tmpdir
+        self.output_mb = output_mb
+        self.requirements, self.wheelhouse = create_requirements(tmpdir,
+                                                                 packages)
+        self.warm_dir = os.path.join(tmpdir, 'warm')
+        self.activate_this = None
+
+    @property
+    def cases(self):
+        cases = [('cold_create', self.cold_create),
+                 ('warm_reuse', self.warm_reuse),
+                 ('readonly_reuse', self.readonly_reuse)]
+        for name in get_backend_names():
+            cases.append(('create_backend_{}'.format(name),
+                          self._create_backend_case(name)))
+        for name, engine in get_engines():
+            cases.append(('activateenv_{}'.format(name),
+                          self._activateenv_case(engine)))
+        cases.extend([('run_in_install_output', self.run_in_install_output),
+                      ('tmpvenv_create_teardown',
+                       self.tmpvenv_create_teardown)])
+        return cases
+
+    def prepare(self):
+        with self._create_runner(Runner, self.warm_dir) as runner:
+            self.activate_this = runner.activate_this
+
+    def cold_create(self, timer):
+        runner = self._create_runner(Runner, os.path.join(self.tmpdir, 'cold'))
+        try:
+            with timer:
+                with runner:
+                    pass
+        finally:
+            runner.remove_virtualenv()
+
+    def warm_reuse(self, timer):
+        with timer:
+            with self._create_runner(Runner, self.warm_dir):
+                pass
+
+    def readonly_reuse(self, timer):
+        with timer:
+            with self._create_runner(ReadonlyRunner, self.warm_dir):
+                pass
+
+    def _create_backend_case(self, backend):
+        def case(timer):
+            runner = Runner(
+                virtualenv_dir=os.path.join(self.tmpdir,
+                                            'backend_{}'.format(backend)),
+                virtualenv_pythonexe=sys.executable)
+            runner.set_virtualenv_backend(backend)
+            try:
+                with timer:
+                    with runner:
+                        pass
+            finally:
+                runner.remove_virtualenv()
+
+        return case
+
+    def _activateenv_case(self, engine):
+        def case(timer):
+            with timer:
+                engine(self.activate_this)
+
+        return case
+
+    def run_in_install_output(self, timer):
+        runner = Runner(virtualenv_dir=self.warm_dir)
+        runner.add_log_sink(RingBufferSink())
+        cmd = ('"{python}" -c "import sys; '
+               'sys.stdout.write((\'x\' * 79 + \'\\n\') * {lines})"'.format(
+                   python=sys.executable,
+                   lines=self.output_mb * 1024 * 1024 // 80))
+        with timer:
+            runner._run_in_install(cmd)  # pylint: disable=protected-access
+
+    def tmpvenv_create_teardown(self, timer):
+        runner = self._create_runner(TmpVenvRunner, None)
+        runner.set_template_virtualenv(self.warm_dir)
+        with timer:
+            with runner:
+                pass
+
+    def _create_runner(self, runner_cls, virtualenv_dir):
+        runner = runner_cls(virtualenv_dir=virtualenv_dir,
+                            virtualenv_reqs=self.requirements,
+                            virtualenv_pythonexe=sys.executable)
+        runner.set_wheelhouse(self.wheelhouse)
+        return runner
+
+
+class Timer(object):
+
+    def __init__(self):
+        self.elapsed = None
+        self._start = None
+
+    def __enter__(self):
+        self._start = timeit.default_timer()
+
+    def __exit__(self, *args):
+        self.elapsed = timeit.default_timer() - self._start
+
+
+def measure(case, repeat):
+    times = []
+    for _ in range(repeat):
+        timer = Timer()
+        case(timer)
+        times.append(timer.elapsed)
+    times.sort()
+    return {'min': times[0],
+            'median': times[len(times) // 2],
+            'repeat': repeat}
+
+
+def run_benchmarks(args):
+    tmpdir = tempfile.mkdtemp(prefix='vrbench_')
+    try:
+        benchmarks = Benchmarks(tmpdir,
+                                packages=args.packages,
+                                output_mb=args.output_mb)
+        benchmarks.prepare()
+        results = {}
+        for name, case in benchmarks.cases:
+            if args.cases and name not in args.cases:
+                continue
+            results[name] = measure(case, args.repeat)
+            print('{name:<26} {ms:12.3f} ms'.format(
+                name=name, ms=results[name]['median'] * 1000))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return {'python': platform.python_version(),
+            'platform': platform.platform(),
+            'version': get_version(),
+            'packages': args.packages,
+            'output_mb': args.output_mb,
+            'results': results}
+
+
+def compare(report, old_report):
+    print('\n{:<26} {:>12} {:>12} {:>8}'.format('case', 'old ms', 'new ms',
+                                                 'ratio'))
+    for name, result in sorted(report['results'].items()):
+        old = old_report['results'].get(name)
+        if old is None:
+            continue
+        print('{name:<26} {old:12.3f} {new:12.3f} {ratio:8.2f}'.format(
+            name=name,
+            old=old['median'] * 1000,
+            new=result['median'] * 1000,
+            ratio=result['median'] / old['median']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--packages', type=int, default=10,
+                        help='number of synthetic wheels in requirements')
+    parser.add_argument('--output-mb', type=int, default=16,
+                        help='megabytes of command output in log throughput')
+    parser.add_argument('--case', dest='cases', action='append',
+                        help='run only the named case, may be repeated')
+    parser.add_argument('--output', help='JSON file for the results')
+    parser.add_argument('--compare', help='JSON results of an earlier run')
+    args = parser.parse_args()
+    report = run_benchmarks(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,6 @@
 import os
 import sys
 import imp
-from collections import namedtuple
 from setuptools import setup, find_packages
 
 
@@ -39,35 +38,30 @@ def get_python_versions():
         'python_versions', python_versions).get_python_versions()
 
 
-class CliFunction(namedtuple('CliFunction', ['cli', 'function'])):
-    pass
-
-
-def get_clifunctions():
+def get_clis():
     return [
-        CliFunction('run_in_virtualenv', 'run'),
-        CliFunction('create_virtualenv', 'run_install'),
-        CliFunction('run_in_readonly_virtualenv', 'run_readonly')]
+        'run_in_virtualenv',
+        'create_virtualenv',
+        'run_in_readonly_virtualenv',
+        'run_in_virtualenv_matrix',
+        'clean_virtualenvs']
 
 
-def get_versionedclifunctions():
-    return  [
-        CliFunction('run_in_virtualenv', 'PYTHONVERSIONRUN.run'),
-        CliFunction('create_virtualenv',
-                    'PYTHONVERSIONRUNINSTALL.run_install'),
-        CliFunction('run_in_readonly_virtualenv',
-                    'PYTHONVERSIONRUNREADONLY.run_readonly')]
+def get_versionedclis():
+    return [
+        'run_in_virtualenv',
+        'create_virtualenv',
+        'run_in_readonly_virtualenv']
 
 
 def get_console_scripts():
-    return (
-        ['{clif.cli} = virtualenvrunner.cli:{clif.function}'.format(
-            clif=clif) for clif in get_clifunctions()] +
-        [('{clif.cli}{version} = '
-          'virtualenvrunner.cli:{clif.function}{major}{minor}'.format(
-             version=v, major=v.major, minor=v.minor, clif=clif))
-         for v in get_python_versions()
-         for clif in get_versionedclifunctions()])
+    return [
+        '{cli} = virtualenvrunner.dispatcher:main'.format(cli=cli)
+        for cli in (['virtualenvrunner'] +
+                    get_clis() +
+                    ['{cli}{version}'.format(cli=cli, version=v)
+                     for v in get_python_versions()
+                     for cli in get_versionedclis()])]
 
 
 def read(fname):
@@ -0,0 +1,7 @@
+from virtualenvrunner.dispatcher import main
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+main()
@@ -0,0 +1,121 @@
+"""
+.. module:: _workerserver
+    :platform: Unix, Windows
+    :synopsis: Request loop of the virtualenv worker process
+
+The module is executed as a script by the interpreter of the virtualenv so
+it must not import :mod:`virtualenvrunner` and it must run in both Python 2
+and Python 3. The requests and the replies are pickled messages prefixed
+with the length. The protocol uses the original stdin and stdout of the
+process while the output of the executed code goes to stderr.
+"""
+import os
+import pickle
+import struct
+import sys
+import traceback
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+HEADER = struct.Struct('>I')
+PROTOCOL = 2
+
+
+def read_message(f):
+    return pickle.loads(read_data(f))
+
+
+def read_data(f):
+    size = HEADER.unpack(_read_exactly(f, HEADER.size))[0]
+    return _read_exactly(f, size)
+
+
+def write_message(f, message):
+    write_data(f, pickle.dumps(message, PROTOCOL))
+
+
+def write_data(f, data):
+    f.write(HEADER.pack(len(data)) + data)
+    f.flush()
+
+
+def _read_exactly(f, size):
+    data = b''
+    while len(data) < size:
+        chunk = f.read(size - len(data))
+        if not chunk:
+            raise EOFError('Connection closed')
+        data += chunk
+    return data
+
+
+def execute(source):
+    code = compile(source, '<worker>', 'exec')
+    try:
+        exec(code, {'__name__': '__main__'})  # pylint: disable=exec-used
+    except SystemExit as e:
+        if e.code not in [None, 0]:
+            raise
+
+
+def call(func, args, kwargs):
+    return func(*args, **kwargs)
+
+
+HANDLERS = {'execute': execute,
+            'call': call}
+
+
+def handle(data):
+    try:
+        request = pickle.loads(data)
+        return pickle.dumps(('ok', HANDLERS[request[0]](*request[1:])),
+                            PROTOCOL)
+    except (Exception, SystemExit) as e:  # pylint: disable=broad-except
+        return pickle.dumps(('error', get_error(e)), PROTOCOL)
+
+
+def get_error(e):
+    return {'type': type(e).__name__,
+            'message': str(e),
+            'traceback': traceback.format_exc(),
+            'exception': _get_pickled_exception(e)}
+
+
+def _get_pickled_exception(e):
+    if not isinstance(e, Exception):
+        return None
+    try:
+        return pickle.dumps(e, PROTOCOL)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def redirect_protocol_streams():
+    protocol_in = os.fdopen(os.dup(0), 'rb')
+    protocol_out = os.fdopen(os.dup(1), 'wb')
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, 0)
+    os.close(devnull)
+    os.dup2(2, 1)
+    return protocol_in, protocol_out
+
+
+def main():
+    sys.path[0] = ''
+    protocol_in, protocol_out = redirect_protocol_streams()
+    while True:
+        try:
+            data = read_data(protocol_in)
+        except EOFError:
+            return
+        reply = handle(data)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        write_data(protocol_out, reply)
+
+
+if __name__ == '__main__':
+    main()
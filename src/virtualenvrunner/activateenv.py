@@ -1,6 +1,8 @@
-from multiprocessing import Process, Queue
 from contextlib import contextmanager
+import io
 import os
+import re
+from virtualenvrunner.envcache import EnvCache, EnvDelta
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
@@ -18,7 +20,102 @@ class _QueueItem(object):
         return self._ret
 
 
+class VirtualenvLayout(object):
+    """ Standard layout of the virtualenv of *activate_this*. The
+    environment changes made by *activate_this.py* are derived from the
+    layout and from *pyvenv.cfg* without executing *activate_this.py*.
+
+    The layout is standard if *pyvenv.cfg* exists and either
+    *activate_this.py* is missing (:mod:`venv`) or it is generated by
+    *virtualenv* and it alters only the known environment variables.
+    """
+
+    known_variables = {'PATH', 'VIRTUAL_ENV', 'VIRTUAL_ENV_PROMPT',
+                       'PKG_CONFIG_PATH'}
+    _environ_assignment = re.compile(
+        r'''os\.environ\[\s*['"](\w+)['"]\s*\]\s*=(?!=)''')
+
+    def __init__(self, activate_this):
+        self._activate_this = activate_this
+        self.bin_dir = os.path.dirname(os.path.abspath(activate_this))
+        self.base = os.path.dirname(self.bin_dir)
+        self._cfg = None
+
+    @property
+    def pyvenv_cfg(self):
+        return os.path.join(self.base, 'pyvenv.cfg')
+
+    @property
+    def cfg(self):
+        if self._cfg is None:
+            self._cfg = self._read_cfg()
+        return self._cfg
+
+    def _read_cfg(self):
+        cfg = {}
+        with io.open(self.pyvenv_cfg, encoding='utf-8') as f:
+            for line in f:
+                key, sep, value = line.partition('=')
+                if sep:
+                    cfg[key.strip()] = value.strip()
+        return cfg
+
+    @property
+    def variables(self):
+        """ Environment variables set by *activate_this.py* or *None* if the
+        layout is not standard.
+        """
+        if not os.path.isfile(self.pyvenv_cfg):
+            return None
+        if not os.path.isfile(self._activate_this):
+            return {'PATH', 'VIRTUAL_ENV'}
+        if 'virtualenv' not in self.cfg:
+            return None
+        variables = self._get_assigned_variables()
+        return variables if variables <= self.known_variables else None
+
+    def _get_assigned_variables(self):
+        with io.open(self._activate_this, encoding='utf-8') as f:
+            return set(self._environ_assignment.findall(f.read()))
+
+    def get_env(self, environ):
+        """ Returns copy of *environ* activated or *None* if the layout is
+        not standard.
+        """
+        variables = self.variables
+        if variables is None:
+            return None
+        env = environ.copy()
+        for variable in variables:
+            getattr(self, '_set_{}'.format(variable.lower()))(env)
+        return env
+
+    def _set_path(self, env):
+        env['PATH'] = os.pathsep.join([self.bin_dir, env.get('PATH', '')])
+
+    def _set_virtual_env(self, env):
+        env['VIRTUAL_ENV'] = self.base
+
+    def _set_virtual_env_prompt(self, env):
+        env['VIRTUAL_ENV_PROMPT'] = (self.cfg.get('prompt') or
+                                     os.path.basename(self.base))
+
+    def _set_pkg_config_path(self, env):
+        pkg_config_path = os.path.join(self.base, 'lib', 'pkgconfig')
+        env['PKG_CONFIG_PATH'] = (
+            os.pathsep.join([pkg_config_path, env['PKG_CONFIG_PATH']])
+            if env.get('PKG_CONFIG_PATH') else
+            pkg_config_path)
+
+
 class ActivateEnv(object):
+    """ The activated environment of the virtualenv of *activate_this*.
+
+    The environment of the standard virtualenv layout is derived in-process
+    via :class:`.VirtualenvLayout`. Otherwise *activate_this.py* is executed
+    in a separate process. The derived changes are stored to the
+    :class:`.EnvCache` of the virtualenv and reused while valid.
+    """
 
     def __init__(self, activate_this):
         self._activate_this = activate_this
@@ -27,14 +124,35 @@ class ActivateEnv(object):
     @property
     def env(self):
         if not self._env:
-            self._env = self._get_env_via_process()
+            self._env = self._get_env()
         return self._env
 
+    def _get_env(self):
+        cache = EnvCache(self._activate_this)
+        delta = cache.load()
+        env = None if delta is None else delta.apply(os.environ)
+        if env is None:
+            env = self._derive_env()
+            cache.save(EnvDelta.from_envs(os.environ, env))
+        return env
+
+    def _derive_env(self):
+        env = self._get_env_via_layout()
+        return self._get_env_via_process() if env is None else env
+
+    def _get_env_via_layout(self):
+        return VirtualenvLayout(self._activate_this).get_env(os.environ)
+
     def _get_env_via_process(self):
+        # multiprocessing is imported only here as it is slow to import and
+        # the environment is usually derived from the layout.
+        from multiprocessing import Process, Queue  # pylint: disable=import-outside-toplevel
         q = Queue()
         p = Process(target=self._get_virtualenv_env, args=(q, ))
         p.start()
-        return q.get().get_return()
+        item = q.get()
+        p.join()
+        return item.get_return()
 
     def _get_virtualenv_env(self, queue):
         with self._return_wrapping(queue):
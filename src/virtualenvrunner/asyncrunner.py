@@ -0,0 +1,311 @@
+"""
+.. module:: asyncrunner
+    :platform: Unix, Windows
+    :synopsis: Asyncio runner for commands in virtualenv
+"""
+import asyncio
+import codecs
+import os
+import subprocess
+from virtualenvrunner.outputstream import OutputStreamBase
+from virtualenvrunner.runner import Runner
+from virtualenvrunner.utils import get_cmdline
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class AsyncRunner(Runner):
+    """ The :mod:`asyncio` counterpart of :class:`.Runner`. The virtualenv
+    is set up in *async with* and the commands are run with *await
+    runner.run(cmd)* via :func:`asyncio.create_subprocess_shell`, so a
+    single event loop can drive many runners concurrently. The setup of
+    :class:`.Runner` is run in the executor while the output of its
+    commands is read in the event loop.
+
+    The custom *run* must be a coroutine function taking at least *env*
+    keyword argument.
+
+    In the lazy setup of :meth:`.Runner.set_lazy_setup` the virtualenv is
+    set up by the first awaited :meth:`run`, :meth:`execute` or
+    :meth:`call`. Accessing *env* or calling :meth:`stream` before them sets
+    the virtualenv up synchronously.
+
+    The lines of the installation log can be consumed with *async for*
+    from :meth:`install_log`:
+
+    >>> async def main():
+    ...     runner = AsyncRunner(virtualenv_reqs='requirements.txt')
+    ...     log = asyncio.ensure_future(print_lines(runner.install_log()))
+    ...     async with runner:
+    ...         await runner.run('crl -h')
+    ...     await log
+    """
+
+    def __init__(self,
+                 virtualenv_dir=None,
+                 virtualenv_reqs=None,
+                 virtualenv_reqs_upd=None,
+                 virtualenv_pythonexe=None,
+                 pip_index_url=None,
+                 run=None):
+        super(AsyncRunner, self).__init__(  # pylint: disable=super-with-arguments
+            virtualenv_dir=virtualenv_dir,
+            virtualenv_reqs=virtualenv_reqs,
+            virtualenv_reqs_upd=virtualenv_reqs_upd,
+            virtualenv_pythonexe=virtualenv_pythonexe,
+            pip_index_url=pip_index_url,
+            run=run or self._async_run)
+        self._log_queues = []
+        self._async_setup_lock = None
+        self._setup_loop = None
+        self._partial_log_line = ''
+
+    async def __aenter__(self):
+        if self._lazy_setup:
+            self._setup_pending = True
+        else:
+            await self._async_setup()
+        return self
+
+    async def __aexit__(self, *args):
+        if self._setup_pending:
+            self._put_to_log_queues(None)
+        await self._run_in_executor(self.__exit__, *args)
+
+    async def _async_setup(self):
+        self._setup_loop = asyncio.get_event_loop()
+        try:
+            await self._run_in_executor(self._setup)
+        finally:
+            self._setup_loop = None
+            self._put_to_log_queues(None)
+
+    async def _async_setup_if_pending(self):
+        if self._async_setup_lock is None:
+            self._async_setup_lock = asyncio.Lock()
+        async with self._async_setup_lock:
+            if self._setup_pending:
+                self._setup_pending = False
+                try:
+                    await self._async_setup()
+                except Exception:
+                    self._setup_pending = True
+                    raise
+
+    def install_log(self):
+        """ Returns asynchronous iterator of the installation log lines
+        written after the call. The iteration ends when the setup is
+        finished.
+        """
+        queue = asyncio.Queue()
+        self._log_queues.append(queue)
+        return self._iterate_queue(queue)
+
+    async def _iterate_queue(self, queue):
+        try:
+            while True:
+                line = await queue.get()
+                if line is None:
+                    return
+                yield line
+        finally:
+            self._log_queues.remove(queue)
+
+    def _put_to_log_queues(self, data):
+        if data is None:
+            lines = [self._partial_log_line] if self._partial_log_line else []
+            lines.append(None)
+            self._partial_log_line = ''
+        else:
+            lines = (self._partial_log_line + data).split('\n')
+            self._partial_log_line = lines.pop()
+            lines = [line + '\n' for line in lines]
+        for queue in self._log_queues:
+            for line in lines:
+                queue.put_nowait(line)
+
+    def _write_log(self, data):
+        super(AsyncRunner, self)._write_log(data)  # pylint: disable=super-with-arguments
+        if self._setup_loop is None:
+            self._put_to_log_queues(data)
+        else:
+            self._setup_loop.call_soon_threadsafe(self._put_to_log_queues,
+                                                  data)
+
+    def _run_in_install(self, cmd, stderr=subprocess.STDOUT, env=None):
+        if self._setup_loop is None:
+            super(AsyncRunner, self)._run_in_install(  # pylint: disable=super-with-arguments
+                cmd, stderr=stderr, env=env)
+        else:
+            asyncio.run_coroutine_threadsafe(
+                self._async_run_in_install(cmd, stderr=stderr, env=env),
+                self._setup_loop).result()
+
+    async def _async_run_in_install(self, cmd, stderr=subprocess.STDOUT,
+                                    env=None):
+        with self._phase('command', command=get_cmdline(cmd)):
+            proc = await self._create_subprocess(cmd, stderr=stderr, env=env)
+            try:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+                while True:
+                    chunk = await proc.stdout.read(self.log_chunk_size)
+                    if not chunk:
+                        break
+                    self._write_log(decoder.decode(chunk))
+                self._log.flush()
+                returncode = await proc.wait()
+            finally:
+                if proc.returncode is None:
+                    try:
+                        proc.kill()
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+            self._raise_if_failed(get_cmdline(cmd), returncode)
+
+    @staticmethod
+    async def _create_subprocess(cmd, stderr, env):
+        if isinstance(cmd, list):
+            return await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=stderr,
+                env=env)
+        return await asyncio.create_subprocess_shell(
+            cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=stderr,
+            env=env)
+
+    @staticmethod
+    async def _run_in_executor(func, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, func,
+                                                              *args)
+
+    async def run(self, *args, **kwargs):  # pylint: disable=invalid-overridden-method
+        await self._async_setup_if_pending()
+        kwargscopy = kwargs.copy()
+        kwargscopy['env'] = self.env
+        with self._phase('run', command=args[0] if args else None):
+            return await self._run(*args, **kwargscopy)
+
+    def stream(self, cmd, lines=False, tee=(), tail_lines=1000):
+        """ The asynchronous counterpart of :meth:`.Runner.stream` returning
+        :class:`.AsyncOutputStream`.
+        """
+        return AsyncOutputStream(cmd, env=self.env, lines=lines, tee=tee,
+                                 tail_lines=tail_lines)
+
+    async def execute(self, source):  # pylint: disable=invalid-overridden-method
+        await self._async_setup_if_pending()
+        with self._phase('execute'):
+            return await self._run_in_executor(self.worker.execute, source)
+
+    async def call(self, func, *args, **kwargs):  # pylint: disable=invalid-overridden-method
+        await self._async_setup_if_pending()
+        with self._phase('call'):
+            return await self._run_in_executor(
+                lambda: self.worker.call(func, *args, **kwargs))
+
+    @staticmethod
+    async def _async_run(cmd, env=None, stdout=None):
+        proc = await asyncio.create_subprocess_shell(cmd,
+                                                     env=env,
+                                                     stdout=stdout)
+        returncode = await proc.wait()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, cmd)
+        return returncode
+
+
+class AsyncOutputStream(OutputStreamBase):
+    """ The asynchronous iterator counterpart of
+    :class:`virtualenvrunner.outputstream.OutputStream`. The command is
+    started on the first iteration and the pipe is read via the
+    :class:`asyncio.StreamReader` whose buffer is limited to *chunk_size*.
+    The pipe is closed together with the stream so that also the children
+    of the shell writing to it are terminated.
+
+    >>> async with AsyncOutputStream('make test', lines=True) as stream:
+    ...     async for line in stream:
+    ...         print(line, end='')
+    """
+
+    def __init__(self, cmd, env=None, lines=False, tee=(), tail_lines=1000,
+                 chunk_size=65536, stderr=subprocess.STDOUT):
+        super(AsyncOutputStream, self).__init__(  # pylint: disable=super-with-arguments
+            cmd, lines=lines, tee=tee, tail_lines=tail_lines,
+            chunk_size=chunk_size)
+        self._env = env
+        self._stderr = stderr
+        self._proc = None
+        self._transport = None
+        self._items = self._iterate()
+
+    @property
+    def returncode(self):
+        return None if self._proc is None else self._proc.returncode
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._items.__anext__()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._items.aclose()
+        await self._terminate()
+
+    async def _iterate(self):
+        reader = await self._start()
+        try:
+            while True:
+                chunk = await reader.read(self.chunk_size)
+                if not chunk:
+                    break
+                for item in self._process(chunk):
+                    yield item
+            for item in self._process(b'', final=True):
+                yield item
+            self._raise_if_failed(await self._proc.wait())
+        finally:
+            await self._terminate()
+
+    async def _start(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            self._proc = await asyncio.create_subprocess_shell(
+                self.cmd,
+                stdout=write_fd,
+                stderr=self._stderr,
+                env=self._env)
+        except Exception:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        reader = asyncio.StreamReader(limit=self.chunk_size)
+        self._transport, _ = await asyncio.get_event_loop().connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader),
+            os.fdopen(read_fd, 'rb', 0))
+        return reader
+
+    async def _terminate(self):
+        if self._proc is not None and self._proc.returncode is None:
+            try:
+                self._proc.kill()
+            except ProcessLookupError:
+                pass
+            await self._proc.wait()
+        if self._transport is not None:
+            self._transport.close()
+            # The pipe is closed in the next iteration of the event loop.
+            await asyncio.sleep(0)
+        self._tee.flush()
@@ -0,0 +1,161 @@
+"""
+.. module:: backends
+    :platform: Unix, Windows
+    :synopsis: Backends creating the virtualenv
+"""
+import threading
+from contextlib import contextmanager
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class ShellBackend(object):
+    """ Creates the *virtualenv* with the command *virtualenv_exe* run in the
+    shell. This is the default backend and the fallback of the other
+    backends.
+    """
+
+    name = 'shell'
+
+    def __init__(self, virtualenv_exe='virtualenv'):
+        self.virtualenv_exe = virtualenv_exe
+
+    def cmd(self, pythonexe, virtualenv_dir):
+        """ Returns the command creating the *virtualenv_dir* for
+        *pythonexe* either as a shell command string or as a list of
+        arguments run without the shell. *None* is returned if the
+        backend creates the *virtualenv* in-process by its *create*.
+        """
+        return ('{virtualenv_exe} --no-download -p {pythonexe} '
+                '{virtualenv_dir}'.format(virtualenv_exe=self.virtualenv_exe,
+                                          pythonexe=pythonexe,
+                                          virtualenv_dir=virtualenv_dir))
+
+
+class VirtualenvBackend(ShellBackend):
+    """ Creates the *virtualenv* in-process via the API of :mod:`virtualenv`
+    so that neither the shell nor the interpreter of *virtualenv* is
+    started. The shell command is used if :mod:`virtualenv` 20 or later is
+    not importable.
+    """
+
+    name = 'virtualenv'
+
+    def cmd(self, pythonexe, virtualenv_dir):
+        if self._get_cli_run() is None:
+            return super(VirtualenvBackend, self).cmd(  # pylint: disable=super-with-arguments
+                pythonexe, virtualenv_dir)
+        return None
+
+    def create(self, pythonexe, virtualenv_dir, write):
+        """ Creates the *virtualenv_dir* for *pythonexe* in-process and
+        writes the log of :mod:`virtualenv` via the callable *write*. Called
+        only if :meth:`cmd` returns *None*.
+        """
+        with _virtualenv_log.capture(write):
+            session = self._get_cli_run()(
+                ['--no-download', '-p', pythonexe, virtualenv_dir],
+                setup_logging=False)
+        write('created virtual environment {}\n'.format(session.creator))
+
+    @staticmethod
+    def _get_cli_run():
+        try:
+            import virtualenv  # pylint: disable=import-outside-toplevel
+        except ImportError:
+            return None
+        return getattr(virtualenv, 'cli_run', None)
+
+
+class VenvBackend(ShellBackend):
+    """ Creates the *virtualenv* with :mod:`venv` of the target interpreter
+    without the shell. The :mod:`venv` of the Python 3.12 and later does not
+    install *setuptools* and *wheel* which the requirements have to provide
+    if they are needed. The *virtualenv* has no *activate_this.py* so it is
+    activated via :class:`virtualenvrunner.activateenv.VirtualenvLayout`.
+    """
+
+    name = 'venv'
+
+    def cmd(self, pythonexe, virtualenv_dir):
+        return [pythonexe, '-m', 'venv', virtualenv_dir]
+
+
+class _ThreadLogCapture(object):
+    """ Captures the records of the logger *name* of at least the level
+    INFO to the *write* of the capturing thread so that the concurrent
+    captures get only the records of their own thread. While captured, the
+    records are not propagated. The :mod:`logging` is imported on the first
+    capture.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._writes = {}
+        self._lock = threading.Lock()
+        self._handler = None
+        self._saved = None
+
+    @contextmanager
+    def capture(self, write):
+        self._add(write)
+        try:
+            yield None
+        finally:
+            self._remove()
+
+    def _add(self, write):
+        import logging  # pylint: disable=import-outside-toplevel
+        with self._lock:
+            if not self._writes:
+                logger = logging.getLogger(self._name)
+                self._saved = logger.level, logger.propagate
+                self._handler = logging.StreamHandler(self)
+                self._handler.setLevel(logging.INFO)
+                logger.addHandler(self._handler)
+                logger.propagate = False
+                if logger.getEffectiveLevel() > logging.INFO:
+                    logger.setLevel(logging.INFO)
+            self._writes[threading.current_thread().ident] = write
+
+    def _remove(self):
+        import logging  # pylint: disable=import-outside-toplevel
+        with self._lock:
+            del self._writes[threading.current_thread().ident]
+            if not self._writes:
+                logger = logging.getLogger(self._name)
+                logger.removeHandler(self._handler)
+                level, logger.propagate = self._saved
+                logger.setLevel(level)
+                self._handler = None
+
+    def write(self, data):
+        write = self._writes.get(threading.current_thread().ident)
+        if write is not None:
+            write(data)
+
+    def flush(self):
+        pass
+
+
+_virtualenv_log = _ThreadLogCapture('virtualenv')
+
+
+BACKENDS = [ShellBackend, VirtualenvBackend, VenvBackend]
+
+
+def get_backend_names():
+    return [backend.name for backend in BACKENDS]
+
+
+def get_backend(name, virtualenv_exe='virtualenv'):
+    """ Returns the backend of *name*, one of :func:`get_backend_names`.
+    The *virtualenv_exe* is the command of the shell backend.
+    """
+    for backend in BACKENDS:
+        if backend.name == name:
+            return backend(virtualenv_exe=virtualenv_exe)
+    raise ValueError('Unknown virtualenv backend {name!r}, choose from '
+                     '{names}'.format(name=name,
+                                      names=', '.join(get_backend_names())))
@@ -0,0 +1,222 @@
+"""
+.. module:: cachemanager
+    :platform: Unix, Windows
+    :synopsis: Garbage collection and LRU eviction of virtualenvs
+"""
+import errno
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from virtualenvrunner.locking import FileLock, LockTimeout
+from virtualenvrunner.utils import get_hidden, is_windows
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+TMP_PREFIX = 'venv_'
+STAGING_SUFFIX = '.staging'
+
+
+LAST_USED = get_hidden('virtualenvrunner_last_used')
+OWNER = get_hidden('virtualenvrunner_owner')
+
+
+def mark_used(virtualenv_dir):
+    """ Updates the last use time of the virtualenv. The errors are ignored
+    as the virtualenv may be read-only.
+    """
+    try:
+        with open(os.path.join(virtualenv_dir, LAST_USED), 'w'):
+            pass
+    except (IOError, OSError):
+        pass
+
+
+def make_tmp_virtualenv_dir():
+    """ Creates the temporary virtualenv directory owned by the current
+    process. The directory is removed by :class:`.CacheManager` if the
+    owner is no longer running.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix=TMP_PREFIX)
+    try:
+        with open(os.path.join(tmp_dir, OWNER), 'w') as f:
+            f.write('{}\n'.format(os.getpid()))
+    except (IOError, OSError):
+        pass
+    return tmp_dir
+
+
+def is_process_alive(pid):
+    if is_windows():
+        # There is no signal 0 on Windows so the owner is assumed alive.
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno != errno.ESRCH
+    return True
+
+
+class VirtualenvUsage(namedtuple('VirtualenvUsage', ['path',
+                                                     'last_used',
+                                                     'size'])):
+    pass
+
+
+class CacheManager(object):
+    """ Evicts the virtualenvs in the directories *roots*, e.g. in the
+    cache root, in the least recently used order. The virtualenvs not used
+    in *max_age* seconds are evicted first and then the least recently used
+    until the total size is at most *max_size* bytes.
+
+    The last use time is updated by the runner in the virtualenv setup. The
+    virtualenv is evicted only if its exclusive lock is acquired without
+    waiting so the virtualenvs in use are never removed.
+
+    In addition, the temporary virtualenvs of
+    :class:`virtualenvrunner.runner.TmpVenvRunner` and
+    :class:`virtualenvrunner.venvpool.VirtualenvPool` in *tmp_dir* are
+    removed if the owner process is no longer running.
+    """
+
+    def __init__(self, roots=(), max_size=None, max_age=None, tmp_dir=None):
+        self.roots = roots
+        self.max_size = max_size
+        self.max_age = max_age
+        self.tmp_dir = tmp_dir or tempfile.gettempdir()
+
+    def find_virtualenvs(self):
+        """ Returns the :class:`.VirtualenvUsage` of the virtualenvs in the
+        roots sorted by the last use time.
+        """
+        usages = []
+        for root in self.roots:
+            if not os.path.isdir(root):
+                continue
+            for name in sorted(os.listdir(root)):
+                path = os.path.join(root, name)
+                if self._is_virtualenv(path):
+                    usages.append(VirtualenvUsage(
+                        path=path,
+                        last_used=self._get_last_used(path),
+                        size=self._get_size(path)))
+        return sorted(usages, key=lambda u: u.last_used)
+
+    def find_evictable(self, now=None):
+        """ Returns the :class:`.VirtualenvUsage` of the virtualenvs to be
+        evicted by the age and the size budgets in the eviction order.
+        """
+        now = time.time() if now is None else now
+        usages = self.find_virtualenvs()
+        evictable = [u for u in usages if self._is_expired(u.last_used, now)]
+        total = sum(u.size for u in usages if u not in evictable)
+        for usage in usages:
+            if self.max_size is None or total <= self.max_size:
+                break
+            if usage not in evictable:
+                evictable.append(usage)
+                total -= usage.size
+        return evictable
+
+    def find_orphaned_tmp_virtualenvs(self, now=None):
+        """ Returns the paths of the temporary virtualenvs whose owner
+        process is no longer running. The temporary virtualenvs without the
+        owner are orphaned if they are not used in *max_age* seconds.
+        """
+        if not os.path.isdir(self.tmp_dir):
+            return []
+        now = time.time() if now is None else now
+        return [os.path.join(self.tmp_dir, name)
+                for name in sorted(os.listdir(self.tmp_dir))
+                if name.startswith(TMP_PREFIX) and
+                self._is_orphaned(os.path.join(self.tmp_dir, name), now)]
+
+    def clean(self, dry_run=False, now=None):
+        """ Removes the orphaned temporary virtualenvs and evicts the
+        virtualenvs. Returns the paths of the removed virtualenvs. If
+        *dry_run* is true, the paths are only returned.
+        """
+        removed = []
+        for path in self.find_orphaned_tmp_virtualenvs(now=now):
+            if not dry_run:
+                shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+        for usage in self.find_evictable(now=now):
+            if dry_run or self._evict(usage.path):
+                removed.append(usage.path)
+        return removed
+
+    def _evict(self, path):
+        lock_path = self._get_lock_path(path)
+        lock = FileLock(lock_path, timeout=0)
+        try:
+            lock.acquire()
+        except LockTimeout:
+            return False
+        try:
+            shutil.rmtree(path, ignore_errors=True)
+            if not path.endswith(STAGING_SUFFIX):
+                shutil.rmtree(path + STAGING_SUFFIX, ignore_errors=True)
+            self._remove_if_exists(
+                '{}.setup.lock'.format(os.path.splitext(lock_path)[0]))
+            self._remove_if_exists(lock_path)
+        finally:
+            lock.release()
+        return True
+
+    @staticmethod
+    def _get_lock_path(path):
+        if path.endswith(STAGING_SUFFIX):
+            path = path[:-len(STAGING_SUFFIX)]
+        return os.path.abspath(path) + '.lock'
+
+    @staticmethod
+    def _is_virtualenv(path):
+        return os.path.isdir(path) and not os.path.islink(path) and any(
+            os.path.exists(os.path.join(path, *p)) for p in [
+                (LAST_USED,),
+                ('pyvenv.cfg',),
+                ('bin', 'activate_this.py'),
+                ('Scripts', 'activate_this.py')])
+
+    @staticmethod
+    def _get_last_used(path):
+        stamp = os.path.join(path, LAST_USED)
+        return os.path.getmtime(stamp if os.path.isfile(stamp) else path)
+
+    @staticmethod
+    def _get_size(path):
+        size = 0
+        for dirpath, dirnames, filenames in os.walk(path):
+            for name in dirnames + filenames:
+                try:
+                    size += os.lstat(os.path.join(dirpath, name)).st_size
+                except OSError:
+                    pass
+        return size
+
+    def _is_expired(self, last_used, now):
+        return self.max_age is not None and now - last_used > self.max_age
+
+    def _is_orphaned(self, path, now):
+        owner = os.path.join(path, OWNER)
+        if not os.path.isfile(owner):
+            return (self._is_virtualenv(path) and
+                    self._is_expired(self._get_last_used(path), now))
+        try:
+            with open(owner) as f:
+                pid = int(f.read().strip())
+        except (IOError, OSError, ValueError):
+            return False
+        return not is_process_alive(pid)
+
+    @staticmethod
+    def _remove_if_exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
@@ -8,11 +8,10 @@ import sys
 import subprocess
 from contextlib import contextmanager
 from collections import namedtuple
-from virtualenvrunner.runner import (
-    Runner, VerboseRunner, ReadonlyRunner, VerboseReadonlyRunner)
-from virtualenvrunner.pythonversionrun import PythonVersionRun
+from virtualenvrunner.pythonversionrun import PythonVersionRun, get_pythonexe
 from virtualenvrunner.runnerargparser import (
-    RunnerArgParser, CreateArgParser, ReadonlyArgParser)
+    RunnerArgParser, CreateArgParser, ReadonlyArgParser, MatrixArgParser,
+    CleanArgParser)
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
@@ -30,6 +29,14 @@ def get_readonlyargparser(python_version=None):
     return ReadonlyArgParser(python_version).parser
 
 
+def get_matrixargparser():
+    return MatrixArgParser().parser
+
+
+def get_cleanargparser():
+    return CleanArgParser().parser
+
+
 def run(pythonexe=None, python_version=None):
     run_with_runnerargs(lambda: runnerargs(pythonexe, python_version))
 
@@ -46,6 +53,38 @@ def run_readonly(pythonexe=None,
     run_with_runnerargs(lambda: readonlyrunnerargs(pythonexe, python_version))
 
 
+def run_matrix():
+    # The modules of the runs are imported after parsing the arguments so
+    # that --help and the argument errors do not pay for them.
+    with _error_handling():
+        args = get_matrixargparser().parse_args()
+        from virtualenvrunner.matrixrun import MatrixRun  # pylint: disable=import-outside-toplevel
+        results = MatrixRun(
+            lambda v: _create_matrix_runner(args, v),
+            processes=args.processes).run(args.python_versions,
+                                          args.commandline)
+        for result in results:
+            print(result)
+        if not all(result.success for result in results):
+            sys.exit(1)
+
+
+def run_clean():
+    with _error_handling():
+        args = get_cleanargparser().parse_args()
+        from virtualenvrunner.cachemanager import CacheManager  # pylint: disable=import-outside-toplevel
+        roots = args.roots or [
+            r for r in [os.environ.get('VIRTUALENV_CACHE_ROOT')] if r]
+        manager = CacheManager(roots=roots,
+                               max_size=args.max_size,
+                               max_age=args.max_age,
+                               tmp_dir=args.tmp_dir)
+        for path in manager.clean(dry_run=args.dry_run):
+            print('{action} {path}'.format(
+                action='Would remove' if args.dry_run else 'Removed',
+                path=path))
+
+
 def run_with_runnerargs(runnerargsctx):
     run_with_runnerargs_and_runnercall(
         runnerargsctx,
@@ -111,6 +150,12 @@ def clirun(cmd, env=None):
                               env=env)
 
 
+def clicall(cmd, env=None):
+    if not cmd:
+        return 0
+    return subprocess.call(cmd, shell=_is_shell(cmd), env=env)
+
+
 def _is_shell(cmd):
     return len(cmd) == 1
 
@@ -124,21 +169,60 @@ def _create_runner(args, pythonexe):
     return runner
 
 
-def _create_runner_from_args_and_env(runnercls, args, pythonexe):
+def _create_matrix_runner(args, python_version):
+    virtualenv_dir = _get_arg_env_or_none(args.dir, 'VIRTUALENV_DIR')
+    if virtualenv_dir is None and _get_cache_root(args) is None:
+        virtualenv_dir = os.path.join(os.getcwd(), '.venv')
+    runner = _create_runner_from_args_and_env(
+        _get_runner_cls(args),
+        args,
+        get_pythonexe(python_version),
+        virtualenv_dir=(None if virtualenv_dir is None else
+                        '{}{}'.format(virtualenv_dir, python_version)),
+        run=clicall)
+    if args.recreate:
+        runner.remove_virtualenv()
+    return runner
+
+
+def _create_runner_from_args_and_env(runnercls, args, pythonexe, **kwargs):
     runner = runnercls(
-        virtualenv_dir=_get_arg_env_or_none(args.dir, 'VIRTUALENV_DIR'),
+        virtualenv_dir=kwargs.get(
+            'virtualenv_dir',
+            _get_arg_env_or_none(args.dir, 'VIRTUALENV_DIR')),
         virtualenv_reqs=_get_arg_env_or_none(
             args.requirements, 'VIRTUALENV_REQS'),
         virtualenv_reqs_upd=_get_arg_env_or_none(
             args.update, 'VIRTUALENV_REQS_UPDATE'),
         virtualenv_pythonexe=pythonexe,
         pip_index_url=_get_arg_env_or_none(args.index, 'PYPI_URL'),
-        run=clirun)
+        run=kwargs.get('run', clirun))
     runner.set_save_freeze_path(args.save_freeze_path)
+    runner.set_cache_root(_get_cache_root(args))
+    runner.set_lock_timeout(_get_lock_timeout(args))
+    runner.set_incremental(args.incremental)
+    runner.set_prebuild_jobs(args.prebuild_jobs)
+    runner.set_virtualenv_backend(args.backend)
+    runner.set_wheelhouse(
+        _get_arg_env_or_none(args.wheelhouse, 'VIRTUALENV_WHEELHOUSE'),
+        populate=args.populate_wheelhouse)
+    runner.set_timing(
+        path=_get_arg_env_or_none(args.timing_file, 'VIRTUALENV_TIMING_FILE'))
     return runner
 
 
+def _get_cache_root(args):
+    return _get_arg_env_or_none(args.cache_root, 'VIRTUALENV_CACHE_ROOT')
+
+
+def _get_lock_timeout(args):
+    lock_timeout = _get_arg_env_or_none(args.lock_timeout,
+                                        'VIRTUALENV_LOCK_TIMEOUT')
+    return None if lock_timeout is None else float(lock_timeout)
+
+
 def _get_runner_cls(args):
+    from virtualenvrunner.runner import Runner, VerboseRunner  # pylint: disable=import-outside-toplevel
     return VerboseRunner if args.verbose else Runner
 
 
@@ -153,6 +237,8 @@ def _create_readonly_runner(args, pythonexe):
 
 
 def _get_readonly_runner_cls(args):
+    from virtualenvrunner.runner import (  # pylint: disable=import-outside-toplevel
+        ReadonlyRunner, VerboseReadonlyRunner)
     return VerboseReadonlyRunner if args.verbose else ReadonlyRunner
 
 
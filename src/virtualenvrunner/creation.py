@@ -0,0 +1,129 @@
+"""
+.. module:: creation
+    :platform: Unix, Windows
+    :synopsis: Creation of the runner virtualenv
+"""
+import os
+import shutil
+from virtualenvrunner.backends import get_backend
+from virtualenvrunner.interpreters import get_registry
+from virtualenvrunner.venvcache import VirtualenvCache
+from virtualenvrunner.venvclone import VirtualenvClone
+from virtualenvrunner.utils import get_exe_suffix
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class CreationBase(object):
+    """ Base of :class:`virtualenvrunner.runner.Runner` for the creation of
+    the *virtualenv*: the *virtualenv* is either created by the backend for
+    the resolved interpreter, cloned from the template or reused from the
+    cache. The host class provides the runner arguments and the paths
+    *virtualenv_dir*, *setup_dir* and *completion_marker*.
+    """
+
+    def __init__(self):
+        super(CreationBase, self).__init__()  # pylint: disable=super-with-arguments
+        self._resolved_pythonexe = None
+        self._virtualenv_backend = None
+        self._virtualenv_backend_name = 'shell'
+        self._clone = None
+        self._cache = None
+        self._cached_virtualenv_dir = None
+
+    @property
+    def virtualenv_pythonexe(self):
+        """ The interpreter *virtualenv_pythonexe* resolved via
+        :func:`virtualenvrunner.interpreters.get_registry`. The names found
+        in PATH are used as such. Raises
+        :class:`virtualenvrunner.interpreters.InterpreterNotFound` if the
+        interpreter is not found.
+        """
+        if self._resolved_pythonexe is None:
+            self._resolved_pythonexe = get_registry().resolve(
+                self._virtualenv_pythonexe or 'python' + get_exe_suffix())
+        return self._resolved_pythonexe
+
+    def set_virtualenv_backend(self, name):
+        """ Sets the backend creating the *virtualenv* by *name*: *shell*
+        (default) runs the *virtualenv* command in the shell, *virtualenv*
+        creates it in-process via the :mod:`virtualenv` API and *venv* runs
+        :mod:`venv` of the target interpreter without the shell. See
+        :mod:`virtualenvrunner.backends`.
+        """
+        self._virtualenv_backend_name = name or 'shell'
+        self._virtualenv_backend = None
+
+    @property
+    def virtualenv_backend(self):
+        if self._virtualenv_backend is None:
+            self._virtualenv_backend = get_backend(
+                self._virtualenv_backend_name,
+                virtualenv_exe=self.virtualenv_exe)
+        return self._virtualenv_backend
+
+    @property
+    def _virtualenv_cmd(self):
+        return self.virtualenv_backend.cmd(self.virtualenv_pythonexe,
+                                           self.setup_dir)
+
+    def set_template_virtualenv(self, template_dir, link_mode='auto'):
+        """ Sets the populated template virtualenv from which the new
+        *virtualenv* is cloned instead of creating it. The requirements are
+        not installed to the clone if the requirements fingerprint of the
+        template is up to date. See
+        :class:`virtualenvrunner.venvclone.VirtualenvClone` for *link_mode*.
+        """
+        self._clone = (VirtualenvClone(template_dir, link_mode=link_mode)
+                       if template_dir else None)
+
+    def _clone_template(self):
+        self._clone.clone(self.setup_dir)
+
+    @property
+    def new_virtualenv_is_volatile(self):
+        """ Property *new_virtualenv_is_volatile* is true if the new
+        *virtualenv* needs the installation. The *virtualenv* cloned from
+        the template carries the requirements fingerprint of the template so
+        it is installed already if the fingerprint is up to date.
+        """
+        return self._new_virtualenv and (self._clone is None or
+                                         not self.virtualenv_reqs or
+                                         not self.requirements_are_up_to_date)
+
+    def set_cache_root(self, cache_root):
+        """ Sets the root directory of the shared *virtualenv* cache. The
+        cache is used only if *virtualenv_dir* is not given.
+        """
+        self._cache = VirtualenvCache(cache_root) if cache_root else None
+        self._cached_virtualenv_dir = None
+
+    @property
+    def cached_virtualenv_dir(self):
+        if self._cache is None:
+            return None
+        if self._cached_virtualenv_dir is None:
+            self._cached_virtualenv_dir = self._cache.get_virtualenv_dir(
+                self.virtualenv_reqs,
+                self.virtualenv_pythonexe,
+                pip_index_url=self.pip_index_url,
+                update=bool(self.virtualenv_reqs_upd))
+        return self._cached_virtualenv_dir
+
+    @property
+    def uses_cache(self):
+        return not self._virtualenv_dir and self._cache is not None
+
+    def _remove_incomplete_cached_virtualenv(self):
+        """ Removes the cached *virtualenv* without the completion marker.
+        The staging directory is kept so that the failed or relocated build
+        is resumed from it.
+        """
+        if self.uses_cache and not os.path.isfile(self.completion_marker):
+            shutil.rmtree(self.virtualenv_dir, ignore_errors=True)
+
+    def _mark_complete_if_needed(self):
+        if (self.uses_cache and self._new_virtualenv and
+                self.setup_dir == self.virtualenv_dir):
+            open(self.completion_marker, 'w').close()
@@ -0,0 +1,106 @@
+"""
+.. module:: dispatcher
+    :platform: Unix, Windows
+    :synopsis: Single entry point of the command line tools
+
+All the console scripts call :func:`main` which picks the command by the
+name of the script or, if the script is not a command, by the first
+argument. The module is imported on every start of the tools so it imports
+only the list of the Python versions and :mod:`virtualenvrunner.cli` is
+imported only for the picked command.
+"""
+import os
+import sys
+from virtualenvrunner.python_versions import (
+    get_python_versions,
+    parse_python_version)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+PROG = 'virtualenvrunner'
+
+COMMANDS = [('run_in_virtualenv', 'run'),
+            ('create_virtualenv', 'run_install'),
+            ('run_in_readonly_virtualenv', 'run_readonly'),
+            ('run_in_virtualenv_matrix', 'run_matrix'),
+            ('clean_virtualenvs', 'run_clean')]
+
+VERSIONED_COMMANDS = [('run_in_virtualenv', 'run'),
+                      ('create_virtualenv', 'run_install'),
+                      ('run_in_readonly_virtualenv', 'run_readonly')]
+
+SCRIPT_SUFFIXES = ['.exe', '-script.pyw', '-script.py']
+
+
+class Command(object):
+    """ The function *function* of :mod:`virtualenvrunner.cli` run with
+    the interpreter of *python_version* if it is given.
+    """
+
+    def __init__(self, function, python_version=None):
+        self.function = function
+        self.python_version = python_version
+
+    def run(self):
+        from virtualenvrunner import cli  # pylint: disable=import-outside-toplevel
+        function = getattr(cli, self.function)
+        if self.python_version is None:
+            return function()
+        return function(pythonexe=cli.get_pythonexe(self.python_version),
+                        python_version=self.python_version)
+
+
+def get_commands():
+    commands = {name: Command(function) for name, function in COMMANDS}
+    for v in get_python_versions():
+        for name, function in VERSIONED_COMMANDS:
+            commands['{name}{version}'.format(name=name, version=v)] = (
+                Command(function, python_version=v))
+    return commands
+
+
+def get_command(name, commands):
+    """ Returns the :class:`.Command` of *name* in *commands* or of the
+    versioned command of any Python version, e.g. *run_in_virtualenv3.14*,
+    or *None* if there is no such command.
+    """
+    if name in commands:
+        return commands[name]
+    for base, function in VERSIONED_COMMANDS:
+        if name.startswith(base):
+            python_version = parse_python_version(name[len(base):])
+            if python_version is not None:
+                return Command(function, python_version=python_version)
+    return None
+
+
+def get_command_name(script):
+    name = os.path.basename(script)
+    for suffix in SCRIPT_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def main():
+    """ Runs the command named by the script, e.g. *run_in_virtualenv3.7*,
+    or by the first argument, e.g. *virtualenvrunner run_in_virtualenv3.7*.
+    """
+    commands = get_commands()
+    command = get_command(get_command_name(sys.argv[0]), commands)
+    if command is None:
+        command = (get_command(sys.argv[1], commands)
+                   if len(sys.argv) > 1 else None)
+        if command is None:
+            sys.stderr.write(_get_usage(commands))
+            sys.exit(2)
+        sys.argv = sys.argv[1:]
+    return command.run()
+
+
+def _get_usage(commands):
+    return 'usage: {prog} COMMAND [ARGS]\n\ncommands:\n{commands}'.format(
+        prog=PROG,
+        commands=''.join('  {}\n'.format(name) for name in sorted(commands)))
@@ -0,0 +1,198 @@
+"""
+.. module:: distributions
+    :platform: Unix, Windows
+    :synopsis: Distributions installed to virtualenv
+"""
+import glob
+import hashlib
+import io
+import os
+import re
+from virtualenvrunner.activateenv import VirtualenvLayout
+from virtualenvrunner.utils import is_windows
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class Distributions(object):
+    """ Distributions installed to the site-packages of the virtualenv in
+    *virtualenv_dir*. The distributions are identified by the metadata
+    directories *.dist-info* and *.egg-info*.
+    """
+
+    metadata_suffixes = ('.dist-info', '.egg-info')
+    build_tools = ['setuptools', 'distribute', 'wheel']
+    _requirement_name_re = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+    _version_re = re.compile(r'^\s*(\d+)\.(\d+)')
+
+    def __init__(self, virtualenv_dir):
+        self._virtualenv_dir = virtualenv_dir
+
+    @property
+    def site_packages_dirs(self):
+        if is_windows():
+            pattern = os.path.join(self._virtualenv_dir, 'Lib',
+                                   'site-packages')
+        else:
+            pattern = os.path.join(self._virtualenv_dir, 'lib', 'python*',
+                                   'site-packages')
+        return sorted(glob.glob(pattern))
+
+    @property
+    def metadata_paths(self):
+        return [os.path.join(d, name)
+                for d in self.site_packages_dirs
+                for name in sorted(os.listdir(d))
+                if name.endswith(self.metadata_suffixes)]
+
+    @property
+    def freeze_excludes(self):
+        """ The canonical names of the distributions excluded by *pip
+        freeze* of the virtualenv or *None* if they can't be determined. The
+        *pip* 23.2 and later excludes the build tools only on Python older
+        than 3.12 so the excludes depend on the versions of both Python and
+        *pip* of the virtualenv.
+        """
+        python_version = self._get_python_version()
+        if python_version is None:
+            return None
+        if python_version < (3, 12):
+            return ['pip'] + self.build_tools
+        pip_version = self._get_pip_version()
+        if pip_version is None:
+            return None
+        return ['pip'] + (self.build_tools if pip_version < (23, 2) else [])
+
+    def digest(self):
+        """ Returns SHA-256 hex digest of the metadata directory names which
+        contain the distribution names and versions.
+        """
+        h = hashlib.sha256()
+        for path in self.metadata_paths:
+            h.update(os.path.basename(path).encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def freeze(self):
+        """ Returns the *pip freeze* compatible output derived from the
+        metadata of the distributions or *None* if the output can't be
+        derived from the metadata. The latter is the case if the virtualenv
+        uses the system site-packages, if it contains editable or direct
+        URL installations or if :attr:`freeze_excludes` can't be
+        determined.
+        """
+        if not self.site_packages_dirs or not self._is_isolated():
+            return None
+        excludes = self.freeze_excludes
+        if excludes is None:
+            return None
+        requirements = []
+        for path in self.metadata_paths:
+            metadata = self._read_metadata(path)
+            if metadata is None:
+                return None
+            name, version = metadata
+            if self._canonicalize(name) not in excludes:
+                requirements.append((name, version))
+        if self._has_egg_links():
+            return None
+        return ''.join('{}=={}\n'.format(name, version)
+                       for name, version in sorted(
+                           requirements, key=lambda r: r[0].lower()))
+
+    def get_required(self, excludes=()):
+        """ Returns the set of the canonical names of the projects required
+        by the installed distributions other than *excludes*. The markers
+        and the extras of the requirements are ignored so the set may
+        contain also the projects which are not actually needed.
+        """
+        required = set()
+        for path in self.metadata_paths:
+            headers = self._read_headers(path)
+            if (headers is None or
+                    self._canonicalize(headers['Name'] or '') in excludes):
+                continue
+            for requirement in (headers.get_all('Requires-Dist', []) +
+                                self._read_egg_requires(path)):
+                m = self._requirement_name_re.match(requirement)
+                if m:
+                    required.add(self._canonicalize(m.group(1)))
+        return required
+
+    @property
+    def _layout(self):
+        return VirtualenvLayout(os.path.join(
+            self._virtualenv_dir, 'Scripts' if is_windows() else 'bin',
+            'activate_this.py'))
+
+    def _is_isolated(self):
+        layout = self._layout
+        if not os.path.isfile(layout.pyvenv_cfg):
+            return False
+        return layout.cfg.get(
+            'include-system-site-packages', 'false').lower() != 'true'
+
+    def _get_python_version(self):
+        layout = self._layout
+        versions = ([layout.cfg.get('version', ''),
+                     layout.cfg.get('version_info', '')]
+                    if os.path.isfile(layout.pyvenv_cfg) else [])
+        versions += [os.path.basename(os.path.dirname(d))[len('python'):]
+                     for d in self.site_packages_dirs]
+        return next((v for v in map(self._parse_version, versions)
+                     if v is not None), None)
+
+    def _get_pip_version(self):
+        for path in self.metadata_paths:
+            metadata = self._read_metadata(path)
+            if metadata is not None and self._canonicalize(
+                    metadata[0]) == 'pip':
+                return self._parse_version(metadata[1])
+        return None
+
+    @classmethod
+    def _parse_version(cls, version):
+        m = cls._version_re.match(version)
+        return (int(m.group(1)), int(m.group(2))) if m else None
+
+    def _has_egg_links(self):
+        return any(name.endswith('.egg-link')
+                   for d in self.site_packages_dirs
+                   for name in os.listdir(d))
+
+    @classmethod
+    def _read_metadata(cls, path):
+        if (path.endswith('.dist-info') and
+                os.path.exists(os.path.join(path, 'direct_url.json'))):
+            return None
+        headers = cls._read_headers(path)
+        if headers is None or not headers['Name'] or not headers['Version']:
+            return None
+        return headers['Name'], headers['Version']
+
+    @staticmethod
+    def _read_headers(path):
+        if path.endswith('.dist-info'):
+            metadata_file = os.path.join(path, 'METADATA')
+        elif os.path.isdir(path):
+            metadata_file = os.path.join(path, 'PKG-INFO')
+        else:
+            metadata_file = path
+        if not os.path.isfile(metadata_file):
+            return None
+        from email.parser import HeaderParser  # pylint: disable=import-outside-toplevel
+        with io.open(metadata_file, encoding='utf-8', errors='replace') as f:
+            return HeaderParser().parse(f)
+
+    @staticmethod
+    def _read_egg_requires(path):
+        requires = os.path.join(path, 'requires.txt')
+        if not os.path.isfile(requires):
+            return []
+        with io.open(requires, encoding='utf-8', errors='replace') as f:
+            return [line for line in f if not line.startswith('[')]
+
+    @staticmethod
+    def _canonicalize(name):
+        return re.sub(r'[-_.]+', '-', name).lower()
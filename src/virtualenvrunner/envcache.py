@@ -0,0 +1,131 @@
+"""
+.. module:: envcache
+    :platform: Unix, Windows
+    :synopsis: Persistent cache of the activated environment of virtualenv
+"""
+import json
+import os
+import tempfile
+from virtualenvrunner.utils import get_hidden
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class EnvDelta(object):
+    """ Changes made by the activation to the environment. The entries
+    prepended to the path list variables, e.g. *PATH*, are prepended to the
+    original value and the other changed values are set as such. The
+    delta can be applied only to the environments in which the changed
+    variables are empty or non-empty the same way as in the original
+    environment.
+    """
+
+    def __init__(self, changes):
+        self.changes = changes
+
+    @classmethod
+    def from_envs(cls, original, activated):
+        changes = {}
+        for name in set(original) | set(activated):
+            old, new = original.get(name), activated.get(name)
+            if old != new:
+                changes[name] = cls._get_change(old, new)
+        return cls(changes)
+
+    @staticmethod
+    def _get_change(old, new):
+        if new is None:
+            return ['unset', None, bool(old)]
+        if old and new.endswith(os.pathsep + old):
+            return ['prepend', new[:-len(old)], True]
+        return ['set', new, bool(old)]
+
+    def apply(self, environ):
+        """ Returns copy of *environ* with the changes applied or *None* if
+        the delta is not applicable to *environ*.
+        """
+        env = environ.copy()
+        for name, (op, value, was_set) in self.changes.items():
+            if bool(env.get(name)) != was_set:
+                return None
+            if op == 'unset':
+                env.pop(name, None)
+            else:
+                env[name] = value + env[name] if op == 'prepend' else value
+        return env
+
+
+class EnvCache(object):
+    """ Persistent cache of the :class:`.EnvDelta` of the virtualenv of
+    *activate_this*. The cache file is stored to the virtualenv directory
+    and it is invalidated if either *activate_this.py* or *pyvenv.cfg* is
+    changed or if the virtualenv is moved.
+    """
+
+    version = 2
+
+    def __init__(self, activate_this):
+        self._activate_this = activate_this
+        self._base = os.path.dirname(
+            os.path.dirname(os.path.abspath(activate_this)))
+
+    @property
+    def path(self):
+        return os.path.join(self._base, get_hidden('virtualenvrunner_env.json'))
+
+    @property
+    def stamp(self):
+        return [self._get_file_stamp(path)
+                for path in [self._activate_this,
+                             os.path.join(self._base, 'pyvenv.cfg')]]
+
+    @staticmethod
+    def _get_file_stamp(path):
+        try:
+            s = os.stat(path)
+        except OSError:
+            return None
+        return [s.st_mtime, s.st_ino, s.st_size]
+
+    def load(self):
+        """ Returns the cached :class:`.EnvDelta` or *None* if the cache is
+        missing or stale.
+        """
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if content.get('version') != self.version or (
+                content.get('base') != self._base) or (
+                    content.get('stamp') != self.stamp):
+            return None
+        return EnvDelta(content['changes'])
+
+    def save(self, delta):
+        """ Saves *delta* atomically. The cache is not saved if the
+        virtualenv is not writable.
+        """
+        stamp = self.stamp
+        if not any(stamp):
+            return
+        try:
+            self._write_atomically({'version': self.version,
+                                    'base': self._base,
+                                    'stamp': stamp,
+                                    'changes': delta.changes})
+        except (IOError, OSError):
+            pass
+
+    def _write_atomically(self, content):
+        fd, tmppath = tempfile.mkstemp(dir=self._base, prefix='.env_')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(content, f)
+            os.rename(tmppath, self.path)
+        finally:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
@@ -0,0 +1,66 @@
+"""
+.. module:: fingerprint
+    :platform: Unix, Windows
+    :synopsis: Fingerprint of the installed requirements
+"""
+import json
+import os
+from virtualenvrunner.distributions import Distributions
+from virtualenvrunner.requirements import RequirementsFiles
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class RequirementsFingerprint(object):
+    """ Fingerprint stored to *path* of the requirements installed to the
+    virtualenv in *virtualenv_dir*. The fingerprint consists of the digest
+    of the requirements files (see
+    :class:`virtualenvrunner.requirements.RequirementsFiles`) with
+    *extras* and, if *distributions* is true, of the digest of the
+    installed distributions.
+    """
+
+    def __init__(self, path, virtualenv_dir, requirements, extras=(),
+                 distributions=True):
+        self._path = path
+        self._virtualenv_dir = virtualenv_dir
+        self._requirements = requirements
+        self._extras = extras
+        self._distributions = distributions
+
+    @property
+    def current(self):
+        """ Current fingerprint or *None* if the requirements can't be
+        read.
+        """
+        if not os.path.isfile(self._requirements):
+            return None
+        try:
+            requirements = RequirementsFiles(self._requirements).digest(
+                *self._extras)
+        except (IOError, OSError, ValueError):
+            return None
+        return {'requirements': requirements,
+                'distributions': (Distributions(
+                    self._virtualenv_dir).digest()
+                                  if self._distributions else None)}
+
+    def is_up_to_date(self):
+        current = self.current
+        return current is not None and current == self._load()
+
+    def _load(self):
+        if not os.path.isfile(self._path):
+            return None
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def save(self):
+        current = self.current
+        if current is not None:
+            with open(self._path, 'w') as f:
+                json.dump(current, f)
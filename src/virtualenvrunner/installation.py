@@ -0,0 +1,251 @@
+"""
+.. module:: installation
+    :platform: Unix, Windows
+    :synopsis: Installation of the runner requirements
+"""
+import os
+import subprocess
+from virtualenvrunner.distributions import Distributions
+from virtualenvrunner.fingerprint import RequirementsFingerprint
+from virtualenvrunner.prebuild import WheelPrebuild, check_jobs
+from virtualenvrunner.requirements import RequirementsSnapshot
+from virtualenvrunner.wheelhouse import Wheelhouse
+from virtualenvrunner.utils import get_hidden
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class InstallationBase(object):
+    """ Base of :class:`virtualenvrunner.runner.Runner` for the installation
+    of the requirements: the up to date requirements are not installed, the
+    changed requirements can be installed incrementally and the wheels can
+    be prebuilt or taken from the wheelhouse. The host class provides the
+    runner arguments, *setup_dir*, *env*, the installation log and the
+    methods *_run_in_install* and *_phase*.
+    """
+
+    fingerprint_distributions = True
+
+    def __init__(self):
+        super(InstallationBase, self).__init__()  # pylint: disable=super-with-arguments
+        self._requirements_up_to_date = None
+        self._incremental = False
+        self._wheelhouse = None
+        self._repopulate_wheelhouse = False
+        self._prebuild_jobs = None
+        self._freeze = None
+        self._freeze_evaluated = False
+
+    def set_incremental(self, incremental):
+        """ Sets the incremental installation of the changed requirements.
+        If *incremental* is true and the requirements are changed since the
+        previous installation, only the new and the changed requirement
+        lines are installed and the removed projects are uninstalled unless
+        the remaining distributions require them. The
+        whole requirements file is installed if the options or the index
+        are changed or if the requirements are constrained. See
+        :class:`virtualenvrunner.requirements.RequirementsSnapshot`.
+        """
+        self._incremental = incremental
+
+    def set_prebuild_jobs(self, jobs):
+        """ Sets the number of the concurrent wheel builds before the
+        installation. If *jobs* is given, the wheels of the requirements are
+        built concurrently to the wheelhouse or, without the wheelhouse, to
+        the directory :attr:`prebuild_wheel_dir` from which they are then
+        installed. See :class:`virtualenvrunner.prebuild.WheelPrebuild`.
+        Raises :class:`ValueError` if *jobs* is not positive.
+        """
+        if jobs is not None:
+            check_jobs(jobs)
+        self._prebuild_jobs = jobs
+
+    def set_wheelhouse(self, wheelhouse, populate=False):
+        """ Sets the local wheelhouse directory. The wheels of the
+        requirements are built or downloaded to the wheelhouse on the first
+        installation and the requirements are installed from it without the
+        index. In the update mode the wheelhouse is always updated first.
+
+        If *populate* is true, the wheelhouse is populated in the setup even
+        if it is already populated or the requirements are not installed.
+        """
+        self._wheelhouse = Wheelhouse(wheelhouse) if wheelhouse else None
+        self._repopulate_wheelhouse = populate
+
+    def populate_wheelhouse(self):
+        """ Builds or downloads the wheels of the requirements to the
+        wheelhouse set by :meth:`set_wheelhouse`.
+        """
+        self._repopulate_wheelhouse = False
+        with self._phase('populate_wheelhouse'):
+            with self._wheelhouse.lock:
+                self._prebuild_wheels_if_needed(self._wheelhouse.path)
+                with self._open_requirements_log_file():
+                    self._run_in_install(self._pip_wheel_cmd, env=self.env)
+                self._mark_wheelhouse_populated()
+
+    @property
+    def wheelhouse_needs_population(self):
+        return self._wheelhouse is not None and (
+            self._repopulate_wheelhouse or
+            self.virtualenv_reqs_upd or
+            not self._wheelhouse.is_populated(self.virtualenv_reqs,
+                                              self.pip_index_url))
+
+    @property
+    def _pip_wheel_cmd(self):
+        return self._wheelhouse.wheel_cmd(self.virtualenv_reqs,
+                                          self.pip_index_url)
+
+    def _mark_wheelhouse_populated(self):
+        self._wheelhouse.mark_populated(self.virtualenv_reqs,
+                                        self.pip_index_url)
+
+    @property
+    def prebuild_wheel_dir(self):
+        return os.path.join(
+            self.setup_dir,
+            get_hidden('virtualenvrunner_wheels'))
+
+    @property
+    def requirements_fingerprint_file(self):
+        return os.path.join(
+            self.setup_dir,
+            get_hidden('virtualenvrunner_requirements.fingerprint'))
+
+    @property
+    def requirements_snapshot_file(self):
+        return os.path.join(
+            self.setup_dir,
+            get_hidden('virtualenvrunner_requirements.snapshot'))
+
+    @property
+    def requirements_diff_file(self):
+        return os.path.join(
+            self.setup_dir,
+            get_hidden('virtualenvrunner_requirements.diff'))
+
+    @property
+    def requirements_fingerprint(self):
+        return RequirementsFingerprint(
+            self.requirements_fingerprint_file,
+            self.setup_dir,
+            self.virtualenv_reqs,
+            extras=[self.pip_index_url or ''],
+            distributions=self.fingerprint_distributions)
+
+    @property
+    def requirements_are_up_to_date(self):
+        """ Property *requirements_are_up_to_date* is *True* if the
+        requirements are installed with the same fingerprint and the update
+        is not requested. The property is evaluated once.
+        """
+        if self._requirements_up_to_date is None:
+            self._requirements_up_to_date = bool(
+                self.virtualenv_reqs and
+                not self.virtualenv_reqs_upd and
+                self.requirements_fingerprint.is_up_to_date())
+        return self._requirements_up_to_date
+
+    def _reset_requirements_up_to_date(self):
+        self._requirements_up_to_date = None
+
+    @property
+    def freeze(self):
+        """ Property *freeze* is the *pip freeze* output derived in-process
+        from the metadata of the installed distributions or *None* if it
+        can't be derived (see
+        :meth:`virtualenvrunner.distributions.Distributions.freeze`). The
+        property is evaluated once after the installation.
+        """
+        self._setup_if_pending()
+        if not self._freeze_evaluated:
+            self._freeze = Distributions(self.setup_dir).freeze()
+            self._freeze_evaluated = True
+        return self._freeze
+
+    def _prebuild_wheels_if_needed(self, wheel_dir):
+        if self._prebuild_jobs:
+            with self._phase('prebuild_wheels'):
+                results = self._create_prebuild(wheel_dir).build(
+                    self._run_captured)
+            self._write_prebuild_results(results)
+
+    def _create_prebuild(self, wheel_dir):
+        return WheelPrebuild(self.virtualenv_reqs,
+                             wheel_dir=wheel_dir,
+                             jobs=self._prebuild_jobs,
+                             pip_index_url=self.pip_index_url)
+
+    def _write_prebuild_results(self, results):
+        with self._open_requirements_log_file():
+            for result in results:
+                self._write_log(result.output)
+            self._log.flush()
+        for result in results:
+            self._raise_if_failed(result.cmd, result.returncode)
+
+    def _run_captured(self, cmd):
+        with self._phase('command', command=cmd):
+            proc = subprocess.Popen(cmd,
+                                    stdout=subprocess.PIPE,
+                                    stderr=subprocess.STDOUT,
+                                    shell=True,
+                                    env=self.env)
+            output = ''.join(
+                self._decoded(self._chunks_in_handle(proc.stdout)))
+            proc.communicate()
+            return proc.returncode, output
+
+    def _get_pip_install_cmds(self):
+        diff = self._get_requirements_diff()
+        if diff is None:
+            return [self._pip_install_cmd]
+        cmds = []
+        uninstall = self._get_unrequired(diff.uninstall)
+        if uninstall:
+            cmds.append('pip uninstall -y {}'.format(' '.join(uninstall)))
+        if diff.install:
+            diff.write(self.requirements_diff_file)
+            cmds.append(self._get_pip_install_cmd(self.requirements_diff_file))
+        return cmds
+
+    def _get_unrequired(self, projects):
+        required = Distributions(self.setup_dir).get_required(
+            excludes=projects)
+        return [p for p in projects if p not in required]
+
+    def _get_requirements_diff(self):
+        if not self._incremental or self._new_virtualenv:
+            return None
+        previous = RequirementsSnapshot.load(self.requirements_snapshot_file)
+        current = self._get_requirements_snapshot()
+        if previous is None or current is None:
+            return None
+        return current.diff(previous)
+
+    def _get_requirements_snapshot(self):
+        try:
+            return RequirementsSnapshot.from_files(
+                self.virtualenv_reqs, extras=[self.pip_index_url or ''])
+        except (IOError, OSError, ValueError):
+            return None
+
+    @property
+    def _pip_install_index_arg(self):
+        if self._wheelhouse is not None:
+            return ' {}'.format(self._wheelhouse.install_options)
+        find_links_arg = (' --find-links {}'.format(self.prebuild_wheel_dir)
+                          if self._prebuild_jobs else '')
+        return find_links_arg + (' -i {}'.format(self.pip_index_url)
+                                 if self.pip_index_url else '')
+
+    def _save_requirements_fingerprint(self):
+        try:
+            self.requirements_fingerprint.save()
+            snapshot = self._get_requirements_snapshot()
+            if snapshot is not None:
+                snapshot.save(self.requirements_snapshot_file)
+        except (IOError, OSError):
+            pass
@@ -0,0 +1,322 @@
+"""
+.. module:: interpreters
+    :platform: Unix, Windows
+    :synopsis: Discovery of the Python interpreters with a cached registry
+"""
+import glob
+import json
+import os
+import re
+import subprocess
+import tempfile
+import threading
+from collections import namedtuple
+from virtualenvrunner.utils import get_unicode, is_windows
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+REGISTRY_VARIABLE = 'VIRTUALENV_INTERPRETER_REGISTRY'
+
+KNOWN_PREFIXES = ['/usr/local/bin',
+                  '/usr/bin',
+                  '/opt/python*/bin',
+                  '/opt/homebrew/bin',
+                  '~/.pyenv/versions/*/bin',
+                  '~/.local/bin']
+
+KNOWN_WINDOWS_PREFIXES = ['C:\\Python*',
+                          '~\\AppData\\Local\\Programs\\Python\\Python*']
+
+PROBE_SCRIPT = (
+    'import platform, sys; '
+    'i = platform.python_implementation(); '
+    'print(platform.python_version()); '
+    'print({"CPython": "cp", "PyPy": "pp"}.get(i, i.lower()) + '
+    '"%d%d" % sys.version_info[:2] + getattr(sys, "abiflags", "")); '
+    'print(sys.executable)')
+
+
+class InterpreterNotFound(Exception):
+    pass
+
+
+class Interpreter(namedtuple('Interpreter', ['path',
+                                             'version',
+                                             'abi',
+                                             'mtime'])):
+    """ The interpreter *path* of the full *version*, e.g. *3.7.12*, and
+    of the ABI tag *abi*, e.g. *cp37m*. The modification time *mtime* of
+    the interpreter invalidates the entry.
+    """
+
+    @property
+    def version_info(self):
+        return tuple(int(v) for v in re.findall(r'\d+', self.version)[:3])
+
+    def matches(self, version):
+        """ Returns true if *version*, e.g. *3* or *3.7*, is a prefix of the
+        version of the interpreter.
+        """
+        wanted = [int(v) for v in str(version).split('.') if v]
+        return list(self.version_info[:len(wanted)]) == wanted
+
+
+class InterpreterRegistry(object):
+    """ Registry of the Python interpreters found in the *search_dirs*, by
+    default in PATH and in the known installation prefixes. The registry
+    is saved to the JSON file *path* so the interpreters are probed only
+    once. The saved registry is rescanned if the search directories or the
+    interpreters are modified and then only the new and the modified
+    interpreters are probed. The shims, e.g. of *pyenv* and *asdf*, are
+    recorded as the *sys.executable* of the interpreter they currently run.
+
+    The registry file is by default in the user cache directory and it can
+    be changed via the environment variable
+    *VIRTUALENV_INTERPRETER_REGISTRY*.
+    """
+
+    version = 1
+    _name_re = re.compile(r'^python(\d+(\.\d+)?)?(\.exe)?$', re.IGNORECASE)
+
+    def __init__(self, path=None, search_dirs=None):
+        self.path = path or get_default_registry_path()
+        self._search_dirs = search_dirs
+        self._interpreters = None
+        self._lock = threading.Lock()
+
+    @property
+    def search_dirs(self):
+        if self._search_dirs is None:
+            self._search_dirs = get_search_dirs()
+        return self._search_dirs
+
+    @property
+    def interpreters(self):
+        """ The list of :class:`.Interpreter` in the search order."""
+        with self._lock:
+            if self._interpreters is None:
+                self._interpreters = self._load()
+            if self._interpreters is None:
+                self._interpreters = self._scan_and_save()
+            return self._interpreters
+
+    def refresh(self):
+        """ Rescans the search directories."""
+        with self._lock:
+            self._interpreters = self._scan_and_save()
+
+    def find(self, version=None):
+        """ Returns the :class:`.Interpreter` of the highest version matching
+        *version*, e.g. *3* or *3.7*, or *None* if there is no such
+        interpreter. Of the same versions the first in the search order is
+        returned.
+        """
+        best = None
+        for interpreter in self.interpreters:
+            if (interpreter.matches(version or '') and
+                    (best is None or
+                     interpreter.version_info > best.version_info)):
+                best = interpreter
+        return best
+
+    def resolve(self, pythonexe):
+        """ Returns the path of the interpreter *pythonexe*. The paths and
+        the names found in PATH are returned as such so that they are the
+        same interpreters as in the shell and in *virtualenv -p*. The other
+        names, e.g. *python3.7*, are resolved from the registry first by the
+        name and then by the version in the name. On Windows the names not
+        in the registry are returned as such for the *py* launcher used by
+        *virtualenv*.
+
+        Raises:
+            InterpreterNotFound: if the interpreter is not found.
+        """
+        if os.path.dirname(pythonexe) or _is_in_path(pythonexe):
+            return pythonexe
+        interpreter = self._find_by_name(pythonexe)
+        if interpreter is None:
+            m = self._name_re.match(pythonexe)
+            if m:
+                interpreter = self.find(m.group(1))
+        if interpreter is not None:
+            return interpreter.path
+        if is_windows():
+            return pythonexe
+        raise InterpreterNotFound(
+            "Python interpreter '{pythonexe}' not found in {dirs}".format(
+                pythonexe=pythonexe,
+                dirs=os.pathsep.join(self.search_dirs)))
+
+    def _find_by_name(self, name):
+        for interpreter in self.interpreters:
+            if os.path.basename(interpreter.path) == name:
+                return interpreter
+        return None
+
+    def _load(self):
+        content = self._read()
+        if content is None or content.get('dirs') != self._get_dir_stamps():
+            return None
+        interpreters = [Interpreter(*i) for i in content['interpreters']]
+        if any(i.mtime != self._get_mtime(i.path) for i in interpreters):
+            return None
+        return interpreters
+
+    def _read(self):
+        if not os.path.isfile(self.path):
+            return None
+        try:
+            with open(self.path) as f:
+                content = json.load(f)
+            return content if content.get('version') == self.version else None
+        except (IOError, OSError, ValueError, AttributeError):
+            return None
+
+    def _scan_and_save(self):
+        content = self._read()
+        interpreters = self._scan(
+            [] if content is None else
+            [Interpreter(*i) for i in content.get('interpreters', [])])
+        try:
+            self._write_atomically({'version': self.version,
+                                    'dirs': self._get_dir_stamps(),
+                                    'interpreters': interpreters})
+        except (IOError, OSError):
+            pass
+        return interpreters
+
+    def _scan(self, previous):
+        known = {(i.path, i.mtime): i for i in previous}
+        probed = {}
+        interpreters = []
+        for path in self._find_candidates():
+            mtime = self._get_mtime(path)
+            interpreter = known.get((path, mtime))
+            if interpreter is None:
+                realpath = os.path.realpath(path)
+                if realpath not in probed:
+                    probed[realpath] = self._probe(path)
+                if probed[realpath] is not None:
+                    interpreter = self._create_interpreter(
+                        path, mtime, *probed[realpath])
+            if (interpreter is not None and
+                    all(i.path != interpreter.path for i in interpreters)):
+                interpreters.append(interpreter)
+        return interpreters
+
+    def _create_interpreter(self, path, mtime, version, abi, executable):
+        if not _is_shim(path):
+            return Interpreter(path, version, abi, mtime)
+        # The shim runs the interpreter selected at the time of the scan.
+        if _is_shim(executable) or not os.path.isfile(executable):
+            return None
+        return Interpreter(executable, version, abi,
+                           self._get_mtime(executable))
+
+    def _find_candidates(self):
+        seen = set()
+        for d in self.search_dirs:
+            try:
+                names = sorted(os.listdir(d))
+            except OSError:
+                continue
+            for name in names:
+                path = os.path.join(d, name)
+                if (self._name_re.match(name) and path not in seen and
+                        os.path.isfile(path) and os.access(path, os.X_OK)):
+                    seen.add(path)
+                    yield path
+
+    @staticmethod
+    def _probe(path):
+        try:
+            with open(os.devnull, 'w') as devnull:
+                out = subprocess.check_output([path, '-c', PROBE_SCRIPT],
+                                              stderr=devnull)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        lines = get_unicode(out).splitlines()
+        return tuple(lines) if len(lines) == 3 else None
+
+    def _get_dir_stamps(self):
+        return [[d, self._get_mtime(d)] for d in self.search_dirs]
+
+    @staticmethod
+    def _get_mtime(path):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def _write_atomically(self, content):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, tmppath = tempfile.mkstemp(dir=directory, prefix='.interpreters_')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(content, f)
+            if is_windows() and os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmppath, self.path)
+        finally:
+            if os.path.exists(tmppath):
+                os.remove(tmppath)
+
+
+def _is_shim(path):
+    return os.path.basename(os.path.dirname(path)) == 'shims'
+
+
+def _is_in_path(name):
+    names = [name]
+    if is_windows() and not name.lower().endswith('.exe'):
+        names.append(name + '.exe')
+    return any(os.path.isfile(os.path.join(d, n))
+               for d in os.environ.get('PATH', '').split(os.pathsep) if d
+               for n in names)
+
+
+def get_default_registry_path():
+    path = os.environ.get(REGISTRY_VARIABLE)
+    if path:
+        return path
+    cache = (os.environ.get('LOCALAPPDATA') if is_windows() else
+             os.environ.get('XDG_CACHE_HOME'))
+    return os.path.join(cache or os.path.expanduser(os.path.join('~',
+                                                                 '.cache')),
+                        'virtualenvrunner', 'interpreters.json')
+
+
+def get_search_dirs():
+    dirs = []
+    prefixes = KNOWN_WINDOWS_PREFIXES if is_windows() else KNOWN_PREFIXES
+    for d in os.environ.get('PATH', '').split(os.pathsep) + [
+            p for prefix in prefixes
+            for p in sorted(glob.glob(os.path.expanduser(prefix)),
+                            reverse=True)]:
+        if d and d not in dirs:
+            dirs.append(d)
+    return dirs
+
+
+_registry = None
+
+
+def get_registry():
+    """ Returns the process-wide :class:`.InterpreterRegistry`."""
+    global _registry  # pylint: disable=global-statement
+    if _registry is None:
+        _registry = InterpreterRegistry()
+    return _registry
+
+
+def set_registry(registry):
+    """ Sets the process-wide :class:`.InterpreterRegistry`, e.g. to use
+    other search directories. If *registry* is *None*, the default registry
+    is used.
+    """
+    global _registry  # pylint: disable=global-statement
+    _registry = registry
@@ -0,0 +1,178 @@
+"""
+.. module:: locking
+    :platform: Unix, Windows
+    :synopsis: Advisory inter-process locks of virtualenv directories
+"""
+import errno
+import os
+import time
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class FileLock(object):
+    """ Advisory inter-process lock using the lock file *path*. The lock is
+    taken either in shared or in exclusive mode and the held lock can be
+    converted from a mode to another. The acquiring raises
+    :class:`.LockTimeout` if the lock is not acquired in *timeout* seconds.
+    By default the acquiring waits forever.
+
+    The lock is held by the open file description so it is released by the
+    operating system when the holding process dies. Stale lock files
+    removed or replaced while waiting are detected by comparing the
+    identity of the locked file to the file currently in *path*.
+
+    The exclusive holder writes its process ID to the lock file for
+    diagnostics. On Windows the shared mode is the same as the exclusive
+    mode.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, path, timeout=None):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+        self._shared = None
+
+    @property
+    def is_locked(self):
+        return self._fd is not None
+
+    @property
+    def is_shared(self):
+        return self._shared
+
+    def acquire(self, shared=False):
+        """ Acquires the lock in shared mode if *shared* is true and
+        otherwise in exclusive mode. If the lock is already held, the mode is
+        converted.
+        """
+        if self.is_locked:
+            self._convert(shared)
+            return
+        deadline = self._get_deadline()
+        while True:
+            self._fd = self._open()
+            if self._fd is None:
+                return
+            try:
+                self._lock_until(shared, deadline)
+            except Exception:
+                self._close()
+                raise
+            if self._is_current():
+                break
+            self._close()
+        self._set_locked(shared)
+
+    def release(self):
+        if self.is_locked:
+            self._close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+    def _get_deadline(self):
+        return None if self.timeout is None else time.time() + self.timeout
+
+    def _convert(self, shared):
+        if shared == self._shared:
+            return
+        self._lock_until(shared, self._get_deadline())
+        self._set_locked(shared)
+
+    def _set_locked(self, shared):
+        if not shared:
+            self._write_owner('{}\n'.format(os.getpid()))
+        elif self._shared is False:
+            self._write_owner('')
+        self._shared = shared
+
+    def _open(self):
+        fd = self._open_fd()
+        if fd is not None and fcntl is not None:
+            fcntl.fcntl(fd, fcntl.F_SETFD,
+                        fcntl.fcntl(fd, fcntl.F_GETFD) | fcntl.FD_CLOEXEC)
+        return fd
+
+    def _open_fd(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        except (IOError, OSError) as e:
+            if e.errno not in [errno.EACCES, errno.EPERM, errno.EROFS]:
+                raise
+        try:
+            return os.open(self.path, os.O_RDONLY)
+        except (IOError, OSError):
+            return None
+
+    def _close(self):
+        fd, self._fd, self._shared = self._fd, None, None
+        os.close(fd)
+
+    def _is_current(self):
+        try:
+            current = os.stat(self.path)
+        except OSError:
+            return False
+        locked = os.fstat(self._fd)
+        return (current.st_dev, current.st_ino) == (locked.st_dev,
+                                                    locked.st_ino)
+
+    def _lock_until(self, shared, deadline):
+        while not self._try_lock(shared):
+            if deadline is not None and time.time() >= deadline:
+                raise LockTimeout(
+                    'Timeout in acquiring lock {path}{owner}'.format(
+                        path=self.path, owner=self._get_owner_info()))
+            time.sleep(self.poll_interval)
+
+    def _try_lock(self, shared):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, (fcntl.LOCK_SH if shared else
+                                       fcntl.LOCK_EX) | fcntl.LOCK_NB)
+            elif msvcrt is not None and self._shared is None:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+        except (IOError, OSError) as e:
+            if e.errno in [errno.EACCES, errno.EAGAIN, errno.EDEADLK]:
+                return False
+            raise
+        return True
+
+    def _write_owner(self, owner):
+        try:
+            os.ftruncate(self._fd, 0)
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            os.write(self._fd, owner.encode('utf-8'))
+        except (IOError, OSError):
+            pass
+
+    def _get_owner_info(self):
+        try:
+            with open(self.path) as f:
+                owner = f.read().strip()
+        except (IOError, OSError):
+            return ''
+        return ' held by process {}'.format(owner) if owner else ''
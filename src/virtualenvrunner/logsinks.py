@@ -0,0 +1,132 @@
+"""
+.. module:: logsinks
+    :platform: Unix, Windows
+    :synopsis: Buffered fan-out of installation log to pluggable sinks
+"""
+from __future__ import print_function
+import sys
+import threading
+import time
+from collections import deque
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class LogSink(object):
+    """ Base class of the sinks of the installation log. The sink receives
+    the log in batches of text via :meth:`write` followed by :meth:`flush`.
+    """
+
+    def write(self, data):
+        raise NotImplementedError()
+
+    def flush(self):
+        pass
+
+
+class FileSink(LogSink):
+    """ Sink writing to the open text file *f*."""
+
+    def __init__(self, f):
+        self._file = f
+
+    def write(self, data):
+        self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+
+class StdoutSink(LogSink):
+    """ Sink writing to :data:`sys.stdout`."""
+
+    def write(self, data):
+        print(data, end='')
+
+    def flush(self):
+        sys.stdout.flush()
+
+
+class RingBufferSink(LogSink):
+    """ Sink keeping in memory at most *maxlines* last lines of the log."""
+
+    def __init__(self, maxlines=1000):
+        self._lines = deque(maxlen=maxlines)
+        self._partial = ''
+
+    def write(self, data):
+        lines = (self._partial + data).split('\n')
+        self._partial = lines.pop()
+        self._lines.extend(line + '\n' for line in lines)
+
+    @property
+    def lines(self):
+        lines = list(self._lines) + ([self._partial] if self._partial else [])
+        return lines[-self._lines.maxlen:]
+
+    def getvalue(self):
+        return ''.join(self.lines)
+
+
+class LogFanout(object):
+    """ Buffers the written log and fans it out to the sinks in batches.
+    The buffer is flushed when it exceeds *buffer_size* characters, when
+    *flush_interval* seconds is passed since the previous flush, when the
+    sinks are changed and in the explicit :meth:`flush` calls, e.g. at the
+    end of a command. The buffered log is also flushed by a timer thread
+    *flush_interval* seconds after it is written so that the log is not
+    held while the command is silent.
+    """
+
+    def __init__(self, buffer_size=65536, flush_interval=0.1):
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._sinks = []
+        self._buffer = []
+        self._buffered = 0
+        self._flushed = time.time()
+        self._lock = threading.RLock()
+        self._timer = None
+
+    def add_sink(self, sink):
+        with self._lock:
+            self.flush()
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        with self._lock:
+            self.flush()
+            self._sinks.remove(sink)
+
+    def write(self, data):
+        with self._lock:
+            if not self._sinks:
+                return
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if (self._buffered >= self.buffer_size or
+                    time.time() - self._flushed >= self.flush_interval):
+                self.flush()
+            elif self._timer is None:
+                self._start_timer()
+
+    def flush(self):
+        with self._lock:
+            data = ''.join(self._buffer)
+            self._buffer, self._buffered = [], 0
+            self._flushed = time.time()
+            if data:
+                for sink in self._sinks:
+                    sink.write(data)
+                    sink.flush()
+
+    def _start_timer(self):
+        self._timer = threading.Timer(self.flush_interval, self._flush_by_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _flush_by_timer(self):
+        with self._lock:
+            self._timer = None
+            self.flush()
@@ -0,0 +1,74 @@
+"""
+.. module:: matrixrun
+    :platform: Unix, Windows
+    :synopsis: Concurrent runs of command in virtualenvs of several Pythons
+"""
+import time
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class MatrixResult(namedtuple('MatrixResult', ['python_version',
+                                               'returncode',
+                                               'elapsed',
+                                               'error'])):
+    """ Result of the run in the virtualenv of *python_version*. The
+    *returncode* is *None* if the virtualenv setup or the run raised
+    *error*.
+    """
+
+    @property
+    def success(self):
+        return self.returncode == 0
+
+    def __str__(self):
+        return 'python{version}: {outcome} ({elapsed:.2f} s)'.format(
+            version=self.python_version,
+            outcome=(self.error if self.returncode is None else
+                     'exit status {}'.format(self.returncode)),
+            elapsed=self.elapsed)
+
+
+class MatrixRun(object):
+    """ Runs the command line in the virtualenvs of several Python versions
+    concurrently. The *runner_factory* is a callable which returns the
+    :class:`virtualenvrunner.runner.Runner` for the Python version. The
+    *run* of the runner must return the exit status of the command.
+
+    At most *processes* virtualenvs are set up and run at a time. The
+    setup and the run are spent in the subprocesses so the runs are
+    driven from a bounded pool of threads.
+    """
+
+    def __init__(self, runner_factory, processes=None):
+        self._runner_factory = runner_factory
+        self._processes = processes
+
+    def run(self, python_versions, commandline):
+        """ Returns list of :class:`.MatrixResult` in the order of
+        *python_versions*.
+        """
+        pool = ThreadPool(self._processes or len(python_versions) or 1)
+        try:
+            return pool.map(
+                lambda v: self._run_with_python_version(v, commandline),
+                python_versions)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _run_with_python_version(self, python_version, commandline):
+        start = time.time()
+        returncode, error = None, None
+        try:
+            with self._runner_factory(python_version) as runner:
+                returncode = runner.run(commandline)
+        except Exception as e:  # pylint: disable=broad-except
+            error = '{cls}: {exc}'.format(cls=e.__class__.__name__, exc=e)
+        return MatrixResult(python_version=python_version,
+                            returncode=returncode,
+                            elapsed=time.time() - start,
+                            error=error)
@@ -0,0 +1,159 @@
+"""
+.. module:: outputstream
+    :platform: Unix, Windows
+    :synopsis: Streaming of command output with bounded memory
+"""
+import codecs
+import functools
+import os
+import subprocess
+from virtualenvrunner.logsinks import LogFanout, RingBufferSink
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def iter_chunks(handle, chunk_size):
+    """ Yields the chunks of at most *chunk_size* read from *handle* as soon
+    as they are available.
+    """
+    read = _get_read_available(handle)
+    while True:
+        chunk = read(chunk_size)
+        if chunk in [b'', '']:
+            break
+        yield chunk
+
+
+def _get_read_available(handle):
+    if hasattr(handle, 'read1'):
+        return handle.read1
+    try:
+        fd = handle.fileno()
+    except (AttributeError, IOError, OSError, ValueError):
+        return handle.read
+    # The read of the Python 2 file waits until the whole size is read.
+    return functools.partial(os.read, fd)
+
+
+def iter_decoded(chunks, errors='strict'):
+    decoder = codecs.getincrementaldecoder('utf-8')(errors)
+    for chunk in chunks:
+        yield (decoder.decode(chunk)
+               if isinstance(chunk, bytes) else
+               chunk)
+
+
+class OutputStreamBase(object):
+    """ Decodes the output of the command *cmd* to the items of the stream,
+    tees it to the :class:`virtualenvrunner.logsinks.LogSink` sinks *tee*
+    and keeps the last *tail_lines* lines of it in :attr:`tail`.
+    """
+
+    def __init__(self, cmd, lines=False, tee=(), tail_lines=1000,
+                 chunk_size=65536):
+        self.cmd = cmd
+        self.lines = lines
+        self.chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self._partial = ''
+        self._tail = RingBufferSink(tail_lines)
+        self._tee = LogFanout()
+        for sink in tee:
+            self._tee.add_sink(sink)
+
+    @property
+    def tail(self):
+        """ The last lines of the output read so far."""
+        return self._tail.getvalue()
+
+    def _process(self, chunk, final=False):
+        data = self._decoder.decode(chunk, final)
+        if data:
+            self._tail.write(data)
+            self._tee.write(data)
+            self._tee.flush()
+        if not self.lines:
+            return [data] if data else []
+        lines = (self._partial + data).split('\n')
+        self._partial = lines.pop()
+        items = [line + '\n' for line in lines]
+        if final and self._partial:
+            items.append(self._partial)
+            self._partial = ''
+        return items
+
+    def _raise_if_failed(self, returncode):
+        self._tee.flush()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, self.cmd,
+                                                output=self.tail)
+
+
+class OutputStream(OutputStreamBase):
+    """ Iterator of the output of the shell command *cmd* run with the
+    environment *env*. The items are the decoded chunks of the output or,
+    if *lines* is true, the lines of it. The standard error is included in
+    the output unless *stderr* is given.
+
+    The pipe is read only when the next item is requested, so the command
+    is blocked by a slow consumer instead of the output being buffered in
+    memory. If the command fails, :class:`subprocess.CalledProcessError`
+    with the tail of the output is raised after the last item. The command
+    is killed if the stream is closed before the end of the output.
+
+    >>> with OutputStream('make test', lines=True) as stream:
+    ...     failures = [line for line in stream if 'FAILED' in line]
+    """
+
+    def __init__(self, cmd, env=None, lines=False, tee=(), tail_lines=1000,
+                 chunk_size=65536, stderr=subprocess.STDOUT):
+        super(OutputStream, self).__init__(  # pylint: disable=super-with-arguments
+            cmd, lines=lines, tee=tee, tail_lines=tail_lines,
+            chunk_size=chunk_size)
+        self._proc = subprocess.Popen(cmd,
+                                      stdout=subprocess.PIPE,
+                                      stderr=stderr,
+                                      shell=True,
+                                      env=env)
+        self._items = self._iterate()
+
+    @property
+    def returncode(self):
+        return self._proc.returncode
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    next = __next__
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._items.close()
+        self._terminate()
+
+    def _iterate(self):
+        try:
+            for chunk in iter_chunks(self._proc.stdout, self.chunk_size):
+                for item in self._process(chunk):
+                    yield item
+            for item in self._process(b'', final=True):
+                yield item
+            self._raise_if_failed(self._proc.wait())
+        finally:
+            self._terminate()
+
+    def _terminate(self):
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.stdout.close()
+        self._proc.wait()
+        self._tee.flush()
@@ -0,0 +1,123 @@
+"""
+.. module:: prebuild
+    :platform: Unix, Windows
+    :synopsis: Concurrent building of the wheels of the requirements
+"""
+import os
+import re
+import shutil
+import tempfile
+from collections import namedtuple
+from virtualenvrunner.requirements import (
+    RequirementsDiff,
+    RequirementsFiles,
+    RequirementsSnapshot)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class PrebuildResult(namedtuple('PrebuildResult', ['cmd',
+                                                   'returncode',
+                                                   'output'])):
+    pass
+
+
+def check_jobs(jobs):
+    """ Raises :class:`ValueError` if the number of the prebuild *jobs* is
+    not positive.
+    """
+    if jobs < 1:
+        raise ValueError(
+            'The number of the prebuild jobs must be positive, got '
+            '{}'.format(jobs))
+
+
+class WheelPrebuild(object):
+    """ Builds the wheels of the named requirements of the requirements file
+    *requirements* to *wheel_dir* with at most *jobs* concurrent *pip wheel*
+    commands. Each project is built without its dependencies from the
+    requirements file of the global options and of the requirement lines
+    of the project so that the markers and the hashes are preserved.
+
+    The wheels already published to the index are only downloaded while
+    the source distributions are built, which is where the time is spent.
+    The wheels in *wheel_dir* are reused so the built wheels are given to
+    the installation with *--find-links*. Each *pip wheel* is run by one
+    of the *jobs* threads which only waits for the command to finish.
+
+    The editable and the URL requirements are not prebuilt and the
+    constrained requirements are not prebuilt at all as the constraints
+    may be relative to the requirements files.
+    """
+
+    _editable_re = re.compile(r'^(-e|--editable)(\s|=|$)')
+
+    def __init__(self, requirements, wheel_dir, jobs, pip_index_url=None):
+        check_jobs(jobs)
+        self.requirements = requirements
+        self.wheel_dir = wheel_dir
+        self.jobs = jobs
+        self.pip_index_url = pip_index_url
+
+    def build(self, run):
+        """ Runs the *pip wheel* commands with the callable *run* which
+        takes the command and returns the tuple of the exit status and the
+        output. Returns the list of :class:`.PrebuildResult` in the order of
+        the requirements. Nothing is prebuilt if the requirements files
+        can't be read as the installation reports the error.
+        """
+        try:
+            snapshot = RequirementsSnapshot.from_files(self.requirements)
+        except (IOError, OSError, ValueError):
+            return []
+        if not snapshot.requirements or self._is_constrained(snapshot):
+            return []
+        if not os.path.isdir(self.wheel_dir):
+            os.makedirs(self.wheel_dir)
+        workdir = tempfile.mkdtemp(prefix='prebuild_')
+        try:
+            cmds = self._write_requirements(snapshot, workdir)
+            from multiprocessing.pool import ThreadPool  # pylint: disable=import-outside-toplevel
+            pool = ThreadPool(min(self.jobs, len(cmds)))
+            try:
+                return pool.map(lambda cmd: PrebuildResult(cmd, *run(cmd)),
+                                cmds)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def wheel_cmd(self, requirements):
+        return ('pip wheel --no-deps -r {requirements} -w {path}'
+                ' --find-links {path}{index_arg}'.format(
+                    requirements=requirements,
+                    path=self.wheel_dir,
+                    index_arg=(' -i {}'.format(self.pip_index_url)
+                               if self.pip_index_url else '')))
+
+    def _write_requirements(self, snapshot, workdir):
+        options = [line for line in snapshot.options
+                   if self._is_global_option(line)]
+        cmds = []
+        for name in sorted(snapshot.requirements):
+            path = os.path.join(workdir, '{}.txt'.format(name))
+            RequirementsDiff(options=options,
+                             install=snapshot.requirements[name],
+                             uninstall=[]).write(path)
+            cmds.append(self.wheel_cmd(path))
+        return cmds
+
+    @classmethod
+    def _is_global_option(cls, line):
+        return (line.startswith('-') and
+                RequirementsFiles.split_include(line) is None and
+                not cls._editable_re.match(line))
+
+    @staticmethod
+    def _is_constrained(snapshot):
+        return any(include[0] in ['-c', '--constraint']
+                   for include in (RequirementsFiles.split_include(line)
+                                   for line in snapshot.options)
+                   if include is not None)
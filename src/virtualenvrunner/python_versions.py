@@ -13,5 +13,15 @@ class PythonVersion:
 
 
 def get_python_versions():
-    for v in [(2, None), (2, 7), (3, None), (3, 4), (3, 5), (3, 6), (3, 7)]:
+    for v in [(2, None), (2, 7), (3, None)] + [(3, m) for m in range(4, 14)]:
         yield PythonVersion(*v)
+
+
+def parse_python_version(version):
+    """ Returns :class:`.PythonVersion` of *version*, e.g. *3* or *3.12*,
+    or *None* if *version* is not a Python version.
+    """
+    parts = version.split('.')
+    if len(parts) > 2 or not all(p.isdigit() for p in parts):
+        return None
+    return PythonVersion(parts[0], parts[1] if len(parts) == 2 else None)
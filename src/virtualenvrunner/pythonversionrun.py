@@ -1,10 +1,19 @@
-from virtualenvrunner.python_versions import get_python_versions
+import re
+from virtualenvrunner.python_versions import (
+    get_python_versions,
+    parse_python_version)
 from virtualenvrunner.utils import get_exe_suffix
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
 
 
+def get_pythonexe(python_version):
+    return 'python{version}{exe_suffix}'.format(
+        version=python_version,
+        exe_suffix=get_exe_suffix())
+
+
 class PythonVersionRun(object):
 
     def __init__(self, run):
@@ -20,15 +29,25 @@ class PythonVersionRun(object):
         return lambda: self._run_with_python_version(python_version)
 
     def _run_with_python_version(self, python_version):
-        self._run(pythonexe='python{version}{exe_suffix}'.format(
-            version=python_version,
-            exe_suffix=get_exe_suffix()),
-                python_version=python_version)
+        self._run(pythonexe=get_pythonexe(python_version),
+                  python_version=python_version)
 
     def __getattr__(self, name):
         try:
             return self._run_functions[name]
         except KeyError:
+            python_version = self._get_python_version(name)
+            if python_version is not None:
+                return self._get_run_lambda(python_version)
             raise AttributeError('{cls} object has no attribute {name}'.format(  # pylint: disable=raise-missing-from
                 cls=self.__class__.__name__,
                 name=name))
+
+    def _get_python_version(self, name):
+        """ Returns the Python version of the run function *name* of a
+        version not in the default versions, e.g. *run312* for 3.12.
+        """
+        m = re.match(r'^{run}(\d)(\d*)$'.format(run=self._run.__name__),
+                     name)
+        return m and parse_python_version(
+            '.'.join(v for v in m.groups() if v))
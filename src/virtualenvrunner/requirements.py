@@ -0,0 +1,231 @@
+"""
+.. module:: requirements
+    :platform: Unix, Windows
+    :synopsis: Requirements files with nested includes
+"""
+import hashlib
+import io
+import json
+import os
+import re
+from collections import namedtuple
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class RequirementsFile(namedtuple('RequirementsFile', ['path', 'content'])):
+    pass
+
+
+class RequirementsFiles(object):
+    """ Requirements file *path* with the nested *-r* and *-c* includes
+    resolved relative to the including file. Each file is read only once
+    and the files are listed in the order they are encountered. The URL
+    includes are not fetched, so they are identified only by the URL in
+    the including file.
+    """
+
+    include_options = ['-r', '--requirement', '-c', '--constraint']
+
+    def __init__(self, path):
+        self._path = path
+        self._files = None
+
+    @property
+    def files(self):
+        if self._files is None:
+            self._files = []
+            self._add_file(self._path, set())
+        return self._files
+
+    def digest(self, *extras):
+        """ Returns SHA-256 hex digest of the requirements files contents
+        together with *extras*.
+        """
+        h = hashlib.sha256()
+        for f in self.files:
+            h.update(f.content)
+            h.update(b'\0')
+        for extra in extras:
+            h.update(extra.encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()
+
+    def _add_file(self, path, seen):
+        realpath = os.path.realpath(path)
+        if realpath in seen:
+            return
+        seen.add(realpath)
+        with open(path, 'rb') as f:
+            content = f.read()
+        self._files.append(RequirementsFile(path=path, content=content))
+        for include in self._includes(content):
+            if '://' not in include:
+                self._add_file(os.path.join(os.path.dirname(path), include),
+                               seen)
+
+    def _includes(self, content):
+        for line in io.StringIO(content.decode('utf-8')):
+            include = self._get_include(line.split('#', 1)[0].strip())
+            if include:
+                yield include
+
+    def _get_include(self, line):
+        include = self.split_include(line)
+        return None if include is None else include[1]
+
+    @classmethod
+    def split_include(cls, line):
+        """ Returns the pair of the option and the path of the include
+        *line* or *None* if the *line* is not an include.
+        """
+        for option in cls.include_options:
+            if line == option or not line.startswith(option):
+                continue
+            rest = line[len(option):]
+            if rest[0] in ' \t=':
+                return option, rest.lstrip(' \t=')
+            if not option.startswith('--'):
+                return option, rest
+        return None
+
+
+class RequirementsDiff(namedtuple('RequirementsDiff', ['options',
+                                                       'install',
+                                                       'uninstall'])):
+    """ Difference of two :class:`.RequirementsSnapshot` instances. The
+    requirement lines *install* are new or changed and the projects
+    *uninstall* are removed. The global *options* are the same in both.
+    """
+
+    @property
+    def is_empty(self):
+        return not self.install and not self.uninstall
+
+    def write(self, path):
+        """ Writes the requirements file of the options and of the lines to
+        be installed.
+        """
+        with open(path, 'w') as f:
+            for line in self.options + self.install:
+                f.write('{}\n'.format(line))
+
+
+class RequirementsSnapshot(object):
+    """ Snapshot of the requirement lines of the requirements files and of
+    *extras*, e.g. the index URL. The requirement lines are keyed by the
+    normalized project name. The lines without the project name, e.g. the
+    options, the includes, the editables and the URLs, are kept in the
+    order of appearance in *options*. The relative paths of the editables
+    and of the find links are made absolute.
+    """
+
+    _name_re = re.compile(
+        r'^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?=$|[\[;@<>=!~(\s])')
+    _comment_re = re.compile(r'(^|\s+)#.*$')
+    _path_option_re = re.compile(
+        r'^(-e|--editable|-f|--find-links)(\s+|=)([^\s\[]+)(.*)$')
+
+    def __init__(self, options, requirements, extras=()):
+        self.options = options
+        self.requirements = requirements
+        self.extras = list(extras)
+
+    @classmethod
+    def from_files(cls, path, extras=()):
+        options = []
+        requirements = {}
+        for f in RequirementsFiles(path).files:
+            directory = os.path.dirname(os.path.abspath(f.path))
+            for line in cls._lines(f.content):
+                line = cls._anchor_path(line, directory)
+                name = cls._get_name(line)
+                if name is None:
+                    options.append(line)
+                else:
+                    requirements.setdefault(name, []).append(line)
+        return cls(options, requirements, extras=extras)
+
+    @classmethod
+    def load(cls, path):
+        """ Loads the snapshot saved to *path* or returns *None* if the
+        snapshot can't be read.
+        """
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path) as f:
+                content = json.load(f)
+            return cls(content['options'], content['requirements'],
+                       extras=content['extras'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({'options': self.options,
+                       'requirements': self.requirements,
+                       'extras': self.extras}, f)
+
+    def diff(self, previous):
+        """ Returns :class:`.RequirementsDiff` from *previous* snapshot to
+        this snapshot or *None* if the difference can't be installed
+        incrementally. That is the case if the options or the extras are
+        changed or if the requirements are constrained.
+        """
+        if (self.options != previous.options or
+                self.extras != previous.extras or
+                any(self._is_constraint(line) for line in self.options)):
+            return None
+        install = []
+        for name in sorted(self.requirements):
+            if self.requirements[name] != previous.requirements.get(name):
+                install.extend(self.requirements[name])
+        return RequirementsDiff(
+            options=[line for line in self.options
+                     if RequirementsFiles.split_include(line) is None],
+            install=install,
+            uninstall=sorted(set(previous.requirements) -
+                             set(self.requirements)))
+
+    @classmethod
+    def _lines(cls, content):
+        logical = ''
+        for line in io.StringIO(content.decode('utf-8')):
+            line = line.rstrip('\r\n')
+            if line.endswith('\\'):
+                logical += line[:-1]
+                continue
+            line = cls._comment_re.sub('', logical + line).strip()
+            logical = ''
+            if line:
+                yield line
+
+    @classmethod
+    def _anchor_path(cls, line, directory):
+        """ Returns *line* with the relative path of the editable or of the
+        find links option made absolute if the path exists relative to
+        *directory* of the requirements file so that the line can be written
+        to another requirements file.
+        """
+        m = cls._path_option_re.match(line)
+        if m is None or '://' in m.group(3) or os.path.isabs(m.group(3)):
+            return line
+        path = os.path.join(directory, m.group(3))
+        if not os.path.exists(path):
+            return line
+        return '{option}{sep}{path}{rest}'.format(option=m.group(1),
+                                                  sep=m.group(2),
+                                                  path=os.path.normpath(path),
+                                                  rest=m.group(4))
+
+    @staticmethod
+    def _is_constraint(line):
+        include = RequirementsFiles.split_include(line)
+        return include is not None and include[0] in ['-c', '--constraint']
+
+    @classmethod
+    def _get_name(cls, line):
+        m = cls._name_re.match(line)
+        return re.sub(r'[-_.]+', '-', m.group(1)).lower() if m else None
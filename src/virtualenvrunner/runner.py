@@ -4,13 +4,27 @@
     :synopsis: Runner for commands in virtualenv
 """
 from __future__ import print_function
-import tempfile
 import shutil
 import os
 import subprocess
 from contextlib import contextmanager
 from virtualenvrunner.activateenv import ActivateEnv
-from virtualenvrunner.utils import is_windows, get_exe_suffix, get_unicode
+from virtualenvrunner.cachemanager import mark_used, make_tmp_virtualenv_dir
+from virtualenvrunner.creation import CreationBase
+from virtualenvrunner.installation import InstallationBase
+from virtualenvrunner.logsinks import LogFanout, FileSink, StdoutSink
+from virtualenvrunner.outputstream import (
+    OutputStream,
+    iter_chunks,
+    iter_decoded)
+from virtualenvrunner.staging import StagingBase
+from virtualenvrunner.timing import TimingBase
+from virtualenvrunner.worker import ExecutionBase
+from virtualenvrunner.utils import (
+    is_windows,
+    get_cmdline,
+    get_exe_suffix,
+    get_hidden)
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
@@ -20,7 +34,11 @@ class RunnerInstallationFailed(Exception):
     pass
 
 
-class Runner(object):
+class Runner(StagingBase,
+             CreationBase,
+             InstallationBase,
+             ExecutionBase,
+             TimingBase):
     """ The Runner class is a runner for commands in the virtualenv.
 
         By default a temporary *virtualenv* is created to $(pwd)/.venv and
@@ -34,12 +52,59 @@ class Runner(object):
         during the setup.
 
         The Python interpreter can be defined by setting the argument
-        *virtualenv_pythonexe*. By default 'python' is used.
+        *virtualenv_pythonexe*. By default 'python' is used. The interpreter
+        names not in PATH are resolved against
+        :class:`virtualenvrunner.interpreters.InterpreterRegistry` so a
+        missing interpreter is reported before creating the *virtualenv*,
+        except on Windows where the name is passed to *virtualenv* for the
+        *py* launcher.
 
         URL to PyPI can be altered via *pip_index_url*. The argument
         *pip_index_url* is an URL to PyPI to be used by both pip and
         :mod:`distutils`.
 
+        Finished virtualenvs can be shared via the cache root set by
+        :meth:`set_cache_root`. The cached *virtualenv* is identified by the
+        digest of the requirements files and the interpreter, and a matching
+        *virtualenv* is reused without running *pip*.
+
+        The fingerprint of the installed requirements is stored to the
+        *virtualenv*. If neither the requirements files, *pip_index_url*
+        nor the installed distributions are changed since the previous
+        installation, *pip install* and *pip freeze* are skipped. The
+        update mode *virtualenv_reqs_upd* always runs *pip install*.
+
+        Concurrent runners in separate processes may share the same
+        *virtualenv*. The runner holds the advisory
+        :class:`virtualenvrunner.locking.FileLock` *lock_path* in shared mode
+        while in the context so that the *virtualenv* in use is not evicted.
+        The setup modifying the *virtualenv* is serialized by the exclusive
+        lock *setup_lock_path* held only during the setup, and the state of
+        the *virtualenv* is evaluated again after acquiring it. The timeout
+        of the lock acquiring can be set via :meth:`set_lock_timeout`.
+
+        The new *virtualenv* is built in *staging_dir* and it is renamed to
+        *virtualenv_dir* with the completion marker only after the setup
+        has succeeded. The failed build is left to *staging_dir* and the
+        next setup continues from it.
+
+        The installation log is written in batches to the log sinks. The
+        sinks, e.g. :class:`virtualenvrunner.logsinks.RingBufferSink`, can
+        be attached via :meth:`add_log_sink`.
+
+        The output of the command can be processed in Python via
+        :meth:`stream` without buffering it in memory.
+
+        Python code and picklable callables can be executed in the
+        *virtualenv* via :meth:`execute` and :meth:`call` in a long-lived
+        worker process which avoids the interpreter startup
+        per call. The worker is restarted if it crashes and after the number
+        of requests set by :meth:`set_worker_max_requests`.
+
+        The setup is done in *__enter__* unless the lazy setup is set via
+        :meth:`set_lazy_setup`. The lazy setup is done on the first run so
+        the code paths which do not run anything do not pay for it.
+
         The command line *run* call can be changed via callable *run* argument.
         The *run* must be a function similar to :func:`subprocess.check_call`
         with *shell=True*. The *run* function has to be able to take at least
@@ -61,6 +126,7 @@ class Runner(object):
 """
     virtualenv_bin = 'Scripts' if is_windows() else 'bin'
     virtualenv_exe = 'virtualenv'
+    log_chunk_size = 65536
 
     def __init__(self,
                  virtualenv_dir=None,
@@ -73,6 +139,7 @@ class Runner(object):
 
         Kwargs:
         """
+        super(Runner, self).__init__()  # pylint: disable=super-with-arguments
         self._virtualenv_dir = virtualenv_dir
         self.virtualenv_reqs = virtualenv_reqs
         if virtualenv_reqs_upd and virtualenv_reqs_upd.lower() == "true":
@@ -84,16 +151,29 @@ class Runner(object):
         self.pip_index_url = pip_index_url
         self._run = run or self.__run
         self._activateenv = None
-        self._files = set()
+        self._log = LogFanout()
         self._new_virtualenv = False
         self._save_freeze_path = None
 
     def __enter__(self):
-        self._setup_virtualenv()
+        self._setup_or_defer()
         return self
 
     def __exit__(self, *args):
-        pass
+        self._stop_worker()
+        self._release_setup()
+
+    def _setup(self):
+        self._lock_for_use()
+        try:
+            with self._setup_mutex_if_needed() as locked:
+                if locked:
+                    self._reset_requirements_up_to_date()
+                self._setup_virtualenv()
+        except Exception:
+            self._release_lock()
+            raise
+        mark_used(self.virtualenv_dir)
 
     def _setup_virtualenv(self):
         """ The extended Runner classes may alter method *_setup_virtualenv*
@@ -101,68 +181,144 @@ class Runner(object):
         is not a hook so the original *_setup_virtualenv* must be called in
         order to guarantee the functionality.
         """
-        self._create_virtualenv_if_needed()
-        self._set_pydistutilscfg_if_needed()
+        with self._phase('setup'):
+            self._remove_incomplete_cached_virtualenv()
+            with self._staging_if_needed() as staging:
+                self._new_virtualenv = self._new_virtualenv or staging
+                with self._phase('create_virtualenv'):
+                    self._create_virtualenv_if_needed()
+                with self._phase('pydistutilscfg'):
+                    self._set_pydistutilscfg_if_needed()
+                with self._phase('activate'):
+                    self._activate()
+                self._install_requirements_and_freeze_if_needed()
+                self._mark_complete_if_needed()
+
+    def _activate(self):
         self._activateenv = ActivateEnv(self.activate_this)
-        self._install_requirements_and_freeze_if_needed()
+        if self._timer.is_enabled:
+            self._activateenv.env  # pylint: disable=pointless-statement
 
     def set_save_freeze_path(self, save_freeze_path):
         self._save_freeze_path = save_freeze_path
 
+    def add_log_sink(self, sink):
+        """ Adds *sink* for the installation log. The *sink* must be
+        :class:`virtualenvrunner.logsinks.LogSink`.
+        """
+        self._log.add_sink(sink)
+
+    def remove_log_sink(self, sink):
+        self._log.remove_sink(sink)
+
     @property
     def virtualenv_dir(self):
-        return self._virtualenv_dir or os.path.join(os.getcwd(), '.venv')
+        return (self._virtualenv_dir or
+                self.cached_virtualenv_dir or
+                os.path.join(os.getcwd(), '.venv'))
+
+    @property
+    def setup_modifies_virtualenv(self):
+        return bool(
+            not self.virtualenv_exists or
+            (self.uses_cache and not os.path.isfile(self.completion_marker)) or
+            self.virtualenv_is_volatile)
+
+    @property
+    def virtualenv_exists(self):
+        """ Property *virtualenv_exists* is true if the *virtualenv* in
+        *setup_dir* is created either with *activate_this.py* or, by
+        :mod:`venv`, with *pyvenv.cfg* and *pip* which is installed last.
+        """
+        return os.path.isfile(self.activate_this) or (
+            os.path.isfile(os.path.join(self.setup_dir, 'pyvenv.cfg')) and
+            os.path.isfile(os.path.join(self.setup_dir,
+                                        self.virtualenv_bin,
+                                        'pip' + get_exe_suffix())))
 
     @property
     def activate_this(self):
-        return os.path.join(self.virtualenv_dir,
+        return os.path.join(self.setup_dir,
                             self.virtualenv_bin,
                             'activate_this.py')
 
     @property
     def pydistutilscfg(self):
-        return os.path.join(
-            self.virtualenv_dir,
-            '{}pydistutils.cfg'.format('' if is_windows() else '.'))
+        return os.path.join(self.setup_dir, get_hidden('pydistutils.cfg'))
 
     @property
     def requirements_log_file(self):
         return os.path.join(
-            self.virtualenv_dir,
-            '{}virtualenvrunner_requirements.log'.format(
-                '' if is_windows() else '.'))
+            self.setup_dir,
+            get_hidden('virtualenvrunner_requirements.log'))
+
+    @property
+    def completion_marker(self):
+        return os.path.join(
+            self.setup_dir,
+            get_hidden('virtualenvrunner_complete'))
 
     @property
     def env(self):
         """ Property *env* is :data:`os.environ` of
-        *virtualenv*.
+        *virtualenv*. In the lazy setup the *virtualenv* is set up on the
+        first access.
         """
+        self._setup_if_pending()
         return self._activateenv.env
 
     @property
-    def virtualenv_pythonexe(self):
-        return self._virtualenv_pythonexe or 'python' + get_exe_suffix()
+    def virtualenv_python(self):
+        """ Path to the Python interpreter of the *virtualenv*.
+        """
+        return os.path.join(self.virtualenv_dir, self.virtualenv_bin,
+                            'python' + get_exe_suffix())
 
     def _create_virtualenv_if_needed(self):
-        if not os.path.isfile(self.activate_this):
+        if not self.virtualenv_exists:
             self._create_virtualenv()
 
     def _create_virtualenv(self):
-        self._run_in_install(
-            '{virtualenv_exe} --no-download -p {virtualenv_pythonexe} '
-            '{virtualenv_dir}'.format(
-                virtualenv_exe=self.virtualenv_exe,
-                virtualenv_pythonexe=self.virtualenv_pythonexe,
-                virtualenv_dir=self.virtualenv_dir))
+        if self._clone is None:
+            self._create_virtualenv_with_virtualenv()
+        else:
+            self._clone_template()
+            self._reset_requirements_up_to_date()
         self._new_virtualenv = True
 
+    def _create_virtualenv_with_virtualenv(self):
+        cmd = self._virtualenv_cmd
+        if cmd is None:
+            self._create_virtualenv_in_process()
+        else:
+            self._run_in_install(cmd)
+
+    def _create_virtualenv_in_process(self, write=None):
+        with self._phase('command', backend=self.virtualenv_backend.name):
+            try:
+                self.virtualenv_backend.create(self.virtualenv_pythonexe,
+                                               self.setup_dir,
+                                               write or self._write_log)
+            except Exception as e:  # pylint: disable=broad-except
+                raise RunnerInstallationFailed(  # pylint: disable=raise-missing-from
+                    "Creation of '{virtualenv_dir}' with backend {name}"
+                    " failed: {e}".format(
+                        virtualenv_dir=self.setup_dir,
+                        name=self.virtualenv_backend.name,
+                        e=e))
+            finally:
+                self._log.flush()
+
     def _set_pydistutilscfg_if_needed(self):
         if self.pip_index_url and self.virtualenv_is_volatile:
             self._set_pydistutilscfg()
 
     @property
     def virtualenv_is_volatile(self):
-        return self._new_virtualenv or self.virtualenv_reqs
+        return self.new_virtualenv_is_volatile or (
+            self.virtualenv_reqs and
+            not self.uses_cache and
+            not self.requirements_are_up_to_date)
 
     def _set_pydistutilscfg(self):
         with open(self.pydistutilscfg, 'w') as f:
@@ -187,8 +343,8 @@ class Runner(object):
         f = None
         try:
             with open(path, mode) as f:
-                self._files.add(f)
-                yield None
+                with self._log_sink(FileSink(f)):
+                    yield None
 
         except IOError as file_err:
             print("Error in {} file operation: Error #{} - {}".format(
@@ -198,37 +354,64 @@ class Runner(object):
             if f is not None:
                 raise
             yield None
+
+    @contextmanager
+    def _log_sink(self, sink):
+        self.add_log_sink(sink)
+        try:
+            yield None
         finally:
-            if f in self._files:
-                self._files.remove(f)
+            self.remove_log_sink(sink)
 
     def _install_requirements_and_freeze_if_needed(self):
         if self.virtualenv_reqs and self.virtualenv_is_volatile:
-            self._pip_install()
-            self._pip_freeze_with_banner()
+            with self._phase('install'):
+                self._pip_install()
+            with self._phase('freeze'):
+                self._pip_freeze_with_banner()
+            self._save_requirements_fingerprint()
+        elif self.virtualenv_reqs and self._repopulate_wheelhouse:
+            self.populate_wheelhouse()
         if self._save_freeze_path is not None:
-            self._save_pip_freeze_without_err()
+            with self._phase('save_freeze'):
+                self._save_pip_freeze_without_err()
 
     def _pip_install(self):
+        if self.wheelhouse_needs_population:
+            self.populate_wheelhouse()
+        if self._wheelhouse is None:
+            self._prebuild_wheels_if_needed(self.prebuild_wheel_dir)
         with self._open_requirements_log_file():
-            self._run_in_install(
-                'pip install {req_update}-r {requirements}{index_arg}'.format(
-                    requirements=self.virtualenv_reqs,
-                    index_arg=(' -i {}'.format(self.pip_index_url)
-                               if self.pip_index_url else ''),
-                    req_update=self.virtualenv_reqs_upd),
-                env=self.env)
+            for cmd in self._get_pip_install_cmds():
+                self._run_in_install(cmd, env=self.env)
+
+    @property
+    def _pip_install_cmd(self):
+        return self._get_pip_install_cmd(self.virtualenv_reqs)
+
+    def _get_pip_install_cmd(self, requirements):
+        return 'pip install {req_update}-r {requirements}{index_arg}'.format(
+            requirements=requirements,
+            index_arg=self._pip_install_index_arg,
+            req_update=self.virtualenv_reqs_upd)
 
     def _pip_freeze_with_banner(self):
         with self._requirements_log_with_banner():
-            self._write_line('pip freeze:\n')
-            self._run_in_install('pip freeze', env=self.env)
+            self._write_log('pip freeze:\n')
+            self._pip_freeze()
 
     def _save_pip_freeze_without_err(self):
         with open(os.devnull, 'w') as devnull:
             with self._open_path_for_write_if_path(self._save_freeze_path,
                                                    mode='w'):
-                self._run_in_install('pip freeze', stderr=devnull, env=self.env)
+                self._pip_freeze(stderr=devnull)
+
+    def _pip_freeze(self, stderr=subprocess.STDOUT):
+        if self.freeze is None:
+            self._run_in_install('pip freeze', stderr=stderr, env=self.env)
+        else:
+            self._write_log(self.freeze)
+            self._log.flush()
 
     @contextmanager
     def _requirements_log_with_banner(self):
@@ -239,42 +422,46 @@ class Runner(object):
     @contextmanager
     def _banner(self, banner_length):
         try:
-            self._write_line('\n{}\n'.format(banner_length * "#"))
+            self._write_log('\n{}\n'.format(banner_length * "#"))
+            self._log.flush()
             yield None
         finally:
-            self._write_line('{}\n'.format(banner_length * "#"))
+            self._write_log('{}\n'.format(banner_length * "#"))
+            self._log.flush()
 
     def _run_in_install(self, cmd, stderr=subprocess.STDOUT, env=None):
-        proc = subprocess.Popen(cmd,
-                                stdout=subprocess.PIPE,
-                                stderr=stderr,
-                                shell=True,
-                                env=env)
-        for line in self._lines_in_handle(proc.stdout):
-            self._write_line(get_unicode(line))
-
-        self._verify_status(cmd, proc)
+        with self._phase('command', command=get_cmdline(cmd)):
+            proc = subprocess.Popen(cmd,
+                                    stdout=subprocess.PIPE,
+                                    stderr=stderr,
+                                    shell=not isinstance(cmd, list),
+                                    env=env)
+            for chunk in self._decoded(self._chunks_in_handle(proc.stdout)):
+                self._write_log(chunk)
+            self._log.flush()
+            self._verify_status(get_cmdline(cmd), proc)
+
+    def _chunks_in_handle(self, handle):
+        return iter_chunks(handle, self.log_chunk_size)
 
     @staticmethod
-    def _lines_in_handle(handle):
-        while True:
-            line = handle.readline()
-            if line in [b'', '']:
-                break
-            yield line
+    def _decoded(chunks):
+        return iter_decoded(chunks)
 
-    def _write_line(self, line):
-        for f in self._files:
-            f.write(line)
+    def _write_log(self, data):
+        self._log.write(data)
 
-    @staticmethod
-    def _verify_status(cmd, proc):
+    def _verify_status(self, cmd, proc):
         proc.communicate()
-        if proc.returncode:
+        self._raise_if_failed(cmd, proc.returncode)
+
+    @staticmethod
+    def _raise_if_failed(cmd, returncode):
+        if returncode:
             raise RunnerInstallationFailed(
                 "Command execution of '{cmd}'"
                 " failed with exit status {returncode}".format(
-                    cmd=cmd, returncode=proc.returncode))
+                    cmd=cmd, returncode=returncode))
 
     @staticmethod
     def __run(cmd, env=None, stdout=None):
@@ -283,23 +470,40 @@ class Runner(object):
     def run(self, *args, **kwargs):
         kwargscopy = kwargs.copy()
         kwargscopy['env'] = self.env
-        return self._run(*args, **kwargscopy)
+        with self._phase('run', command=args[0] if args else None):
+            return self._run(*args, **kwargscopy)
+
+    def stream(self, cmd, lines=False, tee=(), tail_lines=1000):
+        """ Runs the shell command *cmd* in the *virtualenv* and returns
+        :class:`virtualenvrunner.outputstream.OutputStream` iterator of its
+        output. The output is read only as fast as it is consumed, it is
+        written to the log sinks *tee* and the last *tail_lines* lines are
+        kept in the attribute *tail* of the stream.
+        """
+        return OutputStream(cmd, env=self.env, lines=lines, tee=tee,
+                            tail_lines=tail_lines)
 
     def remove_virtualenv(self):
-        """Removes the virtualenv if it exists."""
+        """Removes the virtualenv and its staging directory if they exist."""
         shutil.rmtree(self.virtualenv_dir, ignore_errors=True)
+        if self.staging_dir is not None:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
 
 
 class TmpVenvRunner(Runner):
     """ This virtualenv runner is otherwise the same in functionality than
     :class:`.Runner` but it uses temporaray virtualenv directory. This
     directory is removed in *__exit__*.
+
+    The throwaway *virtualenv* is fastest to produce by cloning it from the
+    already populated one set by :meth:`.Runner.set_template_virtualenv`.
     """
     def __enter__(self):
         self._tmp_virtualenv_dir = None
         return super(TmpVenvRunner, self).__enter__()  # pylint: disable=super-with-arguments
 
     def __exit__(self, *args):
+        self._stop_worker()
         if self._tmp_virtualenv_dir:
             shutil.rmtree(self._tmp_virtualenv_dir)
         super(TmpVenvRunner, self).__exit__(*args)  # pylint: disable=super-with-arguments
@@ -308,10 +512,20 @@ class TmpVenvRunner(Runner):
     def virtualenv_dir(self):
         return self._virtualenv_dir or self.tmp_virtualenv_dir
 
+    @property
+    def lock_path(self):
+        return (super(TmpVenvRunner, self).lock_path  # pylint: disable=super-with-arguments
+                if self._virtualenv_dir else None)
+
+    @property
+    def staging_dir(self):
+        return (super(TmpVenvRunner, self).staging_dir  # pylint: disable=super-with-arguments
+                if self._virtualenv_dir else None)
+
     @property
     def tmp_virtualenv_dir(self):
         if not self._tmp_virtualenv_dir:
-            self._tmp_virtualenv_dir = tempfile.mkdtemp(prefix='venv_')
+            self._tmp_virtualenv_dir = make_tmp_virtualenv_dir()
         return self._tmp_virtualenv_dir
 
 
@@ -321,16 +535,16 @@ class VerboseRunner(Runner):
     *pip freeze*.
     """
 
-    def _write_line(self, line):
-        super(VerboseRunner, self)._write_line(line)  # pylint: disable=super-with-arguments
-        print(line, end='')
+    def __init__(self, *args, **kwargs):
+        super(VerboseRunner, self).__init__(*args, **kwargs)  # pylint: disable=super-with-arguments
+        self.add_log_sink(StdoutSink())
 
 
 class ReadonlyBase(object):
 
     @property
     def virtualenv_is_volatile(self):
-        return self._new_virtualenv
+        return self.new_virtualenv_is_volatile
 
 
 class ReadonlyRunner(ReadonlyBase, Runner):
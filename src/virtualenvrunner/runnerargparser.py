@@ -1,4 +1,5 @@
 import argparse
+from virtualenvrunner.backends import get_backend_names
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
@@ -61,6 +62,47 @@ class RunnerArgParser(object):
             '--save-freeze-path', '-s', dest='save_freeze_path',
             help="Path to 'pip freeze' file",
             default=None)
+        self.parser.add_argument(
+            '--cache-root', dest='cache_root',
+            help=('Path to the shared virtualenv cache. Used if the '
+                  'virtualenv directory is not given. '
+                  'Overrides VIRTUALENV_CACHE_ROOT environmental variable.'),
+            default=None)
+        self.parser.add_argument(
+            '--wheelhouse', dest='wheelhouse',
+            help=('Path to the local wheelhouse. The wheels of the '
+                  'requirements are built or downloaded to the wheelhouse '
+                  'once and installed from it without the index. '
+                  'Overrides VIRTUALENV_WHEELHOUSE environmental variable.'),
+            default=None)
+        self.parser.add_argument(
+            '--timing-file', dest='timing_file',
+            help=('Path to the file to which the timing records of the '
+                  'setup phases are appended as JSON lines. '
+                  'Overrides VIRTUALENV_TIMING_FILE environmental variable.'),
+            default=None)
+        self.parser.add_argument(
+            '--lock-timeout', dest='lock_timeout',
+            help=('Maximum time in seconds to wait for the lock of the '
+                  'virtualenv shared with other processes. By default '
+                  'wait forever. Overrides VIRTUALENV_LOCK_TIMEOUT '
+                  'environmental variable.'),
+            type=float,
+            default=None)
+        self.parser.add_argument(
+            '--prebuild-jobs', dest='prebuild_jobs',
+            help=('Number of the wheels of the requirements built '
+                  'concurrently before the installation. By default the '
+                  'wheels are built by the installation one at a time.'),
+            type=parse_positive_int,
+            default=None)
+        self.parser.add_argument(
+            '--backend', dest='backend',
+            help=('Backend creating the virtualenv: shell runs the '
+                  'virtualenv command, virtualenv creates it in-process '
+                  'and venv runs venv of the interpreter. Default: shell.'),
+            choices=get_backend_names(),
+            default='shell')
 
     def _add_flag_arguments(self):
         self.parser.add_argument(
@@ -74,6 +116,19 @@ class RunnerArgParser(object):
             help=self.recreate_help,
             action='store_true',
             default=False)
+        self.parser.add_argument(
+            '--incremental', dest='incremental',
+            help=('Install only the changed requirements if the '
+                  'requirements file is changed since the previous '
+                  'installation'),
+            action='store_true',
+            default=False)
+        self.parser.add_argument(
+            '--populate-wheelhouse', dest='populate_wheelhouse',
+            help=('Build or download the wheels of the requirements to the '
+                  'wheelhouse even if it is already populated'),
+            action='store_true',
+            default=False)
         self.parser.add_argument(
             '--verbose', '-v', dest='verbose',
             help='Verbose pip install and freeze',
@@ -107,3 +162,103 @@ class ReadonlyArgParser(RunnerArgParser):
     @property
     def recreate_help(self):
         return 'No effect'
+
+
+class MatrixArgParser(RunnerArgParser):
+
+    @property
+    def description(self):
+        return ('Runner for the virtualenvs of several Python versions. '
+                'The virtualenv directory is suffixed with the version.')
+
+    def _add_arguments_with_values(self):
+        super(MatrixArgParser, self)._add_arguments_with_values()  # pylint: disable=super-with-arguments
+        self.parser.add_argument(
+            '--python-versions', '-p', dest='python_versions',
+            help='Comma separated list of Python versions, e.g. 2.7,3.6',
+            type=lambda s: [v for v in s.split(',') if v],
+            required=True)
+        self.parser.add_argument(
+            '--processes', '-j', dest='processes',
+            help=('Maximum number of the virtualenvs set up and run '
+                  'concurrently. By default all.'),
+            type=parse_positive_int,
+            default=None)
+
+
+def parse_positive_int(value):
+    """ Parses the positive integer."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            'invalid positive integer: {!r}'.format(value))
+    return number
+
+
+def parse_size(value):
+    """ Parses the size in bytes with the optional suffix K, M, G or T."""
+    return _parse_with_units(value, {'k': 1024,
+                                     'm': 1024 ** 2,
+                                     'g': 1024 ** 3,
+                                     't': 1024 ** 4})
+
+
+def parse_duration(value):
+    """ Parses the duration in seconds with the optional suffix s, m, h or
+    d.
+    """
+    return _parse_with_units(value, {'s': 1,
+                                     'm': 60,
+                                     'h': 3600,
+                                     'd': 86400})
+
+
+def _parse_with_units(value, units):
+    multiplier = units.get(value[-1:].lower())
+    try:
+        return float(value[:-1] if multiplier else value) * (multiplier or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            'invalid value: {!r}'.format(value))
+
+
+class CleanArgParser(object):
+
+    def __init__(self):
+        self.parser = argparse.ArgumentParser(
+            description=('Removes the least recently used virtualenvs and '
+                         'the orphaned temporary virtualenvs.'))
+        self._add_arguments()
+
+    def _add_arguments(self):
+        self.parser.add_argument(
+            '--root', dest='roots', action='append',
+            help=('Directory containing virtualenvs, e.g. the cache root. '
+                  'May be given several times. By default '
+                  'VIRTUALENV_CACHE_ROOT environmental variable.'),
+            default=None)
+        self.parser.add_argument(
+            '--max-size', dest='max_size',
+            help=('Maximum total size of the virtualenvs in the roots, '
+                  'e.g. 10G'),
+            type=parse_size,
+            default=None)
+        self.parser.add_argument(
+            '--max-age', dest='max_age',
+            help=('Maximum time since the last use of the virtualenv, '
+                  'e.g. 7d'),
+            type=parse_duration,
+            default=None)
+        self.parser.add_argument(
+            '--tmp-dir', dest='tmp_dir',
+            help=('Directory of the temporary virtualenvs. By default '
+                  'the system temporary directory.'),
+            default=None)
+        self.parser.add_argument(
+            '--dry-run', '-n', dest='dry_run',
+            help='Only print the virtualenvs to be removed',
+            action='store_true',
+            default=False)
@@ -0,0 +1,170 @@
+"""
+.. module:: staging
+    :platform: Unix, Windows
+    :synopsis: Locked, staged and lazy setup of the runner virtualenv
+"""
+import os
+import threading
+from contextlib import contextmanager
+from virtualenvrunner.locking import FileLock
+from virtualenvrunner.venvclone import VirtualenvClone
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class StagingBase(object):
+    """ Base of :class:`virtualenvrunner.runner.Runner` for the setup of
+    the *virtualenv*: the *virtualenv* is locked for use by *lock_path*, the
+    modifying setup is serialized by *setup_lock_path*, the new
+    *virtualenv* is built in *staging_dir* and the setup can be deferred to
+    the first access of the *virtualenv*. The host class provides the paths
+    *virtualenv_dir* and *completion_marker*, the properties
+    *virtualenv_exists* and *setup_modifies_virtualenv* and the methods
+    *_setup*, *_activate* and *_phase*.
+    """
+
+    def __init__(self):
+        super(StagingBase, self).__init__()  # pylint: disable=super-with-arguments
+        self._setup_dir = None
+        self._lock_timeout = None
+        self._lock = None
+        self._lazy_setup = False
+        self._setup_pending = False
+        self._setup_lock = threading.RLock()
+
+    def set_lock_timeout(self, lock_timeout):
+        """ Sets the maximum time in seconds to wait for the lock of the
+        *virtualenv*. By default the lock is waited forever.
+        """
+        self._lock_timeout = lock_timeout
+
+    def set_lazy_setup(self, lazy_setup):
+        """ Sets the setup of the *virtualenv* to be deferred from
+        *__enter__* to the first access of :attr:`env`, e.g. by :meth:`run`,
+        :meth:`stream`, :meth:`execute` or :meth:`call`. The setup is then
+        done once so if nothing is run, nothing is created, installed or
+        locked. The setup errors are raised from the first access.
+        """
+        self._lazy_setup = lazy_setup
+
+    @property
+    def setup_pending(self):
+        """ Property *setup_pending* is true if the lazy setup is entered
+        but not yet done.
+        """
+        return self._setup_pending
+
+    def _setup_or_defer(self):
+        if self._lazy_setup:
+            self._setup_pending = True
+        else:
+            self._setup()
+
+    def _setup_if_pending(self):
+        with self._setup_lock:
+            if self._setup_pending:
+                self._setup_pending = False
+                try:
+                    self._setup()
+                except Exception:
+                    self._setup_pending = True
+                    raise
+
+    def _release_setup(self):
+        self._setup_pending = False
+        self._release_lock()
+
+    @property
+    def lock_path(self):
+        return '{}.lock'.format(os.path.abspath(self.virtualenv_dir))
+
+    @property
+    def staging_dir(self):
+        return '{}.staging'.format(os.path.normpath(self.virtualenv_dir))
+
+    @property
+    def setup_dir(self):
+        """ Property *setup_dir* is the directory in which the *virtualenv*
+        is being set up. It differs from *virtualenv_dir* only while the new
+        *virtualenv* is built in *staging_dir*.
+        """
+        return self._setup_dir or self.virtualenv_dir
+
+    @property
+    def setup_lock_path(self):
+        """ Property *setup_lock_path* is the lock file of the exclusive
+        setup mutex next to *lock_path*.
+        """
+        return (None if self.lock_path is None else
+                '{}.setup.lock'.format(os.path.splitext(self.lock_path)[0]))
+
+    def _lock_for_use(self):
+        if self.lock_path is not None:
+            self._lock = FileLock(self.lock_path, timeout=self._lock_timeout)
+            self._lock.acquire(shared=True)
+
+    @contextmanager
+    def _setup_mutex_if_needed(self):
+        """ Holds the setup mutex in the context if the setup modifies the
+        *virtualenv*. The value of the context is true if the mutex is held
+        so the state of the *virtualenv* has to be evaluated again.
+        """
+        if self.setup_lock_path is None or not self.setup_modifies_virtualenv:
+            yield False
+        else:
+            with FileLock(self.setup_lock_path, timeout=self._lock_timeout):
+                yield True
+
+    def _release_lock(self):
+        if self._lock is not None:
+            self._lock.release()
+            self._lock = None
+
+    @contextmanager
+    def _staging_if_needed(self):
+        """ Sets up the *virtualenv* in the context either in place or in
+        *staging_dir*. The value of the context is true if the new
+        *virtualenv* is staged.
+        """
+        if self._start_staging_if_needed():
+            try:
+                yield True
+                self._relocate_staging()
+            finally:
+                self._setup_dir = None
+            self._publish_staging()
+        else:
+            yield False
+
+    def _start_staging_if_needed(self):
+        if self._is_staging_needed() and not self._publish_relocated_staging():
+            self._setup_dir = self.staging_dir
+            return True
+        return False
+
+    def _publish_relocated_staging(self):
+        if os.path.isfile(os.path.join(self.staging_dir,
+                                       os.path.basename(
+                                           self.completion_marker))):
+            self._publish_staging()
+            return True
+        return False
+
+    def _is_staging_needed(self):
+        return (self.staging_dir is not None and
+                not self.virtualenv_exists and
+                (not os.path.isdir(self.virtualenv_dir) or
+                 not os.listdir(self.virtualenv_dir)))
+
+    def _relocate_staging(self):
+        with self._phase('relocate'):
+            VirtualenvClone(self.staging_dir).relocate(self.virtualenv_dir)
+            open(self.completion_marker, 'w').close()
+
+    def _publish_staging(self):
+        with self._phase('publish'):
+            if os.path.isdir(self.virtualenv_dir):
+                os.rmdir(self.virtualenv_dir)
+            os.rename(self.staging_dir, self.virtualenv_dir)
+            self._activate()
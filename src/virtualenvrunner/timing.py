@@ -0,0 +1,87 @@
+"""
+.. module:: timing
+    :platform: Unix, Windows
+    :synopsis: Timing records of the virtualenv setup phases
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class PhaseTimer(object):
+    """ Times the phases and emits a record of each finished phase as a
+    JSON line appended to the file *path* and to the *callback*. The record
+    is a dictionary with the keys *phase*, *start* (seconds since the
+    epoch), *elapsed* (seconds), *status* (*ok* or *error*), *pid* and
+    the fields given to :meth:`phase`.
+
+    An example record is shown below::
+
+        {"elapsed": 12.7, "phase": "install", "pid": 1234,
+         "start": 1617262331.2, "status": "ok",
+         "virtualenv_dir": "/tmp/.venv"}
+    """
+
+    def __init__(self, path=None, callback=None):
+        self.path = path
+        self.callback = callback
+        self._lock = threading.Lock()
+
+    @property
+    def is_enabled(self):
+        return self.path is not None or self.callback is not None
+
+    @contextmanager
+    def phase(self, name, **fields):
+        if not self.is_enabled:
+            yield None
+            return
+        start = time.time()
+        status = 'error'
+        try:
+            yield None
+            status = 'ok'
+        finally:
+            record = {'phase': name,
+                      'start': start,
+                      'elapsed': time.time() - start,
+                      'status': status,
+                      'pid': os.getpid()}
+            record.update(fields)
+            self.emit(record)
+
+    def emit(self, record):
+        if self.path is not None:
+            line = json.dumps(record, sort_keys=True)
+            with self._lock:
+                with open(self.path, 'a') as f:
+                    f.write(line + '\n')
+        if self.callback is not None:
+            self.callback(record)
+
+
+class TimingBase(object):
+    """ Base of :class:`virtualenvrunner.runner.Runner` timing the phases of
+    the *virtualenv* with :class:`.PhaseTimer`.
+    """
+
+    def __init__(self):
+        super(TimingBase, self).__init__()  # pylint: disable=super-with-arguments
+        self._timer = PhaseTimer()
+
+    def set_timing(self, path=None, callback=None):
+        """ Sets the timing records of the setup phases, the installation
+        commands and the runs to be appended as JSON lines to the file
+        *path* and to be given to the *callback*. See
+        :class:`virtualenvrunner.timing.PhaseTimer` for the records.
+        """
+        self._timer = PhaseTimer(path=path, callback=callback)
+
+    def _phase(self, name, **fields):
+        return self._timer.phase(name, virtualenv_dir=self.virtualenv_dir,
+                                 **fields)
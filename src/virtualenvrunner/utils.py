@@ -8,6 +8,10 @@ def is_windows():
     return sys.platform == 'win32'
 
 
+def get_hidden(name):
+    return '{}{}'.format('' if is_windows() else '.', name)
+
+
 def get_exe_suffix():
     return '.exe' if is_windows() else ''
 
@@ -17,3 +21,7 @@ def get_unicode(s):
         return s.decode('utf-8')
     except AttributeError:
         return s
+
+
+def get_cmdline(cmd):
+    return ' '.join(cmd) if isinstance(cmd, list) else cmd
@@ -0,0 +1,56 @@
+"""
+.. module:: venvcache
+    :platform: Unix, Windows
+    :synopsis: Content-addressed cache of virtualenvs
+"""
+import os
+import subprocess
+from virtualenvrunner.requirements import RequirementsFiles
+from virtualenvrunner.utils import get_unicode
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class VirtualenvCache(object):
+    """ Cache of virtualenvs under *cache_root*. The virtualenv directory
+    is identified by the digest of the requirements files contents
+    (including the nested includes), of the interpreter identity, of the
+    index URL and of the update mode.
+    """
+
+    digest_length = 20
+    interpreter_id_script = (
+        'import os, platform, sys; '
+        'print(" ".join([platform.python_implementation(), '
+        'platform.python_version(), sys.platform, platform.machine(), '
+        'os.path.realpath(sys.executable)]))')
+
+    def __init__(self, cache_root):
+        self.cache_root = cache_root
+        self._interpreter_ids = {}
+
+    def get_virtualenv_dir(self, requirements, pythonexe,
+                           pip_index_url=None, update=False):
+        return os.path.join(
+            self.cache_root,
+            self.get_digest(requirements,
+                            pythonexe,
+                            pip_index_url=pip_index_url,
+                            update=update)[:self.digest_length])
+
+    def get_digest(self, requirements, pythonexe,
+                   pip_index_url=None, update=False):
+        extras = [self.get_interpreter_id(pythonexe),
+                  pip_index_url or '',
+                  'update' if update else '']
+        if requirements is None:
+            return RequirementsFiles(os.devnull).digest(*extras)
+        return RequirementsFiles(requirements).digest(*extras)
+
+    def get_interpreter_id(self, pythonexe):
+        if pythonexe not in self._interpreter_ids:
+            self._interpreter_ids[pythonexe] = get_unicode(
+                subprocess.check_output(
+                    [pythonexe, '-c', self.interpreter_id_script])).strip()
+        return self._interpreter_ids[pythonexe]
@@ -0,0 +1,160 @@
+"""
+.. module:: venvclone
+    :platform: Unix, Windows
+    :synopsis: Clone of virtualenv from populated template virtualenv
+"""
+import errno
+import os
+import shutil
+from virtualenvrunner.utils import is_windows
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+FICLONE = 0x40049409
+
+
+class VirtualenvClone(object):
+    """ Materializes a new virtualenv from the populated *template_dir*.
+
+    The files are cloned with copy-on-write reflinks or hardlinks if the
+    file system supports them and otherwise copied. The *link_mode* is one
+    of *auto*, *reflink*, *hardlink* or *copy*. In the *auto* mode the
+    first method which works is used.
+
+    The files which refer to the template path, i.e. the scripts, the
+    *pyvenv.cfg*, the *.pth* and the *.egg-link* files, are rewritten with
+    the path of the new virtualenv. The files in the root of the
+    virtualenv are always copied because they may be modified in place.
+
+    .. note::
+
+        The hardlinked files are shared with the template so the installed
+        files must not be modified in place in the clone.
+    """
+
+    link_modes = ['auto', 'reflink', 'hardlink', 'copy']
+    fixup_suffixes = ('.pth', '.egg-link')
+    scripts_dir = 'Scripts' if is_windows() else 'bin'
+
+    def __init__(self, template_dir, link_mode='auto'):
+        if link_mode not in self.link_modes:
+            raise ValueError('Unknown link mode {!r}'.format(link_mode))
+        self.template_dir = os.path.abspath(template_dir)
+        self._methods = self._get_methods(link_mode)
+
+    def _get_methods(self, link_mode):
+        methods = {'reflink': self._reflink,
+                   'hardlink': os.link,
+                   'copy': shutil.copy2}
+        if link_mode == 'auto':
+            return [methods[m] for m in ['reflink', 'hardlink', 'copy']]
+        return [methods[link_mode]]
+
+    def clone(self, target_dir):
+        target_dir = os.path.abspath(target_dir)
+        for root, dirs, files in os.walk(self.template_dir):
+            target_root = os.path.join(
+                target_dir, os.path.relpath(root, self.template_dir))
+            self._makedirs(target_root)
+            for d in [d for d in dirs if os.path.islink(os.path.join(root,
+                                                                     d))]:
+                dirs.remove(d)
+                files.append(d)
+            for f in files:
+                self._clone_file(os.path.join(root, f),
+                                 os.path.join(target_root, f),
+                                 target_dir)
+
+    def relocate(self, target_dir):
+        """ Rewrites in place the files and the symbolic links of the
+        template which refer to the template path to refer to *target_dir*
+        instead. The template can be then moved to *target_dir*.
+        """
+        target_dir = os.path.abspath(target_dir)
+        for root, dirs, files in os.walk(self.template_dir):
+            for name in dirs + files:
+                path = os.path.join(root, name)
+                if os.path.islink(path):
+                    self._relocate_link(path, target_dir)
+                elif name in files:
+                    self._fixup_file(path, path, target_dir)
+
+    def _relocate_link(self, path, target_dir):
+        link = os.readlink(path)
+        fixed = self._fixup_link(link, target_dir)
+        if fixed != link:
+            os.remove(path)
+            os.symlink(fixed, path)
+
+    @staticmethod
+    def _makedirs(path):
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _clone_file(self, src, dst, target_dir):
+        if os.path.islink(src):
+            os.symlink(self._fixup_link(os.readlink(src), target_dir), dst)
+        elif not self._fixup_file(src, dst, target_dir):
+            if os.path.dirname(src) == self.template_dir:
+                shutil.copy2(src, dst)
+            else:
+                self._link_file(src, dst)
+
+    def _fixup_link(self, link, target_dir):
+        if os.path.isabs(link) and self._is_in_template(link):
+            return target_dir + link[len(self.template_dir):]
+        return link
+
+    def _is_in_template(self, path):
+        return (path == self.template_dir or
+                path.startswith(self.template_dir + os.sep))
+
+    def _fixup_file(self, src, dst, target_dir):
+        if not self._is_fixup_candidate(src):
+            return False
+        with open(src, 'rb') as f:
+            content = f.read()
+        template = self.template_dir.encode('utf-8')
+        if b'\0' in content or template not in content:
+            return False
+        stat = os.stat(src)
+        if os.path.lexists(dst):
+            os.remove(dst)
+        with open(dst, 'wb') as f:
+            f.write(content.replace(template, target_dir.encode('utf-8')))
+        os.chmod(dst, stat.st_mode)
+        os.utime(dst, (stat.st_atime, stat.st_mtime))
+        return True
+
+    def _is_fixup_candidate(self, path):
+        dirname = os.path.dirname(path)
+        return (dirname in [self.template_dir,
+                            os.path.join(self.template_dir,
+                                         self.scripts_dir)] or
+                path.endswith(self.fixup_suffixes))
+
+    def _link_file(self, src, dst):
+        while True:
+            try:
+                return self._methods[0](src, dst)
+            except (IOError, OSError) as e:
+                if len(self._methods) == 1 or e.errno == errno.ENOENT:
+                    raise
+                self._methods.pop(0)
+                if os.path.lexists(dst):
+                    os.remove(dst)
+
+    @staticmethod
+    def _reflink(src, dst):
+        if fcntl is None:
+            raise OSError(errno.EOPNOTSUPP, 'Reflinks are not supported')
+        with open(src, 'rb') as s:
+            with open(dst, 'wb') as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        shutil.copystat(src, dst)
@@ -0,0 +1,227 @@
+"""
+.. module:: venvpool
+    :platform: Unix, Windows
+    :synopsis: Pool of pre-built temporary virtualenvs
+"""
+import shutil
+import threading
+import time
+from virtualenvrunner.cachemanager import make_tmp_virtualenv_dir
+from virtualenvrunner.runner import Runner
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class VirtualenvPool(object):
+    """ Pool of *size* pre-built temporary virtualenvs. The virtualenvs are
+    built in the background thread with the *runner_factory* which is
+    called with the virtualenv directory and which returns the
+    :class:`virtualenvrunner.runner.Runner` context manager for building
+    it. By default the factory is a :class:`virtualenvrunner.runner.Runner`
+    with *runner_kwargs* building the virtualenv in place without locking.
+
+    The built virtualenv is handed out by :meth:`acquire` and it is removed
+    and replaced in the background after :meth:`release`. The virtualenvs
+    older than *max_age* seconds are not handed out but rebuilt.
+
+    An example usage is shown below:
+
+    >>> from virtualenvrunner.venvpool import (
+    ...     VirtualenvPool, PooledTmpVenvRunner)
+    >>> with VirtualenvPool(size=2, virtualenv_reqs='requirements.txt') as p:
+    ...     with PooledTmpVenvRunner(p) as runner:
+    ...         runner.run('crl -h')
+    ...
+    """
+
+    def __init__(self, size=1, max_age=None, runner_factory=None,
+                 **runner_kwargs):
+        self.size = size
+        self.max_age = max_age
+        self._runner_factory = runner_factory or (
+            lambda d: _PoolBuildRunner(virtualenv_dir=d, **runner_kwargs))
+        self._cond = threading.Condition()
+        self._ready = []
+        self._to_remove = []
+        self._error = None
+        self._closed = False
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._build_loop)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def close(self):
+        """ Stops the background building and removes the virtualenvs which
+        are not in use.
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        for virtualenv_dir in self._to_remove + [d for d, _ in self._ready]:
+            self._remove(virtualenv_dir)
+        self._ready, self._to_remove = [], []
+
+    def acquire(self, timeout=None):
+        """ Returns the directory of a ready virtualenv. Waits at most
+        *timeout* seconds for the virtualenv to be built. Raises the
+        exception of the failed build if no virtualenv is ready.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                self._discard_expired()
+                if self._ready:
+                    self._cond.notify_all()
+                    return self._ready.pop(0)[0]
+                self._raise_error_if_any()
+                self._wait_until(deadline)
+
+    def release(self, virtualenv_dir):
+        """ Returns the used virtualenv to be removed and replaced."""
+        with self._cond:
+            self._to_remove.append(virtualenv_dir)
+            self._cond.notify_all()
+
+    def _raise_error_if_any(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            self._cond.notify_all()
+            raise error  # pylint: disable=raising-bad-type
+        if self._closed:
+            raise RuntimeError('Virtualenv pool is closed')
+
+    def _wait_until(self, deadline):
+        if deadline is None:
+            self._cond.wait()
+            return
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise RuntimeError('No virtualenv available in the pool')
+        self._cond.wait(remaining)
+
+    def _discard_expired(self):
+        if self.max_age is None:
+            return
+        now = time.time()
+        expired = [r for r in self._ready if now - r[1] > self.max_age]
+        if expired:
+            self._ready = [r for r in self._ready if r not in expired]
+            self._to_remove.extend(d for d, _ in expired)
+            self._cond.notify_all()
+
+    def _build_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and not self._has_work():
+                    self._cond.wait(self._next_expiry())
+                    self._discard_expired()
+                if self._closed:
+                    return
+                to_remove, self._to_remove = self._to_remove, []
+                build = self._needs_build()
+            for virtualenv_dir in to_remove:
+                self._remove(virtualenv_dir)
+            if build:
+                self._build_one()
+
+    def _has_work(self):
+        return self._to_remove or self._needs_build()
+
+    def _needs_build(self):
+        return self._error is None and len(self._ready) < self.size
+
+    def _next_expiry(self):
+        if self.max_age is None or not self._ready:
+            return None
+        return max(0, min(c for _, c in self._ready) + self.max_age -
+                   time.time())
+
+    def _build_one(self):
+        virtualenv_dir = make_tmp_virtualenv_dir()
+        try:
+            with self._runner_factory(virtualenv_dir):
+                pass
+        except Exception as e:  # pylint: disable=broad-except
+            self._remove(virtualenv_dir)
+            with self._cond:
+                self._error = e
+                self._cond.notify_all()
+            return
+        with self._cond:
+            self._ready.append((virtualenv_dir, time.time()))
+            self._cond.notify_all()
+
+    @staticmethod
+    def _remove(virtualenv_dir):
+        shutil.rmtree(virtualenv_dir, ignore_errors=True)
+
+
+class _PoolBuildRunner(Runner):
+    """ Builds the virtualenv in place without locking because the pool
+    virtualenvs are private until they are handed out.
+    """
+
+    @property
+    def lock_path(self):
+        return None
+
+    @property
+    def staging_dir(self):
+        return None
+
+
+class PooledTmpVenvRunner(Runner):
+    """ This virtualenv runner is otherwise the same in functionality than
+    :class:`virtualenvrunner.runner.TmpVenvRunner` but the temporary
+    virtualenv is taken from the :class:`.VirtualenvPool` *pool* in
+    *__enter__* and returned to it in *__exit__*. The requirements are
+    installed by the pool.
+    """
+
+    def __init__(self, pool, run=None, timeout=None):
+        super(PooledTmpVenvRunner, self).__init__(run=run)  # pylint: disable=super-with-arguments
+        self._pool = pool
+        self._timeout = timeout
+        self._pooled_virtualenv_dir = None
+
+    def __enter__(self):
+        self._pooled_virtualenv_dir = self._pool.acquire(self._timeout)
+        try:
+            return super(PooledTmpVenvRunner, self).__enter__()  # pylint: disable=super-with-arguments
+        except Exception:
+            self._release()
+            raise
+
+    def __exit__(self, *args):
+        try:
+            super(PooledTmpVenvRunner, self).__exit__(*args)  # pylint: disable=super-with-arguments
+        finally:
+            self._release()
+
+    def _release(self):
+        self._pool.release(self._pooled_virtualenv_dir)
+        self._pooled_virtualenv_dir = None
+
+    @property
+    def virtualenv_dir(self):
+        return self._pooled_virtualenv_dir
+
+    @property
+    def lock_path(self):
+        return None
+
+    @property
+    def staging_dir(self):
+        return None
@@ -0,0 +1,58 @@
+"""
+.. module:: wheelhouse
+    :platform: Unix, Windows
+    :synopsis: Local wheelhouse for offline installations
+"""
+import os
+from virtualenvrunner.locking import FileLock
+from virtualenvrunner.requirements import RequirementsFiles
+from virtualenvrunner.utils import get_hidden
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class Wheelhouse(object):
+    """ Directory *path* of the wheels of the requirements. The wheels are
+    built or downloaded to the wheelhouse once per requirements files and
+    index URL with :meth:`wheel_cmd` and the requirements are installed
+    from the wheelhouse without the index with :attr:`install_options`.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def lock(self):
+        """ Exclusive :class:`virtualenvrunner.locking.FileLock` for
+        populating the wheelhouse.
+        """
+        return FileLock(os.path.join(self.path, get_hidden('lock')))
+
+    @property
+    def install_options(self):
+        return '--no-index --find-links {}'.format(self.path)
+
+    def wheel_cmd(self, requirements, pip_index_url=None):
+        return ('pip wheel -r {requirements} -w {path} --find-links {path}'
+                '{index_arg}'.format(
+                    requirements=requirements,
+                    path=self.path,
+                    index_arg=(' -i {}'.format(pip_index_url)
+                               if pip_index_url else '')))
+
+    def is_populated(self, requirements, pip_index_url=None):
+        stamp = self._get_stamp(requirements, pip_index_url)
+        return stamp is not None and os.path.isfile(stamp)
+
+    def mark_populated(self, requirements, pip_index_url=None):
+        stamp = self._get_stamp(requirements, pip_index_url)
+        if stamp is not None:
+            open(stamp, 'w').close()
+
+    def _get_stamp(self, requirements, pip_index_url):
+        if not os.path.isfile(requirements):
+            return None
+        digest = RequirementsFiles(requirements).digest(pip_index_url or '')
+        return os.path.join(self.path, get_hidden(
+            'virtualenvrunner_populated_{}'.format(digest)))
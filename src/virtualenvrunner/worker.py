@@ -0,0 +1,229 @@
+"""
+.. module:: worker
+    :platform: Unix, Windows
+    :synopsis: Long-lived Python worker process in virtualenv
+"""
+import os
+import pickle
+import subprocess
+import threading
+from virtualenvrunner import _workerserver
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class WorkerError(Exception):
+    """ Raised when the request fails in the worker. The exception carries
+    the name of the original exception type in *remote_type* and the
+    formatted traceback in *remote_traceback*.
+    """
+
+    def __init__(self, message, remote_type=None, remote_traceback=None,
+                 pickled_exception=None):
+        super(WorkerError, self).__init__(message)  # pylint: disable=super-with-arguments
+        self.remote_type = remote_type
+        self.remote_traceback = remote_traceback
+        self.pickled_exception = pickled_exception
+
+
+class WorkerCrashed(Exception):
+    """ Raised when the worker process dies while serving the request. The
+    next request starts a new worker process.
+    """
+
+
+class Worker(object):
+    """ Long-lived process of the Python interpreter *pythonexe* serving the
+    requests over a pipe. The process is started on the first request with
+    the environment *env* and it is restarted after a crash and after
+    *max_requests* requests if *max_requests* is given.
+
+    The output of the executed code is written to the standard error of the
+    worker process, which is inherited from the caller.
+
+    >>> with Worker('.venv/bin/python') as worker:
+    ...     worker.execute('import crl.devutils')
+    ...     worker.call(os.getpid)
+    """
+
+    def __init__(self, pythonexe, env=None, max_requests=None):
+        self.pythonexe = pythonexe
+        self.env = env
+        self.max_requests = max_requests
+        self._proc = None
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def pid(self):
+        return None if self._proc is None else self._proc.pid
+
+    @property
+    def is_alive(self):
+        return self._proc is not None and self._proc.poll() is None
+
+    def execute(self, source):
+        """ Executes the Python *source* in the worker in the fresh namespace
+        of *__main__*. The exceptions, including the *SystemExit* with the
+        non-zero code, are raised as :class:`.WorkerError`.
+        """
+        return self._request('execute', source)
+
+    def call(self, func, *args, **kwargs):
+        """ Calls *func* with the arguments in the worker and returns the
+        result. The function, the arguments and the result are pickled so
+        the function has to be importable in the worker.
+
+        The exception raised by *func* is re-raised if it can be unpickled
+        in the caller. The formatted traceback of the worker is then in the
+        attribute *remote_traceback* of the exception. Otherwise
+        :class:`.WorkerError` is raised.
+        """
+        try:
+            return self._request('call', func, args, kwargs)
+        except WorkerError as e:
+            raise self._get_remote_exception(e)
+
+    def start(self):
+        with self._lock:
+            self._start_if_needed()
+
+    def stop(self):
+        with self._lock:
+            self._stop()
+
+    def _request(self, *request):
+        data = pickle.dumps(request, _workerserver.PROTOCOL)
+        with self._lock:
+            self._start_if_needed()
+            try:
+                _workerserver.write_data(self._proc.stdin, data)
+                status, value = _workerserver.read_message(self._proc.stdout)
+            except (EOFError, IOError, OSError):
+                pid = self._proc.pid
+                raise WorkerCrashed(
+                    'Worker process {pid} exited with status {status}'.format(
+                        pid=pid, status=self._kill()))
+            self._requests += 1
+            if self.max_requests and self._requests >= self.max_requests:
+                self._stop()
+        if status == 'error':
+            raise self._create_error(value)
+        return value
+
+    @staticmethod
+    def _create_error(error):
+        return WorkerError('{type}: {message}'.format(**error),
+                           remote_type=error['type'],
+                           remote_traceback=error['traceback'],
+                           pickled_exception=error['exception'])
+
+    @staticmethod
+    def _get_remote_exception(error):
+        if error.pickled_exception is None:
+            return error
+        try:
+            e = pickle.loads(error.pickled_exception)
+            e.remote_traceback = error.remote_traceback
+        except Exception:  # pylint: disable=broad-except
+            return error
+        return e
+
+    def _start_if_needed(self):
+        if self.is_alive:
+            return
+        self._proc = subprocess.Popen(
+            [self.pythonexe, self._get_server_script()],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=self.env)
+        self._requests = 0
+
+    @staticmethod
+    def _get_server_script():
+        return '{}.py'.format(
+            os.path.splitext(os.path.abspath(_workerserver.__file__))[0])
+
+    def _stop(self):
+        if self._proc is not None:
+            proc, self._proc = self._proc, None
+            self._close(proc.stdin)
+            proc.wait()
+            self._close(proc.stdout)
+
+    def _kill(self):
+        proc, self._proc = self._proc, None
+        if proc.poll() is None:
+            proc.kill()
+        self._close(proc.stdin)
+        self._close(proc.stdout)
+        return proc.wait()
+
+    @staticmethod
+    def _close(f):
+        try:
+            f.close()
+        except (IOError, OSError):
+            pass
+
+
+class ExecutionBase(object):
+    """ Base of :class:`virtualenvrunner.runner.Runner` executing the Python
+    code and the callables in the :class:`.Worker` of the *virtualenv*
+    interpreter.
+    """
+
+    def __init__(self):
+        super(ExecutionBase, self).__init__()  # pylint: disable=super-with-arguments
+        self._worker = None
+        self._worker_max_requests = None
+
+    def set_worker_max_requests(self, max_requests):
+        """ Sets the number of requests after which the worker process of
+        :meth:`execute` is restarted. By default the worker is kept alive
+        until *__exit__*.
+        """
+        self._worker_max_requests = max_requests
+        if self._worker is not None:
+            self._worker.max_requests = max_requests
+
+    @property
+    def worker(self):
+        """ The :class:`virtualenvrunner.worker.Worker` of the *virtualenv*
+        interpreter. The worker process is started on the first request and
+        stopped in *__exit__*.
+        """
+        if self._worker is None:
+            self._worker = Worker(self.virtualenv_python,
+                                  env=self.env,
+                                  max_requests=self._worker_max_requests)
+        return self._worker
+
+    def _stop_worker(self):
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+
+    def execute(self, source):
+        """ Executes the Python *source* in the long-lived worker process of
+        the *virtualenv* interpreter without starting a new interpreter per
+        call. See :meth:`virtualenvrunner.worker.Worker.execute`.
+        """
+        with self._phase('execute'):
+            return self.worker.execute(source)
+
+    def call(self, func, *args, **kwargs):
+        """ Calls the picklable *func* with the arguments in the worker
+        process of the *virtualenv* interpreter and returns the result or
+        raises the exception of the call. See
+        :meth:`virtualenvrunner.worker.Worker.call`.
+        """
+        with self._phase('call'):
+            return self.worker.call(func, *args, **kwargs)
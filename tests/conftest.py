@@ -6,7 +6,12 @@ import sys
 from collections import namedtuple
 import mock
 import pytest
-from virtualenvrunner.utils import get_unicode
+from virtualenvrunner.interpreters import (
+    Interpreter,
+    InterpreterRegistry,
+    set_registry)
+from virtualenvrunner.python_versions import get_python_versions
+from virtualenvrunner.utils import get_cmdline, get_unicode
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
@@ -141,8 +146,8 @@ class PopenSideeffectBase(object):
     def side_effect(self, *args, **kwargs):
         popen = self._popen_factory(*args, **kwargs)
         popen.set_returncode(self.returncode)
-        self._pip_install_sideeffect(popen.ioouts, args[0])
-        self._pip_freeze_sideeffect(popen.ioouts, args[0])
+        self._pip_install_sideeffect(popen.ioouts, get_cmdline(args[0]))
+        self._pip_freeze_sideeffect(popen.ioouts, get_cmdline(args[0]))
         return popen
 
     def _pip_install_sideeffect(self, ioouts, *args):
@@ -160,11 +165,12 @@ class PopenSideeffectBase(object):
 
 class RealVirtualenvPopen(PopenSideeffectBase):
     def side_effect(self, *args, **kwargs):
-        if args[0].startswith('virtualenv'):
+        cmd = get_cmdline(args[0])
+        if cmd.startswith('virtualenv') or ' -m venv ' in cmd:
             shutil.copytree(
                 os.path.join(os.path.dirname(__file__),
                              self.mock_virtualenv_dirname),
-                args[0].split()[-1])
+                cmd.split()[-1])
         return super(RealVirtualenvPopen, self).side_effect(*args, **kwargs)  # pylint: disable=super-with-arguments
 
 
@@ -173,7 +179,11 @@ class MockVirtualenvPopen(PopenSideeffectBase):
 
 
 class PatcherMock(namedtuple('PatchMock', ['patch', 'mock'])):
-    pass
+
+    @property
+    def pip_commands(self):
+        return [args[0] for _, args, _ in self.patch.mock_calls
+                if args and args[0].startswith('pip')]
 
 
 @pytest.fixture
@@ -250,3 +260,52 @@ def mock_subprocess_popen_fail(patchermock_real):
 def mock_subprocess_check_call():
     with mock.patch('subprocess.check_call') as p:
         yield p
+
+
+class FakeInterpreterRegistry(InterpreterRegistry):
+    """ Registry of the interpreter names of the Python versions which
+    resolves the names to themselves without scanning the host.
+    """
+
+    def _load(self):
+        interpreters = []
+        for v in [None] + list(get_python_versions()):
+            version = '3.7.0' if v is None else '{}.{}.0'.format(
+                v.major, v.minor or '7')
+            for suffix in ['', '.exe']:
+                interpreters.append(Interpreter(
+                    path='python{}{}'.format('' if v is None else v, suffix),
+                    version=version,
+                    abi='',
+                    mtime=None))
+        return interpreters
+
+
+@pytest.fixture
+def cache_requirements(tmpdir):
+    with tmpdir.as_cwd():
+        with open('requirements.txt', 'w') as f:
+            f.write('reqspec1\n')
+        yield tmpdir
+
+
+@pytest.fixture
+def mock_interpreter_id():
+    with mock.patch(
+            'virtualenvrunner.venvcache.VirtualenvCache.get_interpreter_id',
+            return_value='CPython 3.7.0 linux x86_64 /usr/bin/python3.7') as p:
+        yield p
+
+
+@pytest.fixture(autouse=True)
+def interpreter_registry():
+    registry = FakeInterpreterRegistry(path=os.devnull, search_dirs=[])
+    set_registry(registry)
+    try:
+        yield registry
+    finally:
+        set_registry(None)
+
+
+collect_ignore = (['test_asyncrunner.py']
+                  if sys.version_info < (3, 6) else [])
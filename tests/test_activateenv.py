@@ -5,7 +5,7 @@ import mock
 import pytest
 from fixtureresources.fixtures import create_patch
 from fixtureresources.mockfile import MockFile
-from virtualenvrunner.activateenv import ActivateEnv
+from virtualenvrunner.activateenv import ActivateEnv, VirtualenvLayout
 from virtualenvrunner.runner import Runner
 
 
@@ -71,7 +71,7 @@ def mock_multiprocessing_process(request):
     """
 
     return create_patch(
-        mock.patch('virtualenvrunner.activateenv.Process', new=MockProcess),
+        mock.patch('multiprocessing.Process', new=MockProcess),
         request)
 
 
@@ -90,7 +90,7 @@ class MockQueue(object):
 @pytest.fixture(scope='function')
 def mock_multiprocessing_queue(request):
     return create_patch(
-        mock.patch('virtualenvrunner.activateenv.Queue', new=MockQueue),
+        mock.patch('multiprocessing.Queue', new=MockQueue),
         request)
 
 
@@ -112,3 +112,90 @@ def test_ativateenv_raises_ioerror(mock_activatethis_enoent,
     with pytest.raises(IOError) as err:
         ActivateEnv(activate_this='activate_this.py').env
     assert err.value.args[0] == 'message'
+
+
+VIRTUALENV_ACTIVATE_THIS = (
+    'import os\n'
+    'bin_dir = os.path.dirname(os.path.abspath(__file__))\n'
+    'base = os.path.dirname(bin_dir)\n'
+    'os.environ["PATH"] = os.pathsep.join(\n'
+    '    [bin_dir] + os.environ.get("PATH", "").split(os.pathsep))\n'
+    'os.environ["VIRTUAL_ENV"] = base\n'
+    'os.environ["VIRTUAL_ENV_PROMPT"] = "" or os.path.basename(base)\n'
+    'pkg_config_path = os.path.join(base, "lib", "pkgconfig")\n'
+    'if os.environ.get("PKG_CONFIG_PATH", ""):\n'
+    '    os.environ["PKG_CONFIG_PATH"] = os.pathsep.join(\n'
+    '        [pkg_config_path, os.environ["PKG_CONFIG_PATH"]])\n'
+    'else:\n'
+    '    os.environ["PKG_CONFIG_PATH"] = pkg_config_path\n')
+
+
+@pytest.fixture
+def virtualenv_layout(tmpdir, monkeypatch):
+    for variable in VirtualenvLayout.known_variables:
+        monkeypatch.setenv(variable, 'original')
+    venv = tmpdir.join('venv')
+    venv.join('bin', 'activate_this.py').write(VIRTUALENV_ACTIVATE_THIS,
+                                                ensure=True)
+    venv.join('pyvenv.cfg').write('home = /usr/bin\n'
+                                  'virtualenv = 20.0.0\n')
+    return venv
+
+
+def get_activate_this(venv):
+    return str(venv.join('bin', 'activate_this.py'))
+
+
+def test_layout_env_equals_process_env(virtualenv_layout,
+                                       mock_multiprocessing_process,
+                                       mock_multiprocessing_queue):
+    activateenv = ActivateEnv(get_activate_this(virtualenv_layout))
+    layout_env = activateenv._get_env_via_layout()  # pylint: disable=protected-access
+    assert layout_env['VIRTUAL_ENV'] == str(virtualenv_layout)
+    assert layout_env == activateenv._get_env_via_process()  # pylint: disable=protected-access
+
+
+def test_layout_env_without_process(virtualenv_layout):
+    with mock.patch('multiprocessing.Process') as p:
+        env = ActivateEnv(get_activate_this(virtualenv_layout)).env
+
+    assert not p.called
+    assert env['PATH'].startswith(str(virtualenv_layout.join('bin')))
+
+
+def test_layout_env_with_prompt(virtualenv_layout):
+    virtualenv_layout.join('pyvenv.cfg').write('prompt = name\n', mode='a')
+    assert ActivateEnv(get_activate_this(virtualenv_layout)).env[
+        'VIRTUAL_ENV_PROMPT'] == 'name'
+
+
+def test_layout_env_venv_without_activate_this(virtualenv_layout):
+    virtualenv_layout.join('bin', 'activate_this.py').remove()
+    virtualenv_layout.join('pyvenv.cfg').write('home = /usr/bin\n')
+    env = ActivateEnv(get_activate_this(virtualenv_layout)).env
+    assert env['VIRTUAL_ENV'] == str(virtualenv_layout)
+    assert env['VIRTUAL_ENV_PROMPT'] == 'original'
+
+
+@pytest.mark.parametrize('cfg, activate_this', [
+    ('home = /usr/bin\n', VIRTUALENV_ACTIVATE_THIS),
+    ('virtualenv = 20.0.0\n',
+     VIRTUALENV_ACTIVATE_THIS + 'os.environ["name"] = "value"\n')])
+def test_layout_non_standard_falls_back_to_process(virtualenv_layout,
+                                                   cfg,
+                                                   activate_this):
+    virtualenv_layout.join('pyvenv.cfg').write(cfg)
+    virtualenv_layout.join('bin', 'activate_this.py').write(activate_this)
+    with mock.patch.object(ActivateEnv, '_get_env_via_process',
+                           return_value={'name': 'value'}):
+        assert ActivateEnv(
+            get_activate_this(virtualenv_layout)).env == {'name': 'value'}
+
+
+def test_env_from_cache(virtualenv_layout):
+    activate_this = get_activate_this(virtualenv_layout)
+    env = ActivateEnv(activate_this).env
+    with mock.patch.object(ActivateEnv, '_derive_env') as derive_env:
+        assert ActivateEnv(activate_this).env == env
+
+    assert not derive_env.called
@@ -0,0 +1,334 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import mock
+import pytest
+from virtualenvrunner.asyncrunner import AsyncRunner, AsyncOutputStream
+from virtualenvrunner.cachemanager import mark_used
+from virtualenvrunner.distributions import Distributions
+from virtualenvrunner.fingerprint import RequirementsFingerprint
+from virtualenvrunner.runner import Runner, RunnerInstallationFailed
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'),
+                                reason='POSIX shell scripts')
+
+
+FAKE_VIRTUALENV = '''\
+import os, shutil, sys
+shutil.copytree({mockvenv!r}, sys.argv[-1])
+pip = os.path.join(sys.argv[-1], 'bin', 'pip')
+with open(pip, 'w') as f:
+    f.write('#!/bin/sh\\necho "pip $@ out"\\necho "pip err" >&2\\n')
+os.chmod(pip, 0o755)
+os.symlink(sys.executable, os.path.join(sys.argv[-1], 'bin', 'python'))
+'''
+
+
+class FakeVirtualenvAsyncRunner(AsyncRunner):
+    virtualenv_exe = '{python} fakevirtualenv.py'.format(
+        python=sys.executable)
+
+
+@pytest.fixture
+def fake_virtualenv(tmpdir):
+    with tmpdir.as_cwd():
+        with open('fakevirtualenv.py', 'w') as f:
+            f.write(FAKE_VIRTUALENV.format(mockvenv=os.path.join(
+                os.path.dirname(__file__), 'mockvenv')))
+        yield tmpdir
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+async def collect(aiterator):
+    return [line async for line in aiterator]
+
+
+async def setup_and_run(runner, cmd):
+    async with runner:
+        return await runner.run(cmd)
+
+
+def test_async_runner_install_log(fake_virtualenv):
+    runner = FakeVirtualenvAsyncRunner(virtualenv_reqs='requirements.txt')
+
+    async def main():
+        log = asyncio.ensure_future(collect(runner.install_log()))
+        await setup_and_run(runner, 'true')
+        return await log
+
+    lines = run(main())
+    assert 'pip install -r requirements.txt out\n' in lines
+    assert 'pip freeze out\n' in lines
+    with open(runner.requirements_log_file) as f:
+        assert f.read() == (
+            'pip install -r requirements.txt out\n'
+            'pip err\n\n'
+            '####################\n'
+            'pip freeze:\n'
+            'pip freeze out\n'
+            'pip err\n'
+            '####################\n')
+
+
+def test_async_runner_prebuild(fake_virtualenv):
+    with open('requirements.txt', 'w') as f:
+        f.write('six\n')
+    runner = FakeVirtualenvAsyncRunner(virtualenv_reqs='requirements.txt')
+    runner.set_prebuild_jobs(2)
+    run(setup_and_run(runner, 'true'))
+
+    with open(runner.requirements_log_file) as f:
+        lines = f.read().splitlines()
+    assert lines[0].startswith('pip wheel --no-deps -r ')
+    assert lines[1] == 'pip err'
+    assert lines[2].startswith(
+        'pip install -r requirements.txt --find-links ')
+    assert os.path.isdir(runner.prebuild_wheel_dir)
+
+
+def test_async_runner_in_process_backend(fake_virtualenv):
+    def create(pythonexe, virtualenv_dir, write):
+        subprocess.check_call([sys.executable, 'fakevirtualenv.py',
+                               virtualenv_dir])
+        write('created {}\n'.format(pythonexe))
+
+    runner = AsyncRunner()
+    runner.set_virtualenv_backend('virtualenv')
+
+    async def main():
+        log = asyncio.ensure_future(collect(runner.install_log()))
+        await setup_and_run(runner, 'true')
+        return await log
+
+    with mock.patch('virtualenvrunner.backends.VirtualenvBackend.create',
+                    side_effect=create):
+        assert run(main()) == ['created python\n']
+
+
+def test_async_runner_backend_without_shell(fake_virtualenv):
+    runner = AsyncRunner()
+    runner.set_virtualenv_backend('venv')
+    with mock.patch('virtualenvrunner.backends.VenvBackend.cmd',
+                    side_effect=lambda pythonexe, virtualenv_dir: [
+                        sys.executable, 'fakevirtualenv.py', virtualenv_dir]):
+        assert run(setup_and_run(runner, 'true')) == 0
+
+    assert runner.virtualenv_exists
+
+
+def test_async_runner_run_env(fake_virtualenv):
+    runner = FakeVirtualenvAsyncRunner()
+    assert run(setup_and_run(runner, 'which pip > out')) == 0
+    with open('out') as f:
+        assert f.read().strip() == os.path.join(runner.virtualenv_dir,
+                                                'bin', 'pip')
+
+
+def test_async_runner_run_fails(fake_virtualenv):
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        run(setup_and_run(FakeVirtualenvAsyncRunner(), 'exit 3'))
+
+    assert excinfo.value.returncode == 3
+
+
+def test_async_runner_install_fails(tmpdir):
+    with tmpdir.as_cwd():
+        runner = AsyncRunner(
+            virtualenv_pythonexe=os.path.join('bin', 'nonexistent_python'))
+        runner.virtualenv_exe = 'false'
+        with pytest.raises(RunnerInstallationFailed):
+            run(setup_and_run(runner, 'true'))
+
+
+def test_async_runner_install_log_long_line(fake_virtualenv):
+    runner = FakeVirtualenvAsyncRunner()
+    runner.virtualenv_exe = (
+        '{python} -c "print(200000 * \'x\')"; {virtualenv_exe}'.format(
+            python=sys.executable, virtualenv_exe=runner.virtualenv_exe))
+
+    async def main():
+        log = asyncio.ensure_future(collect(runner.install_log()))
+        await setup_and_run(runner, 'true')
+        return await log
+
+    assert run(main()) == [200000 * 'x' + '\n']
+
+
+def test_async_runner_install_killed_if_cancelled(fake_virtualenv):
+    # pylint: disable=protected-access
+    runner = FakeVirtualenvAsyncRunner()
+
+    async def main():
+        task = asyncio.ensure_future(
+            runner._async_run_in_install('echo $$ > pid; exec sleep 10'))
+        while not os.path.isfile('pid') or not os.path.getsize('pid'):
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    run(main())
+
+    with open('pid') as f:
+        pid = int(f.read())
+    with pytest.raises(OSError):
+        os.kill(pid, 0)
+
+
+def slow(func, delay=0.3):
+    def slow_func(*args, **kwargs):
+        time.sleep(delay)
+        return func(*args, **kwargs)
+
+    return slow_func
+
+
+def test_async_setup_does_not_block_loop(fake_virtualenv):
+    # pylint: disable=protected-access
+    runner = FakeVirtualenvAsyncRunner(virtualenv_reqs='requirements.txt')
+    heartbeats = []
+
+    async def heartbeat():
+        while True:
+            heartbeats.append(time.time())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        task = asyncio.ensure_future(heartbeat())
+        await setup_and_run(runner, 'true')
+        task.cancel()
+
+    with mock.patch.object(Distributions, 'freeze',
+                           slow(Distributions.freeze)), \
+            mock.patch.object(RequirementsFingerprint, 'is_up_to_date',
+                              slow(RequirementsFingerprint.is_up_to_date)), \
+            mock.patch.object(Runner, '_relocate_staging',
+                              slow(Runner._relocate_staging)), \
+            mock.patch('virtualenvrunner.runner.mark_used',
+                       slow(mark_used)):
+        run(main())
+
+    assert max(b - a for a, b in zip(heartbeats, heartbeats[1:])) < 0.2
+
+
+def test_async_runners_concurrently(fake_virtualenv):
+    runners = [FakeVirtualenvAsyncRunner(
+        virtualenv_dir='venv{}'.format(i),
+        virtualenv_reqs='requirements.txt') for i in range(5)]
+
+    async def main():
+        return await asyncio.gather(*[setup_and_run(r, 'true')
+                                      for r in runners])
+
+    assert run(main()) == 5 * [0]
+    for runner in runners:
+        assert os.path.isfile(runner.requirements_log_file)
+
+
+def test_async_runner_custom_run(fake_virtualenv):
+    calls = []
+
+    async def custom_run(cmd, env=None):
+        calls.append((cmd, env['PATH']))
+        return 'return_value'
+
+    runner = FakeVirtualenvAsyncRunner(run=custom_run)
+    assert run(setup_and_run(runner, 'cmd')) == 'return_value'
+    assert calls[0][0] == 'cmd'
+    assert calls[0][1].startswith(os.path.join(runner.virtualenv_dir, 'bin'))
+
+
+def test_async_execute_in_worker(fake_virtualenv, capfd):
+    runner = FakeVirtualenvAsyncRunner()
+
+    async def main():
+        async with runner:
+            await runner.execute('print("executed")')
+            assert await runner.call(os.getpid) == runner.worker.pid
+            return runner.worker
+
+    worker = run(main())
+
+    assert not worker.is_alive
+    assert 'executed' in capfd.readouterr().err
+
+
+def test_async_stream(fake_virtualenv):
+    runner = FakeVirtualenvAsyncRunner()
+
+    async def main():
+        async with runner:
+            stream = runner.stream('echo $PATH; printf "a\\nb"', lines=True)
+            return [line async for line in stream]
+
+    lines = run(main())
+
+    assert lines[0].startswith(os.path.join(runner.virtualenv_dir, 'bin'))
+    assert lines[1:] == ['a\n', 'b']
+
+
+def test_async_stream_failure_raises_with_tail():
+    async def main():
+        stream = AsyncOutputStream('echo out; exit 2')
+        with pytest.raises(subprocess.CalledProcessError) as excinfo:
+            async for _ in stream:
+                pass
+        return excinfo.value
+
+    error = run(main())
+
+    assert error.returncode == 2
+    assert error.output == 'out\n'
+
+
+@pytest.mark.parametrize('cmd', ['yes', 'yes; true'])
+def test_async_stream_closed_kills_command(cmd):
+    async def main():
+        async with AsyncOutputStream(cmd, lines=True) as stream:
+            line = await stream.__anext__()
+        return line, stream.returncode
+
+    line, returncode = run(main())
+
+    assert line == 'y\n'
+    assert returncode is not None
+
+
+def test_async_lazy_setup_without_run(fake_virtualenv):
+    runner = FakeVirtualenvAsyncRunner()
+    runner.set_lazy_setup(True)
+
+    async def main():
+        log = asyncio.ensure_future(collect(runner.install_log()))
+        async with runner:
+            pass
+        return await log
+
+    assert run(main()) == []
+    assert not os.path.exists(runner.virtualenv_dir)
+
+
+def test_async_lazy_setup_on_first_run(fake_virtualenv):
+    runner = FakeVirtualenvAsyncRunner(virtualenv_reqs='requirements.txt')
+    runner.set_lazy_setup(True)
+
+    async def main():
+        async with runner:
+            assert runner.setup_pending
+            results = await asyncio.gather(runner.run('true'),
+                                           runner.run('true'))
+            assert not runner.setup_pending
+            return results
+
+    assert run(main()) == [0, 0]
+    with open(runner.requirements_log_file) as f:
+        assert f.read().count('pip install -r requirements.txt out') == 1
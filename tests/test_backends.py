@@ -0,0 +1,102 @@
+import logging
+import os
+import sys
+import threading
+import mock
+import pytest
+from virtualenvrunner.backends import (
+    ShellBackend,
+    VenvBackend,
+    VirtualenvBackend,
+    get_backend,
+    get_backend_names)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def test_get_backend():
+    backend = get_backend('shell', virtualenv_exe='myvirtualenv')
+
+    assert get_backend_names() == ['shell', 'virtualenv', 'venv']
+    assert isinstance(backend, ShellBackend)
+    assert backend.virtualenv_exe == 'myvirtualenv'
+
+
+def test_get_backend_unknown():
+    with pytest.raises(ValueError) as excinfo:
+        get_backend('conda')
+
+    assert "'conda'" in str(excinfo.value)
+
+
+def test_shell_cmd():
+    assert ShellBackend().cmd('python3', 'venv') == (
+        'virtualenv --no-download -p python3 venv')
+
+
+def test_venv_cmd_without_shell():
+    assert VenvBackend().cmd('python3', 'venv') == [
+        'python3', '-m', 'venv', 'venv']
+
+
+def test_virtualenv_in_process():
+    assert VirtualenvBackend().cmd('python3', 'venv') is None
+
+
+def test_virtualenv_falls_back_to_shell():
+    with mock.patch.dict(sys.modules, {'virtualenv': None}):
+        assert VirtualenvBackend().cmd('python3', 'venv') == (
+            ShellBackend().cmd('python3', 'venv'))
+
+
+def test_virtualenv_create_logs():
+    written = []
+
+    def cli_run(args, setup_logging):
+        logging.getLogger('virtualenv.create').info('info')
+        logging.getLogger('virtualenv.create').debug('debug')
+        return mock.Mock(creator='creator', args=args,
+                         setup_logging=setup_logging)
+
+    with mock.patch('virtualenv.cli_run', side_effect=cli_run) as p:
+        VirtualenvBackend().create('python3', 'venv', written.append)
+
+    p.assert_called_once_with(['--no-download', '-p', 'python3', 'venv'],
+                              setup_logging=False)
+    assert written == ['info\n', 'created virtual environment creator\n']
+    logger = logging.getLogger('virtualenv')
+    assert (logger.handlers, logger.level, logger.propagate) == (
+        [], logging.NOTSET, True)
+
+
+def test_virtualenv_create_logs_per_thread():
+    written = {'venv1': [], 'venv2': []}
+
+    def create(name):
+        VirtualenvBackend().create('python3', name, written[name].append)
+
+    def cli_run(args, setup_logging):  # pylint: disable=unused-argument
+        if args[-1] == 'venv1':
+            thread = threading.Thread(target=create, args=('venv2',))
+            thread.start()
+            thread.join()
+        logging.getLogger('virtualenv').info(args[-1])
+        return mock.Mock(creator=args[-1])
+
+    with mock.patch('virtualenv.cli_run', side_effect=cli_run):
+        create('venv1')
+
+    assert written == {
+        name: [name + '\n', 'created virtual environment {}\n'.format(name)]
+        for name in written}
+
+
+def test_virtualenv_create(tmpdir):
+    virtualenv_dir = str(tmpdir.join('venv'))
+    written = []
+
+    VirtualenvBackend().create(sys.executable, virtualenv_dir, written.append)
+
+    assert os.path.isfile(os.path.join(virtualenv_dir, 'pyvenv.cfg'))
+    assert written[-1].startswith('created virtual environment ')
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import sys
+import pytest
+from virtualenvrunner.cachemanager import (
+    CacheManager,
+    LAST_USED,
+    OWNER,
+    is_process_alive,
+    make_tmp_virtualenv_dir,
+    mark_used)
+from virtualenvrunner.locking import FileLock
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def create_virtualenv(path, last_used, size=0):
+    os.makedirs(os.path.join(path, 'bin'))
+    with open(os.path.join(path, 'bin', 'activate_this.py'), 'w') as f:
+        f.write('x' * size)
+    mark_used(path)
+    os.utime(os.path.join(path, LAST_USED), (last_used, last_used))
+    return path
+
+
+def get_dead_pid():
+    proc = subprocess.Popen([sys.executable, '-c', 'pass'])
+    proc.wait()
+    return proc.pid
+
+
+@pytest.fixture
+def root(tmpdir):
+    root = str(tmpdir.join('root'))
+    create_virtualenv(os.path.join(root, 'old'), last_used=100, size=100000)
+    create_virtualenv(os.path.join(root, 'middle'), last_used=200, size=100000)
+    create_virtualenv(os.path.join(root, 'new'), last_used=300, size=100000)
+    os.makedirs(os.path.join(root, 'notvenv'))
+    return root
+
+
+@pytest.fixture
+def tmp_dir(tmpdir):
+    return str(tmpdir.join('tmp'))
+
+
+def create_manager(root, tmp_dir, **kwargs):
+    return CacheManager(roots=[root], tmp_dir=tmp_dir, **kwargs)
+
+
+def get_names(usages):
+    return [os.path.basename(u.path) for u in usages]
+
+
+def test_find_virtualenvs_in_lru_order(root, tmp_dir):
+    usages = create_manager(root, tmp_dir).find_virtualenvs()
+
+    assert get_names(usages) == ['old', 'middle', 'new']
+    assert [u.last_used for u in usages] == [100, 200, 300]
+    assert all(u.size >= 100000 for u in usages)
+
+
+@pytest.mark.parametrize('kwargs, expected_names', [
+    ({}, []),
+    ({'max_age': 150}, ['old']),
+    ({'max_size': 250000}, ['old']),
+    ({'max_size': 150000}, ['old', 'middle']),
+    ({'max_size': 250000, 'max_age': 50}, ['old', 'middle'])])
+def test_find_evictable(root, tmp_dir, kwargs, expected_names):
+    manager = create_manager(root, tmp_dir, **kwargs)
+
+    assert get_names(manager.find_evictable(now=260)) == expected_names
+
+
+def test_clean_evicts_virtualenv_staging_and_lock(root, tmp_dir):
+    old = os.path.join(root, 'old')
+    os.makedirs(old + '.staging')
+    for suffix in ['.lock', '.setup.lock']:
+        open(old + suffix, 'w').close()
+
+    assert create_manager(root, tmp_dir, max_age=150).clean(now=260) == [old]
+    assert sorted(os.listdir(root)) == ['middle', 'new', 'notvenv']
+
+
+def test_clean_skips_virtualenv_in_use(root, tmp_dir):
+    old = os.path.join(root, 'old')
+    lock = FileLock(old + '.lock')
+    lock.acquire(shared=True)
+    try:
+        removed = create_manager(root, tmp_dir, max_size=0).clean()
+    finally:
+        lock.release()
+
+    assert removed == [os.path.join(root, 'middle'),
+                       os.path.join(root, 'new')]
+    assert os.path.isdir(old)
+
+
+def test_clean_dry_run(root, tmp_dir):
+    removed = create_manager(root, tmp_dir, max_size=0).clean(dry_run=True)
+
+    assert len(removed) == 3
+    assert len(create_manager(root, tmp_dir).find_virtualenvs()) == 3
+
+
+def create_tmp_virtualenv(tmp_dir, name, owner=None, last_used=None):
+    path = os.path.join(tmp_dir, name)
+    if last_used is None:
+        os.makedirs(path)
+    else:
+        create_virtualenv(path, last_used=last_used)
+    if owner is not None:
+        with open(os.path.join(path, OWNER), 'w') as f:
+            f.write('{}\n'.format(owner))
+    return path
+
+
+def test_orphaned_tmp_virtualenvs_removed(root, tmp_dir):
+    dead = create_tmp_virtualenv(tmp_dir, 'venv_dead', owner=get_dead_pid())
+    alive = create_tmp_virtualenv(tmp_dir, 'venv_alive', owner=os.getpid())
+    unowned_old = create_tmp_virtualenv(tmp_dir, 'venv_old', last_used=100)
+    unowned_new = create_tmp_virtualenv(tmp_dir, 'venv_new', last_used=300)
+    other = create_tmp_virtualenv(tmp_dir, 'other', owner=get_dead_pid())
+
+    removed = create_manager(root, tmp_dir, max_age=150).clean(now=260)
+
+    assert removed[:2] == [dead, unowned_old]
+    for path in [alive, unowned_new, other]:
+        assert os.path.isdir(path)
+    assert not os.path.exists(dead)
+
+
+def test_make_tmp_virtualenv_dir_owned_by_process(tmpdir, monkeypatch):
+    monkeypatch.setattr('tempfile.tempdir', str(tmpdir))
+
+    path = make_tmp_virtualenv_dir()
+
+    assert os.path.basename(path).startswith('venv_')
+    with open(os.path.join(path, OWNER)) as f:
+        assert int(f.read()) == os.getpid()
+
+
+def test_mark_used_ignores_errors(tmpdir):
+    mark_used(str(tmpdir.join('not_existing')))
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'),
+                    reason='process liveness is not checked on Windows')
+def test_is_process_alive():
+    assert is_process_alive(os.getpid())
+    assert not is_process_alive(get_dead_pid())
@@ -1,8 +1,18 @@
 # pylint: disable=unused-argument
+import argparse
+import json
 import os
+import time
 from collections import namedtuple
+import mock
 import pytest
+from virtualenvrunner.locking import FileLock
 from virtualenvrunner.python_versions import get_python_versions
+from virtualenvrunner.runnerargparser import (
+    MatrixArgParser,
+    parse_duration,
+    parse_positive_int,
+    parse_size)
 
 
 __copyright__ = 'Copyright (C) 2019, Nokia'
@@ -39,7 +49,7 @@ def test_run_in_virtualenv_with_env(script_runner,
         popen_calls = patchermock_real.patch.mock_calls
         virtualenv_call_arg, pip_call_arg = (
             popen_calls[0][1][0], popen_calls[1][1][0])
-        assert virtualenv_call_arg.endswith('virtualenv_dir')
+        assert virtualenv_call_arg.endswith('virtualenv_dir.staging')
         assert '-r virtualenv_reqs' in pip_call_arg
         assert '--upgrade' in pip_call_arg
         assert '-i pip_index_url' in pip_call_arg
@@ -202,7 +212,8 @@ def test_dir_argument(script_runner,
                       cli):
     with tmpdir.as_cwd():
         assert script_runner.run(cli, dir_arg_name, 'dir').success
-        assert get_mock_virtualenv_call(patchermock_real.patch).endswith('dir')
+        assert get_mock_virtualenv_call(patchermock_real.patch).endswith(
+            'dir.staging')
 
 
 @clis()
@@ -282,6 +293,24 @@ def test_python_versions_in_help(script_runner,
         versioned_run_script, '-h').stdout
 
 
+@pytest.mark.parametrize('name, pythonexe', [('run314', 'python3.14'),
+                                              ('run4', 'python4')])
+def test_pythonversionrun_any_version(name, pythonexe):
+    from virtualenvrunner.pythonversionrun import PythonVersionRun
+    run = mock.Mock(__name__='run')
+
+    getattr(PythonVersionRun(run), name)()
+
+    assert run.call_args[1]['pythonexe'] == pythonexe
+
+
+def test_pythonversionrun_unknown_attribute():
+    from virtualenvrunner.pythonversionrun import PythonVersionRun
+
+    with pytest.raises(AttributeError):
+        PythonVersionRun(mock.Mock(__name__='run')).run3x  # pylint: disable=expression-not-assigned
+
+
 EXPECTED_COMMON_ARGS_HELPS = ["Path to 'pip freeze' file"]
 
 
@@ -325,3 +354,215 @@ def test_run_in_virtualenv_commandline(script_runner,
         _, args, kwargs = mock_subprocess_check_call.mock_calls[0]
         assert args[0] == expected_call_args
         assert kwargs['shell'] == expected_shell
+
+
+@pytest.mark.parametrize('cli', get_base_clis())
+def test_cache_root_argument(script_runner,
+                             patchermock_real,
+                             tmpdir,
+                             cli):
+    with tmpdir.as_cwd():
+        with mock.patch(
+                'virtualenvrunner.venvcache.VirtualenvCache.get_interpreter_id',
+                return_value='interpreter'):
+            assert script_runner.run(cli, '--cache-root', 'cache').success
+        assert get_mock_virtualenv_call(
+            patchermock_real.patch).split()[-1].startswith(
+                os.path.join('cache', ''))
+
+
+@pytest.mark.parametrize('cli', get_base_clis())
+def test_lock_timeout_argument(script_runner,
+                               patchermock_real,
+                               tmpdir,
+                               cli):
+    with tmpdir.as_cwd():
+        with FileLock(os.path.join(str(tmpdir), '.venv.lock')):
+            ret = script_runner.run(cli, '--lock-timeout', '0.1')
+        assert ret.returncode == 1
+        assert 'LockTimeout: Timeout in acquiring lock' in ret.stdout
+
+
+@pytest.mark.parametrize('cli', get_base_clis())
+def test_wheelhouse_argument(script_runner,
+                             patchermock_real,
+                             tmpdir,
+                             cli):
+    with tmpdir.as_cwd():
+        with open('requirements', 'w') as f:
+            f.write('reqspec1\n')
+        ret = script_runner.run(cli, '-r', 'requirements',
+                                '--wheelhouse', 'wh')
+        assert ret.success, (ret.stdout, ret.stderr)
+        pip_calls = [c[1][0] for c in patchermock_real.patch.mock_calls
+                     if c[1] and c[1][0].startswith('pip')]
+        assert pip_calls[0] == ('pip wheel -r requirements -w wh '
+                                '--find-links wh')
+        assert pip_calls[1].endswith('--no-index --find-links wh')
+
+
+@pytest.mark.parametrize('cli', get_base_clis())
+def test_prebuild_jobs_argument(script_runner,
+                                patchermock_real,
+                                tmpdir,
+                                cli):
+    with tmpdir.as_cwd():
+        with open('requirements', 'w') as f:
+            f.write('reqspec1\n')
+        ret = script_runner.run(cli, '-r', 'requirements',
+                                '--wheelhouse', 'wh', '--prebuild-jobs', '4')
+        assert ret.success, (ret.stdout, ret.stderr)
+        pip_calls = [c[1][0] for c in patchermock_real.patch.mock_calls
+                     if c[1] and c[1][0].startswith('pip')]
+        assert pip_calls[0].startswith('pip wheel --no-deps -r ')
+        assert pip_calls[0].endswith(' -w wh --find-links wh')
+        assert pip_calls[1] == ('pip wheel -r requirements -w wh '
+                                '--find-links wh')
+
+
+@pytest.mark.parametrize('cli', get_base_clis())
+def test_backend_argument(script_runner, patchermock_real, tmpdir, cli):
+    with tmpdir.as_cwd():
+        ret = script_runner.run(cli, '--backend', 'venv')
+        assert ret.success, (ret.stdout, ret.stderr)
+        args, kwargs = patchermock_real.patch.call_args_list[0]
+        assert args[0][1:3] == ['-m', 'venv']
+        assert not kwargs['shell']
+
+
+def test_unknown_backend_argument(script_runner):
+    ret = script_runner.run('run_in_virtualenv', '--backend', 'conda')
+    assert not ret.success
+    assert "invalid choice: 'conda'" in ret.stderr
+
+
+@pytest.mark.parametrize('cli', ['run_in_virtualenv', 'create_virtualenv'])
+def test_incremental_argument(script_runner,
+                              patchermock_real,
+                              tmpdir,
+                              cli):
+    with tmpdir.as_cwd():
+        with open('requirements', 'w') as f:
+            f.write('reqspec1\n')
+        assert script_runner.run(cli, '-r', 'requirements').success
+        with open('requirements', 'w') as f:
+            f.write('reqspec2\n')
+        patchermock_real.patch.reset_mock()
+        ret = script_runner.run(cli, '-r', 'requirements', '--incremental')
+        assert ret.success, (ret.stdout, ret.stderr)
+        pip_calls = [c[1][0] for c in patchermock_real.patch.mock_calls
+                     if c[1] and c[1][0].startswith('pip')]
+        assert pip_calls[0] == 'pip uninstall -y reqspec1'
+        assert pip_calls[1].endswith('.virtualenvrunner_requirements.diff')
+
+
+@pytest.mark.parametrize('cli', get_base_clis())
+def test_timing_file_argument(script_runner,
+                              patchermock_real,
+                              tmpdir,
+                              cli):
+    with tmpdir.as_cwd():
+        ret = script_runner.run(cli, '--timing-file', 'timing.jsonl')
+        assert ret.success, (ret.stdout, ret.stderr)
+        with open('timing.jsonl') as f:
+            phases = [json.loads(line)['phase'] for line in f]
+        assert 'setup' in phases
+
+
+@pytest.fixture
+def mock_subprocess_call():
+    with mock.patch('subprocess.call', return_value=0) as p:
+        yield p
+
+
+def test_run_in_virtualenv_matrix(script_runner,
+                                  patchermock_real,
+                                  mock_subprocess_call,
+                                  tmpdir):
+    with tmpdir.as_cwd():
+        ret = script_runner.run('run_in_virtualenv_matrix',
+                                '-p', '2.7,3.6', 'args')
+        assert ret.success, (ret.stdout, ret.stderr)
+        assert 'python2.7: exit status 0' in ret.stdout
+        assert 'python3.6: exit status 0' in ret.stdout
+        virtualenv_calls = sorted(c[1][0] for c in
+                                  patchermock_real.patch.mock_calls)
+        for call, version in zip(virtualenv_calls, ['2.7', '3.6']):
+            assert '-p python{} '.format(version) in call
+            assert call.endswith('.venv{}.staging'.format(version))
+        assert mock_subprocess_call.call_count == 2
+
+
+def test_run_in_virtualenv_matrix_failure(script_runner,
+                                          patchermock_real,
+                                          mock_subprocess_call,
+                                          tmpdir):
+    mock_subprocess_call.return_value = 2
+    with tmpdir.as_cwd():
+        ret = script_runner.run('run_in_virtualenv_matrix', '-p', '3.6',
+                                'args')
+        assert ret.returncode == 1
+        assert 'python3.6: exit status 2' in ret.stdout
+
+
+def test_matrix_processes():
+    assert MatrixArgParser().parser.parse_args(
+        ['-p', '3.6', '--processes', '2']).processes == 2
+
+
+@pytest.mark.parametrize('processes', ['0', '-1'])
+def test_matrix_processes_not_positive(processes, capsys):
+    with pytest.raises(SystemExit):
+        MatrixArgParser().parser.parse_args(
+            ['-p', '3.6', '--processes', processes])
+
+    assert 'positive integer' in capsys.readouterr()[1]
+
+
+def create_cached_virtualenv(path, last_used):
+    os.makedirs(path)
+    open(os.path.join(path, 'pyvenv.cfg'), 'w').close()
+    os.utime(path, (last_used, last_used))
+
+
+@pytest.mark.parametrize('dry_run_args, action', [
+    ([], 'Removed'),
+    (['--dry-run'], 'Would remove')])
+def test_clean_virtualenvs(script_runner, tmpdir, monkeypatch,
+                           dry_run_args, action):
+    root = str(tmpdir.join('root'))
+    create_cached_virtualenv(os.path.join(root, 'old'), last_used=100)
+    create_cached_virtualenv(os.path.join(root, 'new'), last_used=time.time())
+    monkeypatch.setenv('VIRTUALENV_CACHE_ROOT', root)
+
+    ret = script_runner.run('clean_virtualenvs', '--max-age', '1d',
+                            '--tmp-dir', str(tmpdir), *dry_run_args)
+
+    assert ret.success, (ret.stdout, ret.stderr)
+    assert ret.stdout == '{action} {path}\n'.format(
+        action=action, path=os.path.join(root, 'old'))
+    assert os.path.isdir(os.path.join(root, 'old')) == bool(dry_run_args)
+    assert os.path.isdir(os.path.join(root, 'new'))
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('10', 10), ('2K', 2048), ('1.5m', 1.5 * 1024 ** 2), ('1G', 1024 ** 3)])
+def test_parse_size(value, expected):
+    assert parse_size(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('10', 10), ('2m', 120), ('1h', 3600), ('7d', 7 * 86400)])
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+
+@pytest.mark.parametrize('value', ['0', '-1', 'two'])
+def test_parse_invalid_positive_int(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_positive_int(value)
+
+
+def test_parse_invalid_size():
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_size('ten')
@@ -0,0 +1,138 @@
+# pylint: disable=unused-argument
+import os
+import shutil
+import pytest
+import mock
+from virtualenvrunner.interpreters import InterpreterNotFound
+from virtualenvrunner.logsinks import RingBufferSink
+from virtualenvrunner.runner import Runner, RunnerInstallationFailed
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def test_pythonexe_resolved_once_via_registry(interpreter_registry):
+    with mock.patch.object(interpreter_registry, 'resolve',
+                           return_value='/usr/bin/python3.7') as resolve:
+        runner = Runner(virtualenv_pythonexe='python3')
+        assert runner.virtualenv_pythonexe == '/usr/bin/python3.7'
+        assert runner.virtualenv_pythonexe == '/usr/bin/python3.7'
+
+    resolve.assert_called_once_with('python3')
+
+
+def test_missing_interpreter_raised_early(tmpdir, patchermock_real):
+    with tmpdir.as_cwd():
+        with mock.patch('virtualenvrunner.interpreters.is_windows',
+                        return_value=False):
+            with pytest.raises(InterpreterNotFound):
+                with Runner(virtualenv_pythonexe='python9.9'):
+                    pass
+
+    assert not patchermock_real.patch.called
+
+
+def create_cached_runner(cache_root, **kwargs):
+    runner = Runner(virtualenv_reqs='requirements.txt', **kwargs)
+    runner.set_cache_root(cache_root)
+    return runner
+
+
+def test_cache_reuses_virtualenv_without_pip(cache_requirements,
+                                             mock_subprocess_check_call,
+                                             patchermock_real,
+                                             mock_interpreter_id):
+    with create_cached_runner('cache') as runner:
+        virtualenv_dir = runner.virtualenv_dir
+    assert os.path.dirname(virtualenv_dir) == 'cache'
+    assert os.path.isfile(runner.completion_marker)
+    patchermock_real.patch.reset_mock()
+
+    with create_cached_runner('cache') as runner:
+        runner.run('cmd')
+
+    assert runner.virtualenv_dir == virtualenv_dir
+    assert not patchermock_real.patch.called
+
+
+def test_cache_changes_with_requirements(cache_requirements,
+                                         patchermock_real,
+                                         mock_interpreter_id):
+    with create_cached_runner('cache') as runner:
+        virtualenv_dir = runner.virtualenv_dir
+    with open('requirements.txt', 'a') as f:
+        f.write('reqspec2\n')
+
+    with create_cached_runner('cache') as runner:
+        assert runner.virtualenv_dir != virtualenv_dir
+
+
+def test_cache_rebuilds_incomplete_virtualenv(cache_requirements,
+                                              patchermock_real,
+                                              mock_interpreter_id):
+    with create_cached_runner('cache') as runner:
+        os.remove(runner.completion_marker)
+    patchermock_real.patch.reset_mock()
+
+    with create_cached_runner('cache'):
+        pass
+
+    _, args, _ = patchermock_real.patch.mock_calls[0]
+    assert args[0].startswith('virtualenv')
+
+
+def test_cache_not_used_with_virtualenv_dir(cache_requirements,
+                                            patchermock_real,
+                                            mock_interpreter_id):
+    runner = create_cached_runner('cache', virtualenv_dir='venv')
+    assert runner.virtualenv_dir == 'venv'
+    assert not runner.uses_cache
+
+
+def create_backend_runner(tmpdir, backend):
+    runner = Runner(virtualenv_dir=str(tmpdir.join('venv')))
+    runner.set_virtualenv_backend(backend)
+    return runner
+
+
+def test_venv_backend_without_shell(tmpdir, patchermock_real):
+    runner = create_backend_runner(tmpdir, 'venv')
+    with runner:
+        pass
+
+    args, kwargs = patchermock_real.patch.call_args_list[0]
+    assert args[0] == ['python', '-m', 'venv', runner.staging_dir]
+    assert not kwargs['shell']
+
+
+def copy_mockvenv(pythonexe, virtualenv_dir, write):
+    shutil.copytree(os.path.join(os.path.dirname(__file__), 'mockvenv'),
+                    virtualenv_dir)
+    write('created {}\n'.format(pythonexe))
+
+
+def test_in_process_backend(tmpdir, patchermock_real):
+    sink = RingBufferSink()
+    runner = create_backend_runner(tmpdir, 'virtualenv')
+    runner.add_log_sink(sink)
+    with mock.patch('virtualenvrunner.backends.VirtualenvBackend.create',
+                    side_effect=copy_mockvenv):
+        with runner:
+            pass
+
+    assert not patchermock_real.patch.called
+    assert sink.getvalue() == 'created python\n'
+    assert os.path.isfile(runner.activate_this)
+
+
+def test_in_process_backend_failure_raises(tmpdir):
+    runner = create_backend_runner(tmpdir, 'virtualenv')
+    with mock.patch('virtualenvrunner.backends.VirtualenvBackend.create',
+                    side_effect=RuntimeError('no interpreter')):
+        with pytest.raises(RunnerInstallationFailed) as excinfo:
+            with runner:
+                pass
+
+    assert str(excinfo.value) == (
+        "Creation of '{}' with backend virtualenv failed: "
+        "no interpreter".format(runner.staging_dir))
@@ -0,0 +1,164 @@
+# pylint: disable=unused-argument
+import subprocess
+import sys
+import mock
+import pytest
+from virtualenvrunner.dispatcher import get_command_name, get_commands, main
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+IMPORT_TIME_BUDGET_US = 50000
+
+COMMAND_IMPORT_TIME_BUDGET_US = 100000
+
+
+@pytest.fixture
+def mock_argv(monkeypatch):
+    def set_argv(*argv):
+        monkeypatch.setattr(sys, 'argv', list(argv))
+
+    return set_argv
+
+
+@pytest.mark.parametrize('script, name', [
+    ('/usr/bin/run_in_virtualenv', 'run_in_virtualenv'),
+    ('run_in_virtualenv3.7', 'run_in_virtualenv3.7'),
+    ('C:\\Scripts\\run_in_virtualenv3.7.exe', 'run_in_virtualenv3.7'),
+    ('run_in_virtualenv3.7-script.py', 'run_in_virtualenv3.7')])
+def test_get_command_name(script, name):
+    assert get_command_name(script.replace('\\', '/')) == name
+
+
+def test_commands():
+    commands = get_commands()
+
+    assert commands['clean_virtualenvs'].function == 'run_clean'
+    assert commands['create_virtualenv3.7'].function == 'run_install'
+    assert str(commands['create_virtualenv3.7'].python_version) == '3.7'
+    assert 'run_in_virtualenv_matrix3.7' not in commands
+
+
+def test_main_by_script_name(mock_argv):
+    mock_argv('/bin/run_in_virtualenv', 'cmd')
+    with mock.patch('virtualenvrunner.cli.run') as run:
+        main()
+
+    run.assert_called_once_with()
+    assert sys.argv == ['/bin/run_in_virtualenv', 'cmd']
+
+
+def test_main_by_subcommand(mock_argv):
+    mock_argv('/bin/virtualenvrunner', 'run_in_virtualenv3.7', 'cmd')
+    with mock.patch('virtualenvrunner.cli.run') as run:
+        main()
+
+    python_version = run.call_args[1]['python_version']
+    run.assert_called_once_with(pythonexe='python3.7',
+                                python_version=python_version)
+    assert str(python_version) == '3.7'
+    assert sys.argv == ['run_in_virtualenv3.7', 'cmd']
+
+
+@pytest.mark.parametrize('argv', [['virtualenvrunner'],
+                                  ['virtualenvrunner', 'unknown'],
+                                  ['virtualenvrunner', 'run_in_virtualenv3.x']])
+def test_main_unknown_command(mock_argv, capsys, argv):
+    mock_argv(*argv)
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    err = capsys.readouterr().err
+    assert err.startswith('usage: virtualenvrunner COMMAND [ARGS]')
+    assert '  run_in_virtualenv3.7\n' in err
+
+
+def test_subcommand_script(script_runner, tmpdir):
+    ret = script_runner.run('virtualenvrunner', 'clean_virtualenvs',
+                            '--dry-run', '--root', str(tmpdir),
+                            '--tmp-dir', str(tmpdir))
+    assert ret.success, (ret.stdout, ret.stderr)
+
+
+def get_imported(module):
+    out = subprocess.check_output(
+        [sys.executable, '-c',
+         'import sys, {module}; print("\\n".join(sys.modules))'.format(
+             module=module)])
+    return out.decode('utf-8').split()
+
+
+@pytest.mark.parametrize('module, deferred', [
+    ('virtualenvrunner.dispatcher', ['argparse',
+                                     'subprocess',
+                                     'virtualenvrunner.cli']),
+    ('virtualenvrunner.cli', ['multiprocessing',
+                              'email.parser',
+                              'virtualenvrunner.runner',
+                              'virtualenvrunner.matrixrun',
+                              'virtualenvrunner.cachemanager']),
+    ('virtualenvrunner.runner', ['multiprocessing',
+                                 'email.parser'])])
+def test_deferred_imports(module, deferred):
+    imported = get_imported(module)
+
+    assert [m for m in deferred if m in imported] == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='-X importtime')
+def test_dispatcher_import_time_budget():
+    err = subprocess.check_output(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import virtualenvrunner.dispatcher'],
+        stderr=subprocess.STDOUT).decode('utf-8')
+    cumulative = [int(line.split('|')[1])
+                  for line in err.splitlines()
+                  if line.split('|')[-1].strip() ==
+                  'virtualenvrunner.dispatcher']
+
+    assert cumulative[0] < IMPORT_TIME_BUDGET_US
+
+
+def get_import_times(*args):
+    err = subprocess.check_output(
+        [sys.executable, '-X', 'importtime'] + list(args),
+        stderr=subprocess.STDOUT).decode('utf-8')
+    times = {}
+    for line in err.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                times[name[1:].rstrip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='-X importtime')
+@pytest.mark.parametrize('command', ['run_in_virtualenv',
+                                     'run_in_virtualenv3.7',
+                                     'create_virtualenv',
+                                     'run_in_readonly_virtualenv',
+                                     'run_in_virtualenv_matrix',
+                                     'clean_virtualenvs'])
+def test_command_help_import_time_budget(command):
+    startup = get_import_times('-c', 'pass')
+    times = get_import_times('-m', 'virtualenvrunner', command, '--help')
+    imported = {name.strip() for name in times}
+
+    assert [m for m in ['virtualenv',
+                        'virtualenvrunner.runner',
+                        'virtualenvrunner.matrixrun',
+                        'virtualenvrunner.cachemanager'] if m in imported] == []
+    assert sum(t for name, t in times.items()
+               if not name.startswith(' ') and
+               name not in startup and
+               name != 'runpy') < COMMAND_IMPORT_TIME_BUDGET_US
+
+
+def test_main_by_any_python_version(mock_argv):
+    mock_argv('/bin/virtualenvrunner', 'create_virtualenv3.14')
+    with mock.patch('virtualenvrunner.cli.run_install') as run_install:
+        main()
+
+    assert run_install.call_args[1]['pythonexe'] == 'python3.14'
@@ -0,0 +1,168 @@
+import os
+import pytest
+from virtualenvrunner.distributions import Distributions
+from virtualenvrunner.utils import is_windows
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def write(path, content):
+    dirname = os.path.dirname(path)
+    if not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+class FakeVirtualenv(object):
+    def __init__(self, path, python_version='3.7'):
+        self.path = str(path)
+        self.site_packages = (
+            os.path.join(self.path, 'Lib', 'site-packages')
+            if is_windows() else
+            os.path.join(self.path, 'lib', 'python' + python_version,
+                         'site-packages'))
+        self.set_cfg('home = /usr/bin\n'
+                     'include-system-site-packages = false\n'
+                     'version = {}.1\n'.format(python_version))
+
+    def set_cfg(self, content):
+        write(os.path.join(self.path, 'pyvenv.cfg'), content)
+
+    def add_dist_info(self, name, version, extra=None, requires=()):
+        base = os.path.join(self.site_packages,
+                            '{}-{}.dist-info'.format(name, version))
+        write(os.path.join(base, 'METADATA'),
+              self._metadata(name, version, requires=requires))
+        if extra:
+            write(os.path.join(base, extra), '{}')
+
+    def add_egg_info(self, name, version, as_file=False, requires=None):
+        path = os.path.join(self.site_packages,
+                            '{}-{}-py3.7.egg-info'.format(name, version))
+        write(path if as_file else os.path.join(path, 'PKG-INFO'),
+              self._metadata(name, version))
+        if requires is not None:
+            write(os.path.join(path, 'requires.txt'), requires)
+
+    @staticmethod
+    def _metadata(name, version, requires=()):
+        return ('Metadata-Version: 2.1\n'
+                'Name: {}\n'
+                'Version: {}\n'
+                '{}'
+                'Summary: test\n\n'
+                'Description\n'.format(
+                    name, version,
+                    ''.join('Requires-Dist: {}\n'.format(r)
+                            for r in requires)))
+
+
+@pytest.fixture
+def venv(tmpdir):
+    return FakeVirtualenv(tmpdir.join('venv'))
+
+
+def test_freeze_sorted_and_excludes_build_tools(venv):
+    venv.add_dist_info('six', '1.16.0')
+    venv.add_dist_info('Jinja2', '3.0.1')
+    venv.add_dist_info('pip', '21.1')
+    venv.add_dist_info('setuptools', '57.0.0')
+    venv.add_egg_info('attrs', '21.2.0')
+    venv.add_egg_info('MarkupSafe', '2.0.1', as_file=True)
+
+    assert Distributions(venv.path).freeze() == ('attrs==21.2.0\n'
+                                                 'Jinja2==3.0.1\n'
+                                                 'MarkupSafe==2.0.1\n'
+                                                 'six==1.16.0\n')
+
+
+@pytest.mark.parametrize('pip_version, expected', [
+    ('23.1.2', 'six==1.16.0\n'),
+    ('23.2', 'setuptools==68.0.0\nsix==1.16.0\nwheel==0.41.0\n')])
+def test_freeze_excludes_on_python_312(tmpdir, pip_version, expected):
+    venv = FakeVirtualenv(tmpdir.join('venv'), python_version='3.12')
+    venv.add_dist_info('six', '1.16.0')
+    venv.add_dist_info('pip', pip_version)
+    venv.add_dist_info('setuptools', '68.0.0')
+    venv.add_dist_info('wheel', '0.41.0')
+
+    assert Distributions(venv.path).freeze() == expected
+
+
+def test_freeze_none_on_python_312_without_pip(tmpdir):
+    venv = FakeVirtualenv(tmpdir.join('venv'), python_version='3.12')
+    venv.add_dist_info('six', '1.16.0')
+
+    assert Distributions(venv.path).freeze() is None
+
+
+def test_freeze_python_version_from_site_packages(venv):
+    venv.set_cfg('include-system-site-packages = false\n')
+    venv.add_dist_info('setuptools', '57.0.0')
+
+    assert Distributions(venv.path).freeze() == (None if is_windows() else '')
+
+
+def test_freeze_empty(venv):
+    os.makedirs(venv.site_packages)
+
+    assert Distributions(venv.path).freeze() == ''
+
+
+def test_freeze_none_without_site_packages(venv):
+    assert Distributions(venv.path).freeze() is None
+
+
+def test_freeze_none_with_direct_url(venv):
+    venv.add_dist_info('six', '1.16.0')
+    venv.add_dist_info('crl.example', '0.1', extra='direct_url.json')
+
+    assert Distributions(venv.path).freeze() is None
+
+
+def test_freeze_none_with_egg_link(venv):
+    venv.add_dist_info('six', '1.16.0')
+    write(os.path.join(venv.site_packages, 'example.egg-link'), '/src\n.')
+
+    assert Distributions(venv.path).freeze() is None
+
+
+@pytest.mark.parametrize('cfg', [
+    'include-system-site-packages = true\n', None])
+def test_freeze_none_with_system_site_packages(venv, cfg):
+    venv.add_dist_info('six', '1.16.0')
+    if cfg is None:
+        os.remove(os.path.join(venv.path, 'pyvenv.cfg'))
+    else:
+        venv.set_cfg(cfg)
+
+    assert Distributions(venv.path).freeze() is None
+
+
+def test_freeze_none_without_metadata(venv):
+    os.makedirs(os.path.join(venv.site_packages, 'six-1.16.0.dist-info'))
+
+    assert Distributions(venv.path).freeze() is None
+
+
+def test_digest_changes_with_distributions(venv):
+    venv.add_dist_info('six', '1.16.0')
+    digest = Distributions(venv.path).digest()
+    assert Distributions(venv.path).digest() == digest
+
+    venv.add_dist_info('six', '1.15.0')
+
+    assert Distributions(venv.path).digest() != digest
+
+
+def test_get_required(venv):
+    venv.add_dist_info('requests', '2.26.0',
+                       requires=['urllib3 (<1.27,>=1.21.1)',
+                                 'PySocks!=1.5.7; extra == "socks"'])
+    venv.add_dist_info('removed', '1.0', requires=['six'])
+    venv.add_egg_info('legacy', '1.0', requires='Jinja2>=2\n[extra]\nattrs\n')
+
+    assert Distributions(venv.path).get_required(excludes=['removed']) == {
+        'urllib3', 'pysocks', 'jinja2', 'attrs'}
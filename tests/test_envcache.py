@@ -0,0 +1,87 @@
+import os
+import pytest
+from virtualenvrunner.envcache import EnvCache, EnvDelta
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+ORIGINAL = {'PATH': 'path', 'REMOVED': 'removed', 'KEPT': 'kept'}
+ACTIVATED = {'PATH': os.pathsep.join(['bin', 'path']), 'REMOVED': None, 'KEPT': 'kept',
+             'ADDED': 'added'}
+
+
+def without_none(env):
+    return {k: v for k, v in env.items() if v is not None}
+
+
+def test_delta_apply_to_original():
+    delta = EnvDelta.from_envs(ORIGINAL, without_none(ACTIVATED))
+    assert delta.apply(ORIGINAL) == without_none(ACTIVATED)
+
+
+def test_delta_apply_to_other_environment():
+    delta = EnvDelta.from_envs(ORIGINAL, without_none(ACTIVATED))
+    assert delta.apply({'PATH': 'other', 'REMOVED': 'x'}) == {
+        'PATH': os.pathsep.join(['bin', 'other']), 'ADDED': 'added'}
+
+
+def test_delta_suffix_without_separator_set():
+    delta = EnvDelta.from_envs({'VIRTUAL_ENV': '/x/venv'},
+                               {'VIRTUAL_ENV': '/y/x/venv'})
+
+    assert delta.changes == {'VIRTUAL_ENV': ['set', '/y/x/venv', True]}
+    assert delta.apply({'VIRTUAL_ENV': '/z/venv'}) == {
+        'VIRTUAL_ENV': '/y/x/venv'}
+
+
+@pytest.mark.parametrize('environ', [
+    {'PATH': '', 'REMOVED': 'x'},
+    {'PATH': 'path'},
+    {'PATH': 'path', 'REMOVED': 'x', 'ADDED': 'x'}])
+def test_delta_not_applicable(environ):
+    delta = EnvDelta.from_envs(ORIGINAL, without_none(ACTIVATED))
+    assert delta.apply(environ) is None
+
+
+@pytest.fixture
+def activate_this(tmpdir):
+    path = tmpdir.join('venv', 'bin', 'activate_this.py')
+    path.write('content', ensure=True)
+    tmpdir.join('venv', 'pyvenv.cfg').write('home = /usr/bin\n')
+    return path
+
+
+def test_cache_save_and_load(activate_this):
+    delta = EnvDelta.from_envs(ORIGINAL, without_none(ACTIVATED))
+    EnvCache(str(activate_this)).save(delta)
+    assert EnvCache(str(activate_this)).load().changes == delta.changes
+
+
+@pytest.mark.parametrize('changed', [
+    os.path.join('bin', 'activate_this.py'), 'pyvenv.cfg'])
+def test_cache_invalidated_by_change(activate_this, changed):
+    EnvCache(str(activate_this)).save(EnvDelta({}))
+    activate_this.dirpath().dirpath().join(changed).write('changed content')
+    assert EnvCache(str(activate_this)).load() is None
+
+
+def test_cache_invalidated_by_move(activate_this, tmpdir):
+    EnvCache(str(activate_this)).save(EnvDelta({}))
+    os.rename(str(tmpdir.join('venv')), str(tmpdir.join('moved')))
+
+    assert EnvCache(str(tmpdir.join('moved', 'bin',
+                                    'activate_this.py'))).load() is None
+
+
+def test_cache_not_saved_without_virtualenv(tmpdir):
+    cache = EnvCache(str(tmpdir.join('venv', 'bin', 'activate_this.py')))
+    cache.save(EnvDelta({}))
+    assert cache.load() is None
+
+
+def test_cache_corrupted(activate_this):
+    cache = EnvCache(str(activate_this))
+    with open(cache.path, 'w') as f:
+        f.write('{')
+    assert cache.load() is None
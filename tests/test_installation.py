@@ -0,0 +1,300 @@
+# pylint: disable=unused-argument
+import os
+import pytest
+from virtualenvrunner.logsinks import RingBufferSink
+from virtualenvrunner.runner import Runner, RunnerInstallationFailed
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def test_up_to_date_requirements_skip_pip(cache_requirements,
+                                          patchermock_real):
+    with Runner(virtualenv_reqs='requirements.txt') as runner:
+        pass
+    assert os.path.isfile(runner.requirements_fingerprint_file)
+    patchermock_real.patch.reset_mock()
+
+    with Runner(virtualenv_reqs='requirements.txt') as runner:
+        assert runner.requirements_are_up_to_date
+
+    assert not patchermock_real.pip_commands
+
+
+@pytest.mark.parametrize('change', [
+    lambda runner: open('requirements.txt', 'a').write('reqspec2\n'),
+    lambda runner: os.makedirs(os.path.join(
+        runner.virtualenv_dir, 'lib', 'python3.7', 'site-packages',
+        'pkg-1.0.dist-info'))])
+def test_changed_requirements_reinstalled(cache_requirements,
+                                          patchermock_real,
+                                          change):
+    with Runner(virtualenv_reqs='requirements.txt') as runner:
+        change(runner)
+    patchermock_real.patch.reset_mock()
+
+    with Runner(virtualenv_reqs='requirements.txt'):
+        pass
+
+    assert patchermock_real.pip_commands == [
+        'pip install -r requirements.txt', 'pip freeze']
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'virtualenv_reqs_upd': 'true'},
+    {'pip_index_url': 'http://index'}])
+def test_reqs_reinstalled_with_update_or_index(cache_requirements,
+                                               patchermock_real,
+                                               kwargs):
+    with Runner(virtualenv_reqs='requirements.txt'):
+        pass
+    patchermock_real.patch.reset_mock()
+
+    with Runner(virtualenv_reqs='requirements.txt', **kwargs):
+        pass
+
+    assert patchermock_real.pip_commands[0].startswith('pip install')
+
+
+def test_freeze_from_metadata_shared(cache_requirements, patchermock_real):
+    def install():
+        base = os.path.join(runner.setup_dir, 'lib', 'python3.7',
+                            'site-packages', 'six-1.16.0.dist-info')
+        os.makedirs(base)
+        with open(os.path.join(base, 'METADATA'), 'w') as f:
+            f.write('Name: six\nVersion: 1.16.0\n\n')
+        with open(os.path.join(runner.setup_dir, 'pyvenv.cfg'), 'w') as f:
+            f.write('include-system-site-packages = false\n')
+
+    patchermock_real.mock.pip_side_effect = install
+    runner = Runner(virtualenv_reqs='requirements.txt')
+    runner.set_save_freeze_path('freeze.txt')
+    with runner:
+        pass
+
+    assert patchermock_real.pip_commands == [
+        'pip install -r requirements.txt']
+    with open('freeze.txt') as f:
+        assert f.read() == 'six==1.16.0\n'
+    with open(runner.requirements_log_file) as f:
+        assert 'pip freeze:\nsix==1.16.0\n' in f.read()
+
+
+def create_wheelhouse_runner(**kwargs):
+    runner = Runner(virtualenv_reqs='requirements.txt', **kwargs)
+    runner.set_wheelhouse('wheelhouse')
+    return runner
+
+
+def test_wheelhouse_populated_once(cache_requirements, patchermock_real):
+    with create_wheelhouse_runner(pip_index_url='index'):
+        pass
+    with create_wheelhouse_runner(pip_index_url='index',
+                                  virtualenv_dir='other'):
+        pass
+
+    assert patchermock_real.pip_commands == [
+        'pip wheel -r requirements.txt -w wheelhouse '
+        '--find-links wheelhouse -i index',
+        'pip install -r requirements.txt '
+        '--no-index --find-links wheelhouse',
+        'pip freeze',
+        'pip install -r requirements.txt '
+        '--no-index --find-links wheelhouse',
+        'pip freeze']
+
+
+def test_wheelhouse_updated_in_update_mode(cache_requirements,
+                                           patchermock_real):
+    with create_wheelhouse_runner():
+        pass
+    patchermock_real.patch.reset_mock()
+
+    with create_wheelhouse_runner(virtualenv_reqs_upd='true'):
+        pass
+
+    assert patchermock_real.pip_commands[0].startswith('pip wheel')
+
+
+def test_populate_wheelhouse_with_up_to_date_reqs(cache_requirements,
+                                                  patchermock_real):
+    with create_wheelhouse_runner():
+        pass
+    patchermock_real.patch.reset_mock()
+
+    runner = Runner(virtualenv_reqs='requirements.txt')
+    runner.set_wheelhouse('wheelhouse', populate=True)
+    with runner:
+        pass
+
+    assert patchermock_real.pip_commands == [
+        'pip wheel -r requirements.txt -w wheelhouse '
+        '--find-links wheelhouse']
+
+
+def create_prebuild_runner(**kwargs):
+    runner = Runner(virtualenv_reqs='requirements.txt', **kwargs)
+    runner.set_prebuild_jobs(2)
+    return runner
+
+
+def get_prebuild_requirements(cmd):
+    return cmd.split()[4]
+
+
+def test_prebuild_before_install(cache_requirements, patchermock_real):
+    with create_prebuild_runner(pip_index_url='index') as runner:
+        assert os.path.isdir(runner.prebuild_wheel_dir)
+    wheel_dir = os.path.join(runner.staging_dir, '.virtualenvrunner_wheels')
+
+    pip_commands = patchermock_real.pip_commands
+    assert pip_commands == [
+        'pip wheel --no-deps -r {requirements} -w {path} '
+        '--find-links {path} -i index'.format(
+            requirements=get_prebuild_requirements(pip_commands[0]),
+            path=wheel_dir),
+        'pip install -r requirements.txt --find-links {} -i index'.format(
+            wheel_dir),
+        'pip freeze']
+
+
+def test_prebuild_to_wheelhouse(cache_requirements, patchermock_real):
+    runner = create_prebuild_runner()
+    runner.set_wheelhouse('wheelhouse')
+    with runner:
+        pass
+
+    pip_commands = patchermock_real.pip_commands
+    assert pip_commands == [
+        'pip wheel --no-deps -r {} -w wheelhouse '
+        '--find-links wheelhouse'.format(
+            get_prebuild_requirements(pip_commands[0])),
+        'pip wheel -r requirements.txt -w wheelhouse '
+        '--find-links wheelhouse',
+        'pip install -r requirements.txt '
+        '--no-index --find-links wheelhouse',
+        'pip freeze']
+
+
+def set_pip_wheel_result(patchermock_real, returncode, output):
+    side_effect = patchermock_real.patch.side_effect
+
+    def pip_wheel_side_effect(*args, **kwargs):
+        popen = side_effect(*args, **kwargs)
+        if args[0].startswith('pip wheel'):
+            popen.set_returncode(returncode)
+            popen.ioouts.outf.add_out(output)
+        return popen
+
+    patchermock_real.patch.side_effect = pip_wheel_side_effect
+
+
+def test_prebuild_output_logged(cache_requirements, patchermock_real):
+    set_pip_wheel_result(patchermock_real, 0, 'built reqspec1\n')
+    sink = RingBufferSink()
+    runner = create_prebuild_runner()
+    runner.add_log_sink(sink)
+    with runner:
+        pass
+
+    assert sink.getvalue().startswith('built reqspec1\npip install out\n')
+
+
+def test_prebuild_failure_raises(cache_requirements, patchermock_real):
+    set_pip_wheel_result(patchermock_real, 1, 'build failed\n')
+    sink = RingBufferSink()
+    runner = create_prebuild_runner()
+    runner.add_log_sink(sink)
+    with pytest.raises(RunnerInstallationFailed) as excinfo:
+        with runner:
+            pass
+
+    assert 'pip wheel --no-deps' in str(excinfo.value)
+    assert sink.getvalue() == 'build failed\n'
+    assert not any(cmd.startswith('pip install')
+                   for cmd in patchermock_real.pip_commands)
+
+
+def create_incremental_runner(**kwargs):
+    runner = Runner(virtualenv_reqs='requirements.txt', **kwargs)
+    runner.set_incremental(True)
+    return runner
+
+
+@pytest.mark.parametrize('content, expected_pip_commands', [
+    ('reqspec1==2.0\nreqspec2\n',
+     ['pip install -r {diff}']),
+    ('reqspec2\n',
+     ['pip uninstall -y reqspec1', 'pip install -r {diff}']),
+    ('',
+     ['pip uninstall -y reqspec1']),
+    ('--pre\nreqspec1\n',
+     ['pip install -r requirements.txt'])])
+def test_incremental_install(cache_requirements, patchermock_real,
+                             content, expected_pip_commands):
+    with create_incremental_runner() as runner:
+        assert os.path.isfile(runner.requirements_snapshot_file)
+    with open('requirements.txt', 'w') as f:
+        f.write(content)
+    patchermock_real.patch.reset_mock()
+
+    with create_incremental_runner() as runner:
+        pass
+
+    assert patchermock_real.pip_commands == [
+        cmd.format(diff=runner.requirements_diff_file)
+        for cmd in expected_pip_commands] + ['pip freeze']
+
+
+def test_required_project_not_uninstalled(cache_requirements,
+                                          patchermock_real):
+    with open('requirements.txt', 'a') as f:
+        f.write('reqspec2\n')
+    with create_incremental_runner() as runner:
+        metadata = os.path.join(runner.virtualenv_dir, 'lib', 'python3.7',
+                                'site-packages', 'reqspec2-1.0.dist-info',
+                                'METADATA')
+        os.makedirs(os.path.dirname(metadata))
+        with open(metadata, 'w') as f:
+            f.write('Name: reqspec2\nVersion: 1.0\n'
+                    'Requires-Dist: reqspec1 (>=1.0)\n')
+    with open('requirements.txt', 'w') as f:
+        f.write('reqspec2\n')
+    patchermock_real.patch.reset_mock()
+
+    with create_incremental_runner():
+        pass
+
+    assert patchermock_real.pip_commands == ['pip freeze']
+
+
+def test_incremental_install_with_update(cache_requirements,
+                                         patchermock_real):
+    with create_incremental_runner():
+        pass
+    with open('requirements.txt', 'a') as f:
+        f.write('reqspec2\n')
+    patchermock_real.patch.reset_mock()
+
+    with create_incremental_runner(virtualenv_reqs_upd='true') as runner:
+        with open(runner.requirements_diff_file) as f:
+            assert f.read() == 'reqspec2\n'
+
+    assert patchermock_real.pip_commands[0] == (
+        'pip install  --upgrade --upgrade-strategy only-if-needed '
+        '-r {}'.format(runner.requirements_diff_file))
+
+
+def test_incremental_install_without_snapshot(cache_requirements,
+                                              patchermock_real):
+    with create_incremental_runner() as runner:
+        os.remove(runner.requirements_snapshot_file)
+    with open('requirements.txt', 'a') as f:
+        f.write('reqspec2\n')
+    patchermock_real.patch.reset_mock()
+
+    with create_incremental_runner():
+        pass
+
+    assert patchermock_real.pip_commands[0] == (
+        'pip install -r requirements.txt')
@@ -0,0 +1,242 @@
+import os
+import sys
+import pytest
+import mock
+from virtualenvrunner.interpreters import (
+    Interpreter,
+    InterpreterNotFound,
+    InterpreterRegistry,
+    get_default_registry_path)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'),
+                                reason='shell script interpreters')
+
+
+INTERPRETER_SCRIPT = """#!/bin/sh
+echo {path} >> {probes}
+echo {version}
+echo {abi}
+echo {executable}
+"""
+
+
+@pytest.fixture(autouse=True)
+def path(tmpdir, monkeypatch):
+    monkeypatch.setenv('PATH', str(tmpdir.join('path')))
+
+
+@pytest.fixture
+def probes(tmpdir):
+    return tmpdir.join('probes.log')
+
+
+@pytest.fixture
+def make_interpreter(tmpdir, probes):
+    def make(name, version, directory='bin', executable=None):
+        d = tmpdir.join(directory).ensure(dir=True)
+        path = d.join(name)
+        path.write(INTERPRETER_SCRIPT.format(
+            path=path,
+            probes=probes,
+            version=version,
+            abi='cp{}{}'.format(*version.split('.')[:2]),
+            executable=executable or path))
+        path.chmod(0o755)
+        return str(path)
+
+    return make
+
+
+@pytest.fixture
+def create_registry(tmpdir):
+    def create(dirs=('bin',)):
+        return InterpreterRegistry(
+            path=str(tmpdir.join('cache', 'interpreters.json')),
+            search_dirs=[str(tmpdir.join(d)) for d in dirs])
+
+    return create
+
+
+def get_probed(probes):
+    return probes.read().split() if probes.check() else []
+
+
+def test_interpreter_matches():
+    interpreter = Interpreter('python', '3.12.1', 'cp312', 0)
+
+    assert interpreter.version_info == (3, 12, 1)
+    assert [v for v in ['', '3', '3.12', '3.1', '2', '3.12.1']
+            if interpreter.matches(v)] == ['', '3', '3.12', '3.12.1']
+
+
+def test_scan(make_interpreter, create_registry):
+    python37 = make_interpreter('python3.7', '3.7.12')
+    make_interpreter('pythonw', '3.7.12')
+    make_interpreter('not_python', '3.7.12')
+
+    assert create_registry().interpreters == [
+        Interpreter(python37, '3.7.12', 'cp37', os.stat(python37).st_mtime)]
+
+
+def test_find_highest_version(make_interpreter, create_registry):
+    make_interpreter('python3.7', '3.7.12')
+    python312 = make_interpreter('python3.12', '3.12.1')
+    python27 = make_interpreter('python2', '2.7.18', directory='other')
+    registry = create_registry(dirs=['bin', 'other'])
+
+    assert registry.find().path == python312
+    assert registry.find('3').path == python312
+    assert registry.find('2').path == python27
+    assert registry.find('3.8') is None
+
+
+@pytest.mark.parametrize('pythonexe, expected', [
+    ('python3.7', 'python3.7'),
+    ('python3', 'python3.12'),
+    ('python', 'python3.12'),
+    ('python3.12.exe', 'python3.12')])
+def test_resolve(make_interpreter, create_registry, pythonexe, expected):
+    make_interpreter('python3.7', '3.7.12')
+    make_interpreter('python3.12', '3.12.1')
+
+    assert os.path.basename(
+        create_registry().resolve(pythonexe)) == expected
+
+
+def test_resolve_path_as_such(create_registry, probes):
+    registry = create_registry()
+
+    assert registry.resolve(os.path.join('bin', 'python')) == os.path.join(
+        'bin', 'python')
+    assert not get_probed(probes)
+
+
+def test_resolve_name_in_path_as_such(make_interpreter,
+                                      create_registry,
+                                      probes,
+                                      tmpdir):
+    make_interpreter('python3.12', '3.12.1')
+    make_interpreter('python3', '3.7.12', directory='path')
+    registry = create_registry(dirs=['path', 'bin'])
+
+    assert registry.resolve('python3') == 'python3'
+    assert not get_probed(probes)
+    assert not tmpdir.join('cache').check()
+
+
+@pytest.mark.parametrize('pythonexe', ['python3.8', 'mypython'])
+def test_resolve_not_found(make_interpreter, create_registry, pythonexe):
+    make_interpreter('python3.7', '3.7.12')
+
+    with mock.patch('virtualenvrunner.interpreters.is_windows',
+                    return_value=False):
+        with pytest.raises(InterpreterNotFound) as excinfo:
+            create_registry().resolve(pythonexe)
+
+    assert "'{}' not found".format(pythonexe) in str(excinfo.value)
+
+
+def test_resolve_not_found_as_such_on_windows(make_interpreter,
+                                              create_registry):
+    make_interpreter('python3.7', '3.7.12')
+
+    with mock.patch('virtualenvrunner.interpreters.is_windows',
+                    return_value=True):
+        assert create_registry().resolve('python3.8') == 'python3.8'
+
+
+def test_registry_reloaded_without_probing(make_interpreter,
+                                           create_registry,
+                                           probes):
+    make_interpreter('python3.7', '3.7.12')
+    interpreters = create_registry().interpreters
+    probes.remove()
+
+    assert create_registry().interpreters == interpreters
+    assert not get_probed(probes)
+
+
+def test_only_changed_interpreters_probed(make_interpreter,
+                                          create_registry,
+                                          probes):
+    make_interpreter('python3.7', '3.7.12')
+    python312 = make_interpreter('python3.12', '3.12.0')
+    create_registry().interpreters
+    probes.remove()
+    make_interpreter('python3.12', '3.12.1')
+    os.utime(python312, (2, 2))
+
+    registry = create_registry()
+
+    assert registry.find('3.12').version == '3.12.1'
+    assert get_probed(probes) == [python312]
+
+
+def test_new_interpreter_found_after_dir_change(make_interpreter,
+                                                create_registry):
+    make_interpreter('python3.7', '3.7.12')
+    create_registry().interpreters
+    bindir = os.path.dirname(make_interpreter('python3.12', '3.12.1'))
+    os.utime(bindir, (1, 1))
+
+    assert create_registry().find('3.12') is not None
+
+
+def test_symlinks_probed_once(make_interpreter, create_registry, probes):
+    python37 = make_interpreter('python3.7', '3.7.12')
+    os.symlink(python37, os.path.join(os.path.dirname(python37), 'python3'))
+
+    assert len(create_registry().interpreters) == 2
+    assert get_probed(probes) == [python37]
+
+
+def test_refresh(make_interpreter, create_registry):
+    make_interpreter('python3.7', '3.7.12')
+    registry = create_registry()
+    assert registry.find().version == '3.7.12'
+    make_interpreter('python3.12', '3.12.1', directory='other')
+    registry.search_dirs.append(
+        os.path.join(os.path.dirname(registry.search_dirs[0]), 'other'))
+
+    registry.refresh()
+
+    assert registry.find().version == '3.12.1'
+
+
+def test_unprobeable_interpreter_skipped(tmpdir, create_registry):
+    path = tmpdir.join('bin').ensure(dir=True).join('python')
+    path.write('#!/bin/sh\nexit 1\n')
+    path.chmod(0o755)
+
+    assert create_registry().interpreters == []
+
+
+def test_shim_recorded_as_executable(make_interpreter, create_registry):
+    python37 = make_interpreter('python3.7', '3.7.12', directory='versions')
+    make_interpreter('python3.7', '3.7.12', directory='shims',
+                     executable=python37)
+    make_interpreter('python3.8', '3.8.12', directory='shims',
+                     executable='/nonexistent/python3.8')
+
+    assert create_registry(dirs=['shims']).interpreters == [
+        Interpreter(python37, '3.7.12', 'cp37', os.stat(python37).st_mtime)]
+
+
+def test_corrupted_registry_rescanned(make_interpreter,
+                                      create_registry,
+                                      tmpdir):
+    make_interpreter('python3.7', '3.7.12')
+    tmpdir.join('cache').ensure(dir=True).join('interpreters.json').write(
+        '{')
+
+    assert len(create_registry().interpreters) == 1
+
+
+def test_default_registry_path(monkeypatch):
+    monkeypatch.setenv('VIRTUALENV_INTERPRETER_REGISTRY', 'registry.json')
+
+    assert get_default_registry_path() == 'registry.json'
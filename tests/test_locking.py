@@ -0,0 +1,109 @@
+import os
+import threading
+import pytest
+from virtualenvrunner.locking import FileLock, LockTimeout
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+@pytest.fixture
+def lock_path(tmpdir):
+    return str(tmpdir.join('venv.lock'))
+
+
+@pytest.fixture
+def locks(lock_path):
+    created = []
+
+    def create(timeout=0):
+        lock = FileLock(lock_path, timeout=timeout)
+        created.append(lock)
+        return lock
+
+    yield create
+    for lock in created:
+        lock.release()
+
+
+def test_shared_locks_coexist(locks):
+    locks().acquire(shared=True)
+    lock = locks()
+    lock.acquire(shared=True)
+
+    assert lock.is_locked
+    assert lock.is_shared
+
+
+@pytest.mark.parametrize('first_shared, second_shared', [
+    (False, False), (False, True), (True, False)])
+def test_exclusive_conflicts(locks, first_shared, second_shared):
+    locks().acquire(shared=first_shared)
+
+    with pytest.raises(LockTimeout):
+        locks(timeout=0.1).acquire(shared=second_shared)
+
+
+def test_timeout_message_contains_owner(locks, lock_path):
+    locks().acquire()
+
+    with pytest.raises(LockTimeout) as excinfo:
+        locks().acquire()
+
+    assert str(excinfo.value) == (
+        'Timeout in acquiring lock {} held by process {}'.format(
+            lock_path, os.getpid()))
+
+
+def test_owner_cleared_in_shared_mode(locks, lock_path):
+    lock = locks()
+    lock.acquire()
+    lock.acquire(shared=True)
+
+    with open(lock_path) as f:
+        assert f.read() == ''
+
+
+def test_convert_to_exclusive_waits_other_shared(locks):
+    lock = locks()
+    lock.acquire(shared=True)
+    other = locks()
+    other.acquire(shared=True)
+
+    with pytest.raises(LockTimeout):
+        lock.acquire(shared=False)
+
+    other.release()
+    lock.acquire(shared=False)
+    assert not lock.is_shared
+
+
+def test_release_allows_acquire(locks):
+    with locks():
+        pass
+
+    with locks() as lock:
+        assert lock.is_locked
+
+
+def test_waiter_relocks_replaced_lock_file(locks, lock_path):
+    holder = locks()
+    holder.acquire()
+    waiter = locks(timeout=5)
+    thread = threading.Thread(target=waiter.acquire)
+    thread.start()
+    while not os.path.exists(lock_path) or waiter._fd is None:  # pylint: disable=protected-access
+        pass
+
+    os.remove(lock_path)
+    holder.release()
+    thread.join()
+
+    assert waiter.is_locked
+    assert (os.fstat(waiter._fd).st_ino ==  # pylint: disable=protected-access
+            os.stat(lock_path).st_ino)
+
+
+def test_lock_directory_created(tmpdir):
+    with FileLock(str(tmpdir.join('cache', 'venv.lock'))) as lock:
+        assert lock.is_locked
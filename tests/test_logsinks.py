@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+import io
+import time
+import mock
+from virtualenvrunner.logsinks import (
+    LogFanout, FileSink, StdoutSink, RingBufferSink)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def test_fanout_buffers_until_size():
+    sink = mock.Mock()
+    fanout = LogFanout(buffer_size=10, flush_interval=100)
+    fanout.add_sink(sink)
+    fanout.write('12345')
+    assert not sink.write.called
+    fanout.write('67890')
+    sink.write.assert_called_once_with('1234567890')
+    sink.flush.assert_called_once_with()
+
+
+def test_fanout_flushes_after_interval():
+    sink = mock.Mock()
+    fanout = LogFanout(flush_interval=0)
+    fanout.add_sink(sink)
+    fanout.write('data')
+    sink.write.assert_called_once_with('data')
+
+
+def test_fanout_flushes_by_timer_when_silent():
+    sink = mock.Mock()
+    fanout = LogFanout(flush_interval=0.05)
+    fanout.add_sink(sink)
+    fanout.write('1')
+    fanout.write('2')
+    assert not sink.write.called
+
+    deadline = time.time() + 5
+    while not sink.write.called and time.time() < deadline:
+        time.sleep(0.01)
+
+    sink.write.assert_called_once_with('12')
+
+
+def test_fanout_flushes_on_sink_change():
+    sink1, sink2 = mock.Mock(), mock.Mock()
+    fanout = LogFanout(flush_interval=100)
+    fanout.add_sink(sink1)
+    fanout.write('1')
+    fanout.add_sink(sink2)
+    fanout.write('2')
+    fanout.remove_sink(sink1)
+    assert sink1.write.mock_calls == [mock.call('1'), mock.call('2')]
+    assert sink2.write.mock_calls == [mock.call('2')]
+
+
+def test_fanout_without_sinks_drops_data():
+    fanout = LogFanout()
+    fanout.write('data')
+    sink = mock.Mock()
+    fanout.add_sink(sink)
+    fanout.flush()
+    assert not sink.write.called
+
+
+def test_file_sink():
+    f = io.StringIO()
+    sink = FileSink(f)
+    sink.write(u'data')
+    sink.flush()
+    assert f.getvalue() == u'data'
+
+
+def test_stdout_sink(capsys):
+    StdoutSink().write('data')
+    assert capsys.readouterr()[0] == 'data'
+
+
+def test_ring_buffer_sink():
+    sink = RingBufferSink(maxlines=2)
+    sink.write('line1\nline2\nli')
+    sink.write('ne3\nline4')
+    assert sink.lines == ['line3\n', 'line4']
+    assert sink.getvalue() == 'line3\nline4'
@@ -0,0 +1,66 @@
+import threading
+import time
+import mock
+import pytest
+from virtualenvrunner.matrixrun import MatrixRun, MatrixResult
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class MockRunnerFactory(object):
+    def __init__(self, returncodes, delay=0):
+        self._returncodes = returncodes
+        self._delay = delay
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, python_version):
+        runner = mock.MagicMock()
+        runner.__enter__.side_effect = lambda: self._enter(runner)
+        runner.__exit__.side_effect = lambda *args: self._exit()
+        returncode = self._returncodes[python_version]
+        if isinstance(returncode, Exception):
+            runner.run.side_effect = returncode
+        else:
+            runner.run.return_value = returncode
+        return runner
+
+    def _enter(self, runner):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.running, self.max_running)
+        time.sleep(self._delay)
+        return runner
+
+    def _exit(self):
+        with self.lock:
+            self.running -= 1
+
+
+def test_matrixrun_results():
+    factory = MockRunnerFactory({'2.7': 0, '3.6': 1, '3.7': Exception('msg')})
+    results = MatrixRun(factory).run(['2.7', '3.6', '3.7'], ['cmd'])
+
+    assert [(r.python_version, r.returncode, r.error) for r in results] == [
+        ('2.7', 0, None), ('3.6', 1, None), ('3.7', None, 'Exception: msg')]
+    assert [r.success for r in results] == [True, False, False]
+
+
+@pytest.mark.parametrize('processes, expected_max_running', [
+    (None, 3), (1, 1), (2, 2)])
+def test_matrixrun_processes(processes, expected_max_running):
+    factory = MockRunnerFactory({'2.7': 0, '3.6': 0, '3.7': 0}, delay=0.1)
+    MatrixRun(factory, processes=processes).run(['2.7', '3.6', '3.7'], [])
+    assert factory.max_running == expected_max_running
+
+
+@pytest.mark.parametrize('returncode, error, expected', [
+    (0, None, 'python3.6: exit status 0 (1.50 s)'),
+    (None, 'Exception: msg', 'python3.6: Exception: msg (1.50 s)')])
+def test_matrixresult_str(returncode, error, expected):
+    assert str(MatrixResult(python_version='3.6',
+                            returncode=returncode,
+                            elapsed=1.5,
+                            error=error)) == expected
@@ -0,0 +1,108 @@
+import io
+import os
+import subprocess
+import sys
+import mock
+import pytest
+from virtualenvrunner.logsinks import FileSink
+from virtualenvrunner.outputstream import OutputStream, iter_chunks
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'),
+                                reason='POSIX shell commands')
+
+
+def test_stream_chunks():
+    with OutputStream('printf "a\\nb"; printf "c" >&2') as stream:
+        assert ''.join(stream) == 'a\nbc'
+
+    assert stream.returncode == 0
+
+
+def test_stream_lines():
+    stream = OutputStream('printf "a\\nb\\n\\nc"', lines=True)
+
+    assert list(stream) == ['a\n', 'b\n', '\n', 'c']
+
+
+def test_stream_lines_split_to_chunks():
+    stream = OutputStream('printf "first\\nsecond\\n"', lines=True,
+                          chunk_size=3)
+
+    assert list(stream) == ['first\n', 'second\n']
+
+
+def test_stream_multibyte_split_to_chunks():
+    stream = OutputStream('printf "\\303\\244\\303\\266"', chunk_size=1)
+
+    assert ''.join(stream) == u'\xe4\xf6'
+
+
+def test_stream_stderr_separately():
+    stream = OutputStream('echo out; echo err >&2', stderr=subprocess.PIPE)
+
+    assert ''.join(stream) == 'out\n'
+
+
+def test_stream_tail_bounded():
+    stream = OutputStream('seq 1 100', lines=True, tail_lines=3)
+
+    assert len(list(stream)) == 100
+    assert stream.tail == '98\n99\n100\n'
+
+
+def test_stream_tee():
+    f = io.StringIO()
+    stream = OutputStream('seq 1 3', tee=[FileSink(f)])
+
+    list(stream)
+
+    assert f.getvalue() == '1\n2\n3\n'
+
+
+def test_stream_tee_flushed_per_chunk():
+    f = io.StringIO()
+    stream = OutputStream('echo first; sleep 1; echo done', tee=[FileSink(f)])
+
+    assert [f.getvalue().endswith(item) for item in stream] == [True, True]
+
+
+def test_chunks_read_from_fd_without_read1():
+    r, w = os.pipe()
+    os.write(w, b'data')
+    os.close(w)
+    handle = mock.Mock(spec=['read', 'fileno'],
+                       fileno=lambda: r,
+                       read=mock.Mock(side_effect=AssertionError))
+    try:
+        assert list(iter_chunks(handle, 65536)) == [b'data']
+    finally:
+        os.close(r)
+
+
+def test_failed_command_raises_with_tail():
+    stream = OutputStream('echo first; echo last; exit 3', tail_lines=1)
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        list(stream)
+
+    assert excinfo.value.returncode == 3
+    assert excinfo.value.output == 'last\n'
+
+
+def test_closed_stream_kills_command():
+    with OutputStream('yes', lines=True, chunk_size=16) as stream:
+        assert next(stream) == 'y\n'
+
+    assert stream.returncode is not None
+    assert len(stream.tail) <= 16
+
+
+def test_stream_environment():
+    stream = OutputStream('echo $STREAM_VARIABLE',
+                          env={'STREAM_VARIABLE': 'value'})
+
+    assert ''.join(stream) == 'value\n'
@@ -0,0 +1,120 @@
+import os
+import re
+import threading
+import time
+import pytest
+from virtualenvrunner.prebuild import PrebuildResult, WheelPrebuild
+from virtualenvrunner.runner import Runner
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class RecordingRun(object):
+    def __init__(self, returncodes=None, delay=0):
+        self.requirements = {}
+        self.returncodes = returncodes or {}
+        self.delay = delay
+        self.max_running = 0
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, cmd):
+        with self._lock:
+            self._running += 1
+            self.max_running = max(self.max_running, self._running)
+        try:
+            path = re.match(r'pip wheel --no-deps -r (\S+)', cmd).group(1)
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(path) as f:
+                self.requirements[name] = f.read()
+            time.sleep(self.delay)
+            return self.returncodes.get(name, 0), '{} built\n'.format(name)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+
+@pytest.fixture
+def requirements(tmpdir):
+    def write(content):
+        path = tmpdir.join('requirements.txt')
+        path.write(content)
+        return str(path)
+
+    return write
+
+
+def create_prebuild(requirements, tmpdir, jobs=4):
+    return WheelPrebuild(requirements,
+                         wheel_dir=str(tmpdir.join('wheels')),
+                         jobs=jobs,
+                         pip_index_url='index')
+
+
+def test_wheel_cmd(tmpdir):
+    prebuild = create_prebuild('reqs', tmpdir)
+
+    assert prebuild.wheel_cmd('reqs') == (
+        'pip wheel --no-deps -r reqs -w {path} --find-links {path} '
+        '-i index'.format(path=prebuild.wheel_dir))
+
+
+def test_build_per_project_with_global_options(requirements, tmpdir):
+    tmpdir.join('base.txt').write('six\n')
+    run = RecordingRun()
+    prebuild = create_prebuild(
+        requirements('--pre\n-r base.txt\n-e .\n'
+                     'Foo_Bar==1.0 --hash=sha256:abc\n'
+                     'foo-bar==2.0; python_version < "3"\n'),
+        tmpdir)
+
+    results = prebuild.build(run)
+
+    assert results == [
+        PrebuildResult(prebuild.wheel_cmd(cmd.split()[4]), 0, output)
+        for cmd, output in [(results[0].cmd, 'foo-bar built\n'),
+                            (results[1].cmd, 'six built\n')]]
+    assert run.requirements == {
+        'foo-bar': ('--pre\nFoo_Bar==1.0 --hash=sha256:abc\n'
+                    'foo-bar==2.0; python_version < "3"\n'),
+        'six': '--pre\nsix\n'}
+    assert os.path.isdir(prebuild.wheel_dir)
+
+
+def test_build_failure_in_results(requirements, tmpdir):
+    results = create_prebuild(requirements('six\nattrs\n'), tmpdir).build(
+        RecordingRun(returncodes={'six': 1}))
+
+    assert [r.returncode for r in results] == [0, 1]
+
+
+@pytest.mark.parametrize('content', ['',
+                                     '-e .\n',
+                                     '-c constraints\nsix\n',
+                                     '-r missing\nsix\n'])
+def test_nothing_to_prebuild(requirements, tmpdir, content):
+    tmpdir.join('constraints').write('six==1.16.0\n')
+    run = RecordingRun()
+
+    assert not create_prebuild(requirements(content), tmpdir).build(run)
+    assert not run.requirements
+
+
+def test_builds_concurrently_at_most_jobs(requirements, tmpdir):
+    run = RecordingRun(delay=0.1)
+    create_prebuild(requirements('a\nb\nc\nd\ne\n'), tmpdir, jobs=2).build(
+        run)
+
+    assert len(run.requirements) == 5
+    assert run.max_running == 2
+
+
+@pytest.mark.parametrize('jobs', [0, -1])
+def test_non_positive_jobs_rejected(jobs):
+    with pytest.raises(ValueError) as excinfo:
+        WheelPrebuild('requirements.txt', 'wheels', jobs=jobs)
+    with pytest.raises(ValueError):
+        Runner().set_prebuild_jobs(jobs)
+
+    assert 'must be positive' in str(excinfo.value)
@@ -0,0 +1,177 @@
+import os
+import pytest
+from virtualenvrunner.requirements import (
+    RequirementsFiles,
+    RequirementsSnapshot)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def write(path, content):
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+@pytest.fixture
+def nested_requirements(tmpdir):
+    with tmpdir.as_cwd():
+        os.makedirs('sub')
+        write('requirements.txt',
+              'pkg1==1.0\n'
+              '-r sub/base.txt  # comment\n'
+              '--constraint=constraints.txt\n')
+        write(os.path.join('sub', 'base.txt'),
+              'pkg2\n'
+              '-r../requirements.txt\n'
+              '--requirement more.txt\n')
+        write(os.path.join('sub', 'more.txt'), 'pkg3\n')
+        write('constraints.txt', 'pkg2<2\n')
+        yield tmpdir
+
+
+def test_files_with_nested_includes(nested_requirements):
+    assert [f.path for f in RequirementsFiles('requirements.txt').files] == [
+        'requirements.txt',
+        os.path.join('sub', 'base.txt'),
+        os.path.join('sub', 'more.txt'),
+        'constraints.txt']
+
+
+def test_digest_changes_with_included_file(nested_requirements):
+    digest = RequirementsFiles('requirements.txt').digest()
+    assert RequirementsFiles('requirements.txt').digest() == digest
+    write(os.path.join('sub', 'more.txt'), 'pkg3==2.0\n')
+    assert RequirementsFiles('requirements.txt').digest() != digest
+
+
+def test_digest_with_extras(nested_requirements):
+    assert (RequirementsFiles('requirements.txt').digest('python2') !=
+            RequirementsFiles('requirements.txt').digest('python3'))
+
+
+def test_url_include_not_fetched(tmpdir):
+    with tmpdir.as_cwd():
+        write('requirements.txt', '-r https://example.com/reqs.txt\n')
+        digest = RequirementsFiles('requirements.txt').digest()
+        write('requirements.txt', '-r https://example.com/other.txt\n')
+
+        assert [f.path for f in RequirementsFiles('requirements.txt').files] == [
+            'requirements.txt']
+        assert RequirementsFiles('requirements.txt').digest() != digest
+
+
+def test_missing_include_raises(tmpdir):
+    with tmpdir.as_cwd():
+        write('requirements.txt', '-r missing.txt\n')
+        with pytest.raises(IOError):
+            RequirementsFiles('requirements.txt').files
+
+
+def create_snapshot(content, extras=()):
+    write('requirements.txt', content)
+    return RequirementsSnapshot.from_files('requirements.txt', extras=extras)
+
+
+def test_snapshot_lines(tmpdir):
+    with tmpdir.as_cwd():
+        snapshot = create_snapshot(
+            '# comment\n'
+            'Pkg_One[extra]==1.0  # pinned\n'
+            'pkg-one; python_version < "3"\n'
+            'pkg2 \\\n'
+            '    >=2.0\n'
+            '--find-links wheels\n'
+            '-e ./local\n'
+            'https://example.com/pkg3.tar.gz#egg=pkg3\n')
+
+    assert snapshot.requirements == {
+        'pkg-one': ['Pkg_One[extra]==1.0',
+                    'pkg-one; python_version < "3"'],
+        'pkg2': ['pkg2     >=2.0']}
+    assert snapshot.options == [
+        '--find-links wheels',
+        '-e ./local',
+        'https://example.com/pkg3.tar.gz#egg=pkg3']
+
+
+def test_diff_of_changed_requirements(tmpdir):
+    with tmpdir.as_cwd():
+        previous = create_snapshot('-i http://index\npkg1==1.0\npkg2\n'
+                                   'pkg3\n')
+        diff = create_snapshot('-i http://index\npkg1==1.1\npkg3  # c\n'
+                               'pkg4\n').diff(previous)
+
+    assert diff.options == ['-i http://index']
+    assert diff.install == ['pkg1==1.1', 'pkg4']
+    assert diff.uninstall == ['pkg2']
+    assert not diff.is_empty
+
+
+def test_diff_written_as_requirements(tmpdir):
+    with tmpdir.as_cwd():
+        write('other.txt', 'pkg2\n')
+        previous = create_snapshot('--pre\n-r other.txt\npkg1\n')
+        create_snapshot('--pre\n-r other.txt\npkg1>1\n').diff(
+            previous).write('diff.txt')
+
+        with open('diff.txt') as f:
+            assert f.read() == '--pre\npkg1>1\n'
+
+
+def test_diff_of_unchanged_requirements_is_empty(tmpdir):
+    with tmpdir.as_cwd():
+        previous = create_snapshot('pkg1\n')
+
+        assert create_snapshot('# comment\npkg1\n').diff(previous).is_empty
+
+
+@pytest.mark.parametrize('previous_content, content, extras', [
+    ('pkg1\n', '--pre\npkg1\n', ()),
+    ('pkg1\n', 'pkg1\n', ('http://index',)),
+    ('-c constraints.txt\npkg1\n', '-c constraints.txt\npkg1>1\n', ())])
+def test_diff_not_incremental(tmpdir, previous_content, content, extras):
+    with tmpdir.as_cwd():
+        write('constraints.txt', 'pkg1<2\n')
+        previous = create_snapshot(previous_content)
+
+        assert create_snapshot(content, extras=extras).diff(previous) is None
+
+
+def test_snapshot_saved_and_loaded(tmpdir):
+    with tmpdir.as_cwd():
+        snapshot = create_snapshot('--pre\npkg1\n', extras=['index'])
+        snapshot.save('snapshot')
+        loaded = RequirementsSnapshot.load('snapshot')
+
+    assert loaded.options == snapshot.options
+    assert loaded.requirements == snapshot.requirements
+    assert loaded.extras == snapshot.extras
+
+
+@pytest.mark.parametrize('content', [None, 'corrupted', '{}'])
+def test_snapshot_load_fails(tmpdir, content):
+    with tmpdir.as_cwd():
+        if content is not None:
+            write('snapshot', content)
+
+        assert RequirementsSnapshot.load('snapshot') is None
+
+
+def test_snapshot_anchors_relative_paths(tmpdir):
+    tmpdir.join('reqs', 'local', 'setup.py').write('', ensure=True)
+    tmpdir.join('reqs', 'wheels').ensure(dir=True)
+    tmpdir.join('reqs', 'requirements.txt').write(
+        '-e ./local[extra]\n'
+        '--find-links=wheels\n'
+        '-f missing\n'
+        '-e git+https://example.com/pkg.git#egg=pkg\n')
+    with tmpdir.as_cwd():
+        snapshot = RequirementsSnapshot.from_files(
+            os.path.join('reqs', 'requirements.txt'))
+
+    assert snapshot.options == [
+        '-e {}[extra]'.format(tmpdir.join('reqs', 'local')),
+        '--find-links={}'.format(tmpdir.join('reqs', 'wheels')),
+        '-f missing',
+        '-e git+https://example.com/pkg.git#egg=pkg']
@@ -1,8 +1,12 @@
 # pylint: disable=unused-argument
 from __future__ import print_function
+import importlib
 import tempfile
+import shutil
+import subprocess
 import os
 import sys
+import time
 from collections import namedtuple
 import pytest
 import mock
@@ -11,6 +15,7 @@ from fixtureresources.fixtures import (  # pylint: disable=unused-import
     create_patch,
     mock_os_path_isfile)
 from fixtureresources.mockfile import MockFile
+from virtualenvrunner.logsinks import RingBufferSink
 from virtualenvrunner.runner import (
     Runner, TmpVenvRunner, VerboseRunner, RunnerInstallationFailed)
 
@@ -87,12 +92,12 @@ def mock_requirements_log_file_raises_tmpdir(request, tmpdir):
 def test_init_without_none(mock_run):
     runner = Runner(virtualenv_dir='virtualenv_dir',
                     virtualenv_reqs='virtualenv_reqs',
-                    virtualenv_pythonexe='virtualenv_pythonexe',
+                    virtualenv_pythonexe=os.path.join('bin', 'pythonexe'),
                     pip_index_url='pip_index_url',
                     run=mock_run)
     assert runner.virtualenv_dir == 'virtualenv_dir'
     assert runner.virtualenv_reqs == 'virtualenv_reqs'
-    assert runner.virtualenv_pythonexe == 'virtualenv_pythonexe'
+    assert runner.virtualenv_pythonexe == os.path.join('bin', 'pythonexe')
     assert runner.pip_index_url == 'pip_index_url'
 
 
@@ -119,9 +124,11 @@ def test_tmpvenv_runner(mock_tempfile_mkdtemp,
 def test_tmpvenv_runner_existing_venv(mock_os_path_isfile,
                                       mock_subprocess_check_call,
                                       mock_activateenv,
-                                      mock_shutil_rmtree):
-    with TmpVenvRunner(virtualenv_dir='d') as runner:
-        runner.run('cmd')
+                                      mock_shutil_rmtree,
+                                      tmpdir):
+    with tmpdir.as_cwd():
+        with TmpVenvRunner(virtualenv_dir='d') as runner:
+            runner.run('cmd')
 
     assert (mock_subprocess_check_call.mock_calls[0] ==
             mock.call('cmd', shell=True, env={'name': 'value'}, stdout=None))
@@ -131,9 +138,11 @@ def test_tmpvenv_runner_existing_venv(mock_os_path_isfile,
 
 def test_runner(mock_os_path_isfile,
                 mock_subprocess_check_call,
-                mock_activateenv):
-    with Runner() as runner:
-        runner.run('cmd')
+                mock_activateenv,
+                tmpdir):
+    with tmpdir.as_cwd():
+        with Runner() as runner:
+            runner.run('cmd')
 
     assert (mock_subprocess_check_call.mock_calls[0] ==
             mock.call('cmd', shell=True, env={'name': 'value'}, stdout=None))
@@ -143,9 +152,11 @@ def test_runner_changed_run(mock_tempfile_mkdtemp,
                             mock_shutil_rmtree,
                             mock_run,
                             mock_os_path_isfile,
-                            mock_activateenv):
-    with Runner(run=mock_run) as runner:
-        runner.run('cmd')
+                            mock_activateenv,
+                            tmpdir):
+    with tmpdir.as_cwd():
+        with Runner(run=mock_run) as runner:
+            runner.run('cmd')
 
     assert (mock_run.mock_calls[0] ==
             mock.call('cmd', env={'name': 'value'}))
@@ -179,7 +190,7 @@ def test_create_environment(mock_subprocess_check_call,
 
         _, args, _ = patchermock_real.patch.mock_calls[0]
         assert args[0] == 'virtualenv --no-download -p python {}'.format(
-            os.path.join(os.getcwd(), '.venv'))
+            os.path.join(os.getcwd(), '.venv.staging'))
         assert (mock_subprocess_check_call.mock_calls[0] ==
                 mock.call('cmd', shell=True, env={'name': 'value'},
                           stdout=None))
@@ -226,9 +237,11 @@ def test_install_requirements_from_index(
             with Runner(pip_index_url='pip_index_url',
                         virtualenv_reqs='virtualenv_reqs') as runner:
                 runner_log_file = runner.requirements_log_file
+                staging_dir = runner.staging_dir
 
     _, args, kwargs = patchermock_real.patch.mock_calls[1]
-    assert kwargs['env'] == runner.env
+    assert kwargs['env']['PATH'].startswith(
+        os.path.join(staging_dir, runner.virtualenv_bin))
     assert args == ('pip install -r virtualenv_reqs -i pip_index_url',)
     assert kwargs['shell']
     with open(runner_log_file) as f:
@@ -247,8 +260,10 @@ def test_remove_virtualenv(mock_shutil_rmtree,
                            mock_os_path_isfile,
                            mock_subprocess_check_call):
     Runner().remove_virtualenv()
-    mock_shutil_rmtree.assert_called_once_with(
-        os.path.join(os.getcwd(), '.venv'), ignore_errors=True)
+    assert mock_shutil_rmtree.mock_calls == [
+        mock.call(os.path.join(os.getcwd(), '.venv'), ignore_errors=True),
+        mock.call(os.path.join(os.getcwd(), '.venv.staging'),
+                  ignore_errors=True)]
 
 
 def test_verbose_runner(mock_subprocess_check_call,
@@ -309,3 +324,141 @@ def test_install_command_fail(tmpdir,
 
     assert str(excinfo.value).startswith("Command execution of 'virtualenv")
     assert str(excinfo.value).endswith("' failed with exit status 1")
+
+
+def test_log_sink_receives_install_log(patchermock_real, tmpdir):
+    sink = RingBufferSink()
+    with tmpdir.as_cwd():
+        runner = Runner(virtualenv_reqs='virtualenv_reqs')
+        runner.add_log_sink(sink)
+        with runner:
+            pass
+
+    assert 'pip install out\n' in sink.lines
+    assert 'reqspec1\n' in sink.lines
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason='POSIX shell')
+def test_install_log_flushed_when_silent():
+    written = []
+    runner = Runner()
+    runner.add_log_sink(mock.Mock(
+        write=lambda data: written.append((time.time(), data))))
+    start = time.time()
+
+    runner._run_in_install(  # pylint: disable=protected-access
+        'echo first; sleep 1; echo done')
+
+    assert [data for _, data in written] == ['first\n', 'done\n']
+    assert written[0][0] - start < 0.9
+
+
+def test_decoded_multibyte_split_to_chunks():
+    data = u'ä€'.encode('utf-8')
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert u''.join(
+        Runner._decoded(chunks)) == u'ä€'  # pylint: disable=protected-access
+
+
+@pytest.mark.parametrize('files, exists', [
+    ([os.path.join('bin', 'activate_this.py')], True),
+    (['pyvenv.cfg', os.path.join('bin', 'pip')], True),
+    (['pyvenv.cfg'], False)])
+def test_virtualenv_exists(tmpdir, files, exists):
+    for f in files:
+        tmpdir.join('venv', f).ensure()
+    runner = Runner(virtualenv_dir=str(tmpdir.join('venv')))
+
+    assert runner.virtualenv_exists == exists
+
+
+def test_timing_records_of_setup_phases(tmpdir, patchermock_real,
+                                        mock_subprocess_check_call):
+    records = []
+    with tmpdir.as_cwd():
+        runner = Runner(virtualenv_reqs='virtualenv_reqs')
+        runner.set_timing(callback=records.append)
+        with runner:
+            runner.run('cmd')
+        virtualenv_dir = runner.virtualenv_dir
+
+    assert records[0]['command'].startswith('virtualenv ')
+    assert [(r['phase'], r.get('command')) for r in records[1:]] == [
+        ('create_virtualenv', None),
+        ('pydistutilscfg', None),
+        ('activate', None),
+        ('command', 'pip install -r virtualenv_reqs'),
+        ('install', None),
+        ('command', 'pip freeze'),
+        ('freeze', None),
+        ('relocate', None),
+        ('publish', None),
+        ('setup', None),
+        ('run', 'cmd')]
+    assert all(r['virtualenv_dir'] == virtualenv_dir for r in records)
+
+
+def create_worker_virtualenv(virtualenv_dir):
+    bindir = os.path.join(virtualenv_dir, Runner.virtualenv_bin)
+    os.makedirs(bindir)
+    shutil.copy(os.path.join(os.path.dirname(__file__), 'mockvenv', 'bin',
+                             'activate_this.py'), bindir)
+    os.symlink(sys.executable, os.path.join(bindir, 'python'))
+
+
+def test_execute_in_worker_of_virtualenv(tmpdir, capfd):
+    virtualenv_dir = str(tmpdir.join('venv'))
+    create_worker_virtualenv(virtualenv_dir)
+    with Runner(virtualenv_dir=virtualenv_dir) as runner:
+        runner.execute('import os, sys; print(os.environ["PATH"])')
+        runner.execute('import sys; print(sys.executable)')
+        worker = runner.worker
+        pid = worker.pid
+
+    out = capfd.readouterr().err.splitlines()
+    assert out[0].startswith(os.path.join(virtualenv_dir, 'bin'))
+    assert out[1] == os.path.join(virtualenv_dir, 'bin', 'python')
+    assert pid is not None
+    assert not worker.is_alive
+
+
+def test_worker_max_requests(tmpdir):
+    virtualenv_dir = str(tmpdir.join('venv'))
+    create_worker_virtualenv(virtualenv_dir)
+    with Runner(virtualenv_dir=virtualenv_dir) as runner:
+        runner.set_worker_max_requests(1)
+        runner.execute('pass')
+        assert not runner.worker.is_alive
+
+
+def test_call_in_worker_of_virtualenv(tmpdir):
+    virtualenv_dir = str(tmpdir.join('venv'))
+    create_worker_virtualenv(virtualenv_dir)
+    with Runner(virtualenv_dir=virtualenv_dir) as runner:
+        assert runner.call(os.getenv, 'PATH').startswith(
+            os.path.join(virtualenv_dir, 'bin'))
+        with pytest.raises(ImportError):
+            runner.call(importlib.import_module, 'not_existing_module')
+        assert runner.call(os.getpid) == runner.worker.pid
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'),
+                    reason='POSIX shell commands')
+def test_stream_in_virtualenv(tmpdir):
+    virtualenv_dir = str(tmpdir.join('venv'))
+    create_worker_virtualenv(virtualenv_dir)
+    with Runner(virtualenv_dir=virtualenv_dir) as runner:
+        stream = runner.stream('echo $PATH; exit 1', lines=True)
+        with pytest.raises(subprocess.CalledProcessError):
+            lines = []
+            for line in stream:
+                lines.append(line)
+
+    assert lines[0].startswith(os.path.join(virtualenv_dir, 'bin'))
+    assert stream.tail == lines[0]
+
+
+def test_runner_marks_virtualenv_used(cache_requirements, patchermock_real):
+    with Runner(virtualenv_reqs='requirements.txt') as runner:
+        assert os.path.isfile(os.path.join(runner.virtualenv_dir,
+                                           '.virtualenvrunner_last_used'))
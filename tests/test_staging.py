@@ -0,0 +1,245 @@
+# pylint: disable=unused-argument
+import os
+import pytest
+import mock
+from virtualenvrunner.locking import FileLock, LockTimeout
+from virtualenvrunner.runner import (
+    Runner, TmpVenvRunner, RunnerInstallationFailed)
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def test_runner_holds_shared_lock_in_context(cache_requirements,
+                                             patchermock_real):
+    with Runner(virtualenv_reqs='requirements.txt') as runner:
+        with pytest.raises(LockTimeout):
+            FileLock(runner.lock_path, timeout=0).acquire()
+        lock = FileLock(runner.lock_path, timeout=0)
+        lock.acquire(shared=True)
+        lock.release()
+
+    with FileLock(runner.lock_path, timeout=0):
+        pass
+
+
+def test_up_to_date_runner_skips_exclusive_lock(cache_requirements,
+                                                patchermock_real):
+    with Runner(virtualenv_reqs='requirements.txt'):
+        runner = Runner(virtualenv_reqs='requirements.txt')
+        runner.set_lock_timeout(0)
+        with runner:
+            assert not runner.setup_modifies_virtualenv
+
+
+def test_installing_runner_not_waiting_users(cache_requirements,
+                                             patchermock_real):
+    with Runner(virtualenv_reqs='requirements.txt'):
+        runner = Runner(virtualenv_reqs='requirements.txt',
+                        virtualenv_reqs_upd='true')
+        runner.set_lock_timeout(0)
+        with runner:
+            with pytest.raises(LockTimeout):
+                FileLock(runner.lock_path, timeout=0).acquire()
+
+    assert '--upgrade' in patchermock_real.pip_commands[2]
+
+
+def test_installing_runner_waits_setup_lock(cache_requirements,
+                                            patchermock_real):
+    with Runner(virtualenv_reqs='requirements.txt'):
+        pass
+    runner = Runner(virtualenv_reqs='requirements.txt',
+                    virtualenv_reqs_upd='true')
+    runner.set_lock_timeout(0)
+    with FileLock(runner.setup_lock_path):
+        with pytest.raises(LockTimeout):
+            with runner:
+                pass
+
+    with FileLock(runner.lock_path, timeout=0):
+        pass
+
+
+def test_setup_evaluated_again_after_setup_lock(cache_requirements,
+                                                patchermock_real):
+    # pylint: disable=protected-access
+    runner = Runner(virtualenv_reqs='requirements.txt')
+    with mock.patch.object(runner, '_setup_mutex_if_needed',
+                           side_effect=simulate_concurrent_setup(
+                               runner._setup_mutex_if_needed)):
+        with runner:
+            pass
+
+    assert patchermock_real.pip_commands == [
+        'pip install -r requirements.txt', 'pip freeze']
+
+
+def simulate_concurrent_setup(setup_mutex_if_needed):
+    def setup_while_waiting():
+        with Runner(virtualenv_reqs='requirements.txt'):
+            pass
+        return setup_mutex_if_needed()
+
+    return setup_while_waiting
+
+
+def test_lock_released_if_setup_fails(tmpdir, mock_subprocess_popen_fail):
+    with tmpdir.as_cwd():
+        runner = Runner(virtualenv_reqs='virtualenv_reqs')
+        with pytest.raises(RunnerInstallationFailed):
+            with runner:
+                pass
+
+        with FileLock(runner.lock_path, timeout=0):
+            pass
+
+
+def test_tmpvenv_runner_without_lock():
+    assert TmpVenvRunner().lock_path is None
+
+
+def write_script_to_setup_dir(runner):
+    def install():
+        with open(os.path.join(runner.setup_dir, runner.virtualenv_bin,
+                               'script'), 'w') as f:
+            f.write('#!{}\n'.format(runner.setup_dir))
+    return install
+
+
+def test_staging_published_after_setup(tmpdir, patchermock_real):
+    with tmpdir.as_cwd():
+        runner = Runner(virtualenv_reqs='virtualenv_reqs')
+        patchermock_real.mock.pip_side_effect = write_script_to_setup_dir(
+            runner)
+        with runner:
+            assert not os.path.exists(runner.staging_dir)
+            assert os.path.isfile(runner.completion_marker)
+            assert runner.env['PATH'].startswith(
+                os.path.join(runner.virtualenv_dir, runner.virtualenv_bin))
+            with open(os.path.join(runner.virtualenv_dir,
+                                   runner.virtualenv_bin, 'script')) as f:
+                assert f.read() == '#!{}\n'.format(runner.virtualenv_dir)
+
+
+def create_runner(cache_root, **kwargs):
+    runner = Runner(**kwargs)
+    runner.set_cache_root(cache_root)
+    return runner
+
+
+@pytest.mark.parametrize('cache_root', [None, 'cache'])
+def test_failed_setup_staging_reused(cache_requirements,
+                                     patchermock_real,
+                                     mock_interpreter_id,
+                                     cache_root):
+    patchermock_real.mock.returncode = 0
+    runner = create_runner(cache_root, virtualenv_reqs='requirements.txt')
+
+    def fail():
+        patchermock_real.mock.returncode = 1
+
+    patchermock_real.mock.pip_side_effect = fail
+    with pytest.raises(RunnerInstallationFailed):
+        with runner:
+            pass
+    assert not os.path.exists(runner.virtualenv_dir)
+    assert os.path.isfile(os.path.join(
+        runner.staging_dir, runner.virtualenv_bin, 'activate_this.py'))
+    patchermock_real.mock.returncode = 0
+    patchermock_real.mock.pip_side_effect = None
+    patchermock_real.patch.reset_mock()
+
+    with create_runner(cache_root,
+                       virtualenv_reqs='requirements.txt') as runner:
+        assert os.path.isfile(runner.completion_marker)
+
+    assert patchermock_real.pip_commands == [
+        'pip install -r requirements.txt', 'pip freeze']
+    assert not any(args[0].startswith('virtualenv')
+                   for _, args, _ in patchermock_real.patch.mock_calls)
+
+
+@pytest.mark.parametrize('cache_root', [None, 'cache'])
+def test_relocated_staging_published_without_setup(cache_requirements,
+                                                   patchermock_real,
+                                                   mock_interpreter_id,
+                                                   cache_root):
+    staging_dir = create_runner(cache_root).staging_dir
+    os.makedirs(os.path.join(staging_dir, Runner.virtualenv_bin))
+    for name in ['.virtualenvrunner_complete',
+                 os.path.join(Runner.virtualenv_bin, 'activate_this.py')]:
+        open(os.path.join(staging_dir, name), 'w').close()
+
+    with mock.patch('virtualenvrunner.runner.ActivateEnv'):
+        with create_runner(cache_root) as runner:
+            assert os.path.isfile(runner.activate_this)
+            assert os.path.isfile(runner.completion_marker)
+            assert not os.path.exists(staging_dir)
+
+    assert not patchermock_real.patch.called
+
+
+def test_legacy_virtualenv_used_in_place(tmpdir, patchermock_real):
+    with tmpdir.as_cwd():
+        with Runner() as runner:
+            os.remove(runner.completion_marker)
+        patchermock_real.patch.reset_mock()
+
+        with Runner() as runner:
+            assert not os.path.exists(runner.staging_dir)
+
+    assert not patchermock_real.patch.called
+
+
+def create_lazy_runner(runner_cls=Runner, **kwargs):
+    runner = runner_cls(virtualenv_reqs='requirements.txt',
+                        run=mock.Mock(return_value=0),
+                        **kwargs)
+    runner.set_lazy_setup(True)
+    return runner
+
+
+def test_lazy_setup_without_run(cache_requirements, patchermock_real):
+    with create_lazy_runner() as runner:
+        assert runner.setup_pending
+
+    assert not runner.setup_pending
+    assert not patchermock_real.patch.called
+    assert not os.path.exists(runner.virtualenv_dir)
+    assert not os.path.exists(runner.lock_path)
+
+
+def test_lazy_setup_on_first_run(cache_requirements, patchermock_real):
+    with create_lazy_runner() as runner:
+        assert not patchermock_real.patch.called
+        runner.run('cmd1')
+        assert not runner.setup_pending
+        runner.run('cmd2')
+        env = runner.env
+
+    assert patchermock_real.pip_commands == [
+        'pip install -r requirements.txt', 'pip freeze']
+    assert runner._run.mock_calls == [  # pylint: disable=protected-access
+        mock.call('cmd1', env=env), mock.call('cmd2', env=env)]
+
+
+def test_lazy_setup_failure_raised_from_run(cache_requirements,
+                                            patchermock_real):
+    patchermock_real.mock.returncode = 1
+    with create_lazy_runner() as runner:
+        with pytest.raises(RunnerInstallationFailed):
+            runner.run('cmd')
+        assert runner.setup_pending
+        patchermock_real.mock.returncode = 0
+        runner.run('cmd')
+
+    assert runner._run.call_count == 1  # pylint: disable=protected-access
+
+
+def test_lazy_tmpvenv_runner_without_run(patchermock_real):
+    with create_lazy_runner(TmpVenvRunner) as runner:
+        pass
+
+    assert runner._tmp_virtualenv_dir is None  # pylint: disable=protected-access
+    assert not patchermock_real.patch.called
@@ -0,0 +1,39 @@
+import json
+import pytest
+from virtualenvrunner.timing import PhaseTimer
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class ExpectedException(Exception):
+    pass
+
+
+def test_phase_record_to_file_and_callback(tmpdir):
+    path = str(tmpdir.join('timing.jsonl'))
+    records = []
+    timer = PhaseTimer(path=path, callback=records.append)
+
+    with timer.phase('first', command='cmd'):
+        pass
+    with pytest.raises(ExpectedException):
+        with timer.phase('second'):
+            raise ExpectedException()
+
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    assert lines == records
+    assert [(r['phase'], r['status']) for r in records] == [
+        ('first', 'ok'), ('second', 'error')]
+    assert records[0]['command'] == 'cmd'
+    assert records[0]['elapsed'] >= 0
+    assert set(records[0]) == {'phase', 'start', 'elapsed', 'status', 'pid',
+                               'command'}
+
+
+def test_disabled_timer_emits_nothing():
+    timer = PhaseTimer()
+    with timer.phase('phase'):
+        pass
+    assert not timer.is_enabled
@@ -0,0 +1,31 @@
+import sys
+import os
+from virtualenvrunner.venvcache import VirtualenvCache
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+def test_interpreter_id():
+    interpreter_id = VirtualenvCache('cache').get_interpreter_id(
+        sys.executable)
+    assert sys.platform in interpreter_id
+    assert os.path.realpath(sys.executable) in interpreter_id
+
+
+def test_virtualenv_dir_without_requirements():
+    cache = VirtualenvCache('cache')
+    cache.get_interpreter_id = lambda pythonexe: pythonexe
+    assert (cache.get_virtualenv_dir(None, 'python2') !=
+            cache.get_virtualenv_dir(None, 'python3'))
+    assert os.path.dirname(cache.get_virtualenv_dir(None, 'python')) == 'cache'
+
+
+def test_virtualenv_dir_with_index_and_update():
+    cache = VirtualenvCache('cache')
+    cache.get_interpreter_id = lambda pythonexe: pythonexe
+    dirs = [cache.get_virtualenv_dir(None, 'python'),
+            cache.get_virtualenv_dir(None, 'python', pip_index_url='index'),
+            cache.get_virtualenv_dir(None, 'python', update=True)]
+
+    assert len(set(dirs)) == 3
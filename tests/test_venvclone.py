@@ -0,0 +1,164 @@
+import os
+import sys
+import mock
+import pytest
+from virtualenvrunner.fingerprint import RequirementsFingerprint
+from virtualenvrunner.venvclone import VirtualenvClone
+from virtualenvrunner.runner import Runner, TmpVenvRunner
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+pytestmark = pytest.mark.skipif(sys.platform.startswith('win'),
+                                reason='symlinks in template')
+
+
+@pytest.fixture
+def template(tmpdir):
+    t = tmpdir.join('template')
+    path = str(t)
+    t.join('bin', 'script').write(
+        '#!{}/bin/python\nimport pkg\n'.format(path), ensure=True)
+    t.join('bin', 'activate_this.py').write('import os\n')
+    t.join('bin', 'binary').write_binary(
+        b'\0' + path.encode('utf-8'))
+    os.symlink(sys.executable, str(t.join('bin', 'python')))
+    os.symlink(os.path.join(path, 'bin', 'script'),
+               str(t.join('bin', 'script-link')))
+    site_packages = t.join('lib', 'python', 'site-packages')
+    site_packages.join('pkg', '__init__.py').write('value = 1\n',
+                                                   ensure=True)
+    site_packages.join('pkg.pth').write('{}/src\n'.format(path))
+    os.symlink('lib', str(t.join('lib64')))
+    t.join('pyvenv.cfg').write('command = virtualenv {}\n'.format(path))
+    t.join('.virtualenvrunner_requirements.log').write('log\n')
+    return t
+
+
+def read(*paths):
+    with open(os.path.join(*paths)) as f:
+        return f.read()
+
+
+def is_same_file(path1, path2):
+    return os.stat(path1).st_ino == os.stat(path2).st_ino
+
+
+def test_clone_fixups(template, tmpdir):
+    target = str(tmpdir.join('target'))
+    VirtualenvClone(str(template), link_mode='copy').clone(target)
+
+    assert read(target, 'bin', 'script') == (
+        '#!{}/bin/python\nimport pkg\n'.format(target))
+    assert os.access(os.path.join(target, 'bin', 'script'), os.X_OK) == (
+        os.access(str(template.join('bin', 'script')), os.X_OK))
+    assert read(target, 'pyvenv.cfg') == 'command = virtualenv {}\n'.format(
+        target)
+    assert read(target, 'lib', 'python', 'site-packages', 'pkg.pth') == (
+        '{}/src\n'.format(target))
+    assert os.readlink(os.path.join(target, 'bin', 'python')) == (
+        sys.executable)
+    assert os.readlink(os.path.join(target, 'bin', 'script-link')) == (
+        os.path.join(target, 'bin', 'script'))
+    assert os.readlink(os.path.join(target, 'lib64')) == 'lib'
+    with open(os.path.join(target, 'bin', 'binary'), 'rb') as f:
+        assert f.read() == b'\0' + str(template).encode('utf-8')
+
+
+def test_relocate_in_place(template, tmpdir):
+    target = str(tmpdir.join('target'))
+    script = str(template.join('bin', 'script'))
+    mode = os.stat(script).st_mode
+
+    VirtualenvClone(str(template)).relocate(target)
+
+    assert read(script) == '#!{}/bin/python\nimport pkg\n'.format(target)
+    assert os.stat(script).st_mode == mode
+    assert read(str(template.join('pyvenv.cfg'))) == (
+        'command = virtualenv {}\n'.format(target))
+    assert os.readlink(str(template.join('bin', 'script-link'))) == (
+        os.path.join(target, 'bin', 'script'))
+    assert os.readlink(str(template.join('lib64'))) == 'lib'
+    assert os.readlink(str(template.join('bin', 'python'))) == sys.executable
+
+
+@pytest.mark.parametrize('link_mode, expected_same', [
+    ('hardlink', True), ('copy', False)])
+def test_clone_link_mode(template, tmpdir, link_mode, expected_same):
+    target = str(tmpdir.join('target'))
+    VirtualenvClone(str(template), link_mode=link_mode).clone(target)
+
+    module = os.path.join('lib', 'python', 'site-packages', 'pkg',
+                          '__init__.py')
+    assert is_same_file(str(template.join(module)),
+                        os.path.join(target, module)) == expected_same
+    assert not is_same_file(
+        str(template.join('.virtualenvrunner_requirements.log')),
+        os.path.join(target, '.virtualenvrunner_requirements.log'))
+
+
+def test_clone_auto_falls_back_to_copy(template, tmpdir):
+    target = str(tmpdir.join('target'))
+    with mock.patch('os.link', side_effect=OSError(18, 'EXDEV')):
+        clone = VirtualenvClone(str(template))
+        clone._methods[0] = mock.Mock(side_effect=OSError(95, 'EOPNOTSUPP'))  # pylint: disable=protected-access
+        clone.clone(target)
+
+    assert read(target, 'lib', 'python', 'site-packages', 'pkg',
+                '__init__.py') == 'value = 1\n'
+
+
+def test_unknown_link_mode():
+    with pytest.raises(ValueError):
+        VirtualenvClone('template', link_mode='unknown')
+
+
+def test_tmpvenv_runner_from_template(template,
+                                      mock_subprocess_popen,
+                                      mock_subprocess_check_call):
+    runner = TmpVenvRunner()
+    runner.set_template_virtualenv(str(template))
+    with runner:
+        runner.run('cmd')
+        assert read(runner.virtualenv_dir, 'bin', 'script').startswith(
+            '#!{}/bin/python'.format(runner.virtualenv_dir))
+
+    assert not mock_subprocess_popen.called
+    assert not os.path.exists(runner.virtualenv_dir)
+
+
+@pytest.fixture
+def installed_template(template, tmpdir):
+    requirements = tmpdir.join('requirements.txt')
+    requirements.write('pkg\n')
+    RequirementsFingerprint(
+        str(template.join('.virtualenvrunner_requirements.fingerprint')),
+        str(template),
+        str(requirements),
+        extras=['']).save()
+    return template, str(requirements)
+
+
+def test_tmpvenv_runner_from_installed(installed_template,
+                                       mock_subprocess_popen,
+                                       mock_subprocess_check_call):
+    template, requirements = installed_template
+    runner = TmpVenvRunner(virtualenv_reqs=requirements)
+    runner.set_template_virtualenv(str(template))
+    with runner:
+        runner.run('cmd')
+
+    assert not mock_subprocess_popen.called
+
+
+def test_changed_requirements_installed(installed_template, tmpdir):
+    template, requirements = installed_template
+    with open(requirements, 'a') as f:
+        f.write('other\n')
+    runner = Runner(virtualenv_dir=str(tmpdir.join('venv')),
+                    virtualenv_reqs=requirements)
+    runner.set_template_virtualenv(str(template))
+    runner._create_virtualenv()  # pylint: disable=protected-access
+
+    assert runner.virtualenv_is_volatile
@@ -0,0 +1,104 @@
+# pylint: disable=unused-argument
+import os
+import time
+import mock
+import pytest
+from virtualenvrunner.venvpool import VirtualenvPool, PooledTmpVenvRunner
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+class MockBuildRunner(object):
+    def __init__(self, virtualenv_dir, error=None):
+        self._virtualenv_dir = virtualenv_dir
+        self._error = error
+
+    def __enter__(self):
+        if self._error:
+            raise self._error
+        with open(os.path.join(self._virtualenv_dir, 'built'), 'w'):
+            pass
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_tmpdir_tempfile(tmpdir):
+    with mock.patch('tempfile.tempdir', str(tmpdir)):
+        yield tmpdir
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_pool_keeps_size_ready(mock_tmpdir_tempfile):
+    with VirtualenvPool(size=2, runner_factory=MockBuildRunner) as pool:
+        wait_for(lambda: len(mock_tmpdir_tempfile.listdir()) == 2)
+        virtualenv_dir = pool.acquire(timeout=5)
+        assert os.path.isfile(os.path.join(virtualenv_dir, 'built'))
+        wait_for(lambda: len(mock_tmpdir_tempfile.listdir()) == 3)
+        pool.release(virtualenv_dir)
+        wait_for(lambda: not os.path.exists(virtualenv_dir))
+
+    assert not mock_tmpdir_tempfile.listdir()
+
+
+def test_pool_max_age(mock_tmpdir_tempfile):
+    with VirtualenvPool(size=1, max_age=0.05,
+                        runner_factory=MockBuildRunner) as pool:
+        first = pool.acquire(timeout=5)
+        pool.release(first)
+        wait_for(lambda: len(mock_tmpdir_tempfile.listdir()) == 1)
+        old = mock_tmpdir_tempfile.listdir()[0]
+        wait_for(lambda: not old.exists())
+        assert os.path.isfile(os.path.join(pool.acquire(timeout=5), 'built'))
+
+
+def test_pool_build_error(mock_tmpdir_tempfile):
+    with VirtualenvPool(
+            runner_factory=lambda d: MockBuildRunner(
+                d, error=Exception('message'))) as pool:
+        with pytest.raises(Exception) as excinfo:
+            pool.acquire(timeout=5)
+
+    assert str(excinfo.value) == 'message'
+    assert not mock_tmpdir_tempfile.listdir()
+
+
+def test_pool_acquire_timeout(mock_tmpdir_tempfile):
+    with VirtualenvPool(size=0) as pool:
+        with pytest.raises(RuntimeError):
+            pool.acquire(timeout=0.01)
+
+
+def test_pooled_tmpvenv_runner(mock_tmpdir_tempfile,
+                               mock_subprocess_check_call):
+    with VirtualenvPool(runner_factory=MockBuildRunner) as pool:
+        with mock.patch('virtualenvrunner.runner.ActivateEnv') as p:
+            p.return_value.env = {'name': 'value'}
+            with PooledTmpVenvRunner(pool, timeout=5) as runner:
+                virtualenv_dir = runner.virtualenv_dir
+                activate_this = runner.activate_this
+                runner.run('cmd')
+        wait_for(lambda: not os.path.exists(virtualenv_dir))
+
+    p.assert_called_once_with(activate_this)
+    assert os.path.dirname(virtualenv_dir) == str(mock_tmpdir_tempfile)
+    mock_subprocess_check_call.assert_called_once_with(
+        'cmd', shell=True, env={'name': 'value'}, stdout=None)
+
+
+def test_pool_with_runner(mock_tmpdir_tempfile, patchermock_mock):
+    with mock.patch('virtualenvrunner.runner.ActivateEnv'):
+        with VirtualenvPool(virtualenv_reqs='requirements.txt') as pool:
+            pool.acquire(timeout=5)
+
+    assert any(c[1][0] == 'pip install -r requirements.txt'
+               for c in patchermock_mock.patch.mock_calls)
@@ -0,0 +1,48 @@
+import os
+import pytest
+from virtualenvrunner.wheelhouse import Wheelhouse
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+@pytest.fixture
+def requirements(tmpdir):
+    path = tmpdir.join('requirements.txt')
+    path.write('six==1.16.0\n')
+    return str(path)
+
+
+@pytest.fixture
+def wheelhouse(tmpdir):
+    return Wheelhouse(str(tmpdir.join('wheelhouse')))
+
+
+def test_wheel_cmd(wheelhouse):
+    assert wheelhouse.wheel_cmd('reqs', 'index') == (
+        'pip wheel -r reqs -w {path} --find-links {path} -i index'.format(
+            path=wheelhouse.path))
+
+
+def test_install_options(wheelhouse):
+    assert wheelhouse.install_options == (
+        '--no-index --find-links {}'.format(wheelhouse.path))
+
+
+def test_populated_per_requirements_and_index(wheelhouse, requirements):
+    with wheelhouse.lock:
+        wheelhouse.mark_populated(requirements, 'index')
+
+    assert wheelhouse.is_populated(requirements, 'index')
+    assert not wheelhouse.is_populated(requirements)
+    with open(requirements, 'a') as f:
+        f.write('crl.devutils\n')
+    assert not wheelhouse.is_populated(requirements, 'index')
+
+
+def test_not_populated_without_requirements(wheelhouse, tmpdir):
+    requirements = str(tmpdir.join('missing'))
+    os.makedirs(wheelhouse.path)
+    wheelhouse.mark_populated(requirements)
+
+    assert not wheelhouse.is_populated(requirements)
@@ -0,0 +1,144 @@
+import os
+import pickle
+import sys
+import pytest
+from virtualenvrunner.worker import Worker, WorkerCrashed, WorkerError
+
+
+__copyright__ = 'Copyright (C) 2021, Nokia'
+
+
+@pytest.fixture
+def worker():
+    w = Worker(sys.executable)
+    try:
+        yield w
+    finally:
+        w.stop()
+
+
+def test_worker_started_once_for_requests(worker):
+    pids = [worker.call(os.getpid) for _ in range(3)]
+
+    assert pids == [worker.pid] * 3
+    assert worker.pid != os.getpid()
+
+
+def test_call_returns_result(worker):
+    assert worker.call(divmod, 7, 2) == (3, 1)
+    assert worker.call(int, '11', base=2) == 3
+
+
+def test_execute_in_fresh_namespace(worker):
+    worker.execute('x = 1')
+
+    with pytest.raises(WorkerError) as excinfo:
+        worker.execute('x')
+
+    assert excinfo.value.remote_type == 'NameError'
+
+
+def test_execute_successful_exit(worker):
+    assert worker.execute('import sys; sys.exit(0)') is None
+    assert worker.is_alive
+
+
+def test_remote_exception_raised_as_worker_error(worker):
+    with pytest.raises(WorkerError) as excinfo:
+        worker.execute('raise ValueError("message")')
+
+    assert str(excinfo.value) == 'ValueError: message'
+    assert 'File "<worker>"' in excinfo.value.remote_traceback
+    assert worker.is_alive
+
+
+def test_failing_exit_raised_as_worker_error(worker):
+    with pytest.raises(WorkerError) as excinfo:
+        worker.execute('raise SystemExit(2)')
+
+    assert excinfo.value.remote_type == 'SystemExit'
+    assert worker.is_alive
+
+
+def test_unpicklable_request_does_not_start_worker(worker):
+    with pytest.raises(Exception):
+        worker.call(lambda: None)
+
+    assert worker.pid is None
+
+
+def test_unpicklable_result_raises_pickling_error(worker):
+    with pytest.raises(pickle.PicklingError):
+        worker.call(eval, 'lambda: None')
+
+    assert worker.is_alive
+
+
+def test_crashed_worker_restarted(worker):
+    pid = worker.call(os.getpid)
+
+    with pytest.raises(WorkerCrashed):
+        worker.execute('import os; os._exit(3)')
+
+    assert worker.call(os.getpid) != pid
+
+
+def test_dead_worker_restarted_for_next_request(worker):
+    pid = worker.call(os.getpid)
+    worker._proc.kill()  # pylint: disable=protected-access
+    worker._proc.wait()  # pylint: disable=protected-access
+
+    assert worker.call(os.getpid) != pid
+
+
+def test_worker_restarted_after_max_requests():
+    with Worker(sys.executable, max_requests=2) as worker:
+        pids = [worker.call(os.getpid) for _ in range(4)]
+
+    assert pids[0] == pids[1] != pids[2] == pids[3]
+
+
+def test_output_of_worker_not_mixed_with_replies(worker, capfd):
+    worker.execute('print("output")')
+
+    assert worker.call(len, 'abc') == 3
+    assert 'output' in capfd.readouterr().err
+
+
+def test_worker_environment(worker):
+    worker.env = dict(os.environ, WORKER_VARIABLE='value')
+
+    assert worker.call(os.getenv, 'WORKER_VARIABLE') == 'value'
+
+
+def test_stop_worker(worker):
+    worker.start()
+    proc = worker._proc  # pylint: disable=protected-access
+
+    worker.stop()
+
+    assert proc.returncode == 0
+    assert not worker.is_alive
+
+
+def test_call_reraises_original_exception(worker):
+    with pytest.raises(ValueError) as excinfo:
+        worker.call(int, 'x')
+
+    assert 'invalid literal' in str(excinfo.value)
+    assert 'ValueError' in excinfo.value.remote_traceback
+
+
+def test_call_unpicklable_exception(worker):
+    with pytest.raises(WorkerError) as excinfo:
+        worker.call(eval,
+                    "(_ for _ in ()).throw(type('E', (Exception,), {})())")
+
+    assert excinfo.value.remote_type == 'E'
+
+
+def test_call_does_not_reraise_system_exit(worker):
+    with pytest.raises(WorkerError) as excinfo:
+        worker.call(sys.exit, 3)
+
+    assert excinfo.value.remote_type == 'SystemExit'